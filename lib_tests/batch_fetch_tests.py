@@ -0,0 +1,74 @@
+import asyncio
+import os
+import unittest
+from lib_tests.stub_server import StubServer
+from yf_scraper_lib.yf_http_session import configure_session, settings
+from yf_scraper_lib.yf_etf_scraper import ETFData
+from yf_scraper_lib.yf_batch_fetch import *
+
+fixtures = os.path.join(os.path.dirname(__file__), "fixtures")
+tickers_etf_list = ["XTL", "SPMO", "VPU", "VUG", "SPY"]
+
+
+def etf_pages():
+    with open(os.path.join(fixtures, "etf_quote.html"), "rb") as f:
+        page = f.read()
+    return {f"/quote/{ticker}?p={ticker}": page for ticker in tickers_etf_list}
+
+
+class BatchFetchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+
+    def tearDown(self):
+        settings.update(self.settings)
+        configure_session()
+
+    def test_fetch_many(self):
+        with StubServer(etf_pages()) as server:
+            configure_session(base_url=server.url)
+            res = asyncio.run(fetch_many(ETFData, tickers_etf_list, concurrency=3))
+            self.assertEqual([yf.ticker for yf in res], tickers_etf_list)
+            self.assertEqual(len(server.requests), len(tickers_etf_list))
+            for yf in res:
+                self.assertEqual(yf.get_current_price(), 1054.27)
+                self.assertEqual(yf.get_nav(), "1,053.92")
+                self.assertEqual(yf.get_expense_ratio(), "0.13%")
+
+    def test_fetch_many_exceptions(self):
+        with StubServer(etf_pages()) as server:
+            configure_session(base_url=server.url)
+            res = fetch_many_sync(ETFData, ["SPY", "UNKNOWN"], return_exceptions=True)
+            self.assertEqual(res[0].get_day_range(), "1049.80 - 1057.96")
+            self.assertRaises(IndexError, res[1].get_nav)
+            res = fetch_many_sync(ETFData, ["SPY"], return_exceptions=True, unknown_argument=True)
+            self.assertIsInstance(res[0], TypeError)
+
+    def test_lazy_objects_and_prefetch(self):
+        with StubServer(etf_pages()) as server:
+            configure_session(base_url=server.url)
+            objs = [ETFData(ticker) for ticker in tickers_etf_list]
+            self.assertEqual(len(server.requests), 0)
+            self.assertEqual(objs[0].get_net_assets(), "3.47B")
+            self.assertEqual(len(server.requests), 1)
+            self.assertIs(prefetch(objs[:3], concurrency=2)[2], objs[2])
+            self.assertEqual(len(server.requests), 3)
+            self.assertTrue(all(yf.loaded for yf in objs[:3]))
+            self.assertFalse(any(yf.loaded for yf in objs[3:]))
+
+    def test_prefetch_in_running_loop(self):
+        with StubServer(etf_pages()) as server:
+            configure_session(base_url=server.url)
+
+            async def notebook_cell():
+                objs = prefetch([ETFData(ticker) for ticker in tickers_etf_list[:2]])
+                return objs, fetch_many_sync(ETFData, tickers_etf_list[2:])
+            objs, more = asyncio.run(notebook_cell())
+            self.assertTrue(all(yf.loaded for yf in objs + more))
+            self.assertEqual([yf.ticker for yf in more], tickers_etf_list[2:])
+            self.assertEqual(len(server.requests), len(tickers_etf_list))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Fetch, parse and extract latency of every scraper class and getter over the replayed fixture pages.
+    python -m lib_tests.benchmarks [--repeat N] [--threshold 0.5] [--save-baseline]
+The "import" case times a cold import of every module in a fresh interpreter.
+Every run also times a reference parse (html.parser over a fixture statement page) and each timing is divided
+by it, so that lib_tests/benchmark_baselines.json holds ratios that stay comparable across machines. A ratio
+above its baseline by more than the threshold is reported as a regression and the exit status is 1.
+--save-baseline rewrites the baselines from the current run.
+"""
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+from yf_scraper_lib.yf_parsing import make_soup
+from yf_scraper_lib.yf_http_session import configure_session, settings
+from yf_scraper_lib.yf_replay import replay_session
+from yf_scraper_lib.yf_etf_scraper import ETFData, ETFHoldingsData, ETFPerformanceData, ETFRiskData
+from yf_scraper_lib.yf_stocks_scraper import (BenchmarkData, FinancialStatementsProfileData, StocksProfileData,
+                                              StockStatisticsData)
+from yf_scraper_lib.yf_crosses_scraper import CrossCurrencyData
+
+fixtures = os.path.join(os.path.dirname(__file__), "fixtures")
+baselines_path = os.path.join(os.path.dirname(__file__), "benchmark_baselines.json")
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# parsed by html.parser to get the reference duration of every run
+reference_page = os.path.join(fixtures, "financials.html")
+# below this many seconds a slowdown is timer noise, not a regression
+noise_floor = 20e-6
+
+modules = ["yf_scraper_lib.yf_etf_scraper", "yf_scraper_lib.yf_stocks_scraper", "yf_scraper_lib.yf_crosses_scraper",
+           "yf_scraper_lib.yf_screener_creator", "yf_scraper_lib.yf_batch_fetch"]
+
+# case name -> (object factory, [(getter, args), ...])
+cases = {
+    "ETFData": (lambda: ETFData("SPMO"), [
+        ("get_current_price", ()), ("get_last_52_week_range", ()), ("get_day_range", ()), ("get_net_assets", ()),
+        ("get_nav", ()), ("get_inception_date", ()), ("get_expense_ratio", ())]),
+    "ETFHoldingsData": (lambda: ETFHoldingsData("PICK"), [
+        ("get_top_holdings", ()), ("get_overall_portfolio_composition", ()), ("get_sector_weightings", ()),
+        ("get_equity_holdings", ()), ("get_bond_ratings", ()), ("to_records", ())]),
+    "ETFPerformanceData": (lambda: ETFPerformanceData("VUG"), [
+        ("get_trailing_period_available", ()), ("get_fund_trailing_performance_vs_benchmark", ("1-Year",)),
+        ("get_years_available_for_total_return", ()), ("get_total_return_fund_vs_benchmark", ("2020",)),
+        ("to_records", ())]),
+    "ETFRiskData": (lambda: ETFRiskData("VUG"), [
+        ("get_fund_risk_data_types", ()), ("get_fund_risk_data_by_type", ("Sharpe Ratio",))]),
+    "StocksProfileData": (lambda: StocksProfileData("AAPL"), [
+        ("get_current_price", ()), ("get_stock_sector", ()), ("get_stock_industry", ())]),
+    "StockStatisticsData": (lambda: StockStatisticsData("GLE.PA"), [
+        ("get_stats_types", ()), ("get_data_types_by_stats_type", ("Balance Sheet",)),
+        ("get_statistics", ("Dividends & Splits", "Payout Ratio")), ("get_all_statistics", ())]),
+    "FinancialStatementsProfileData": (lambda: FinancialStatementsProfileData("GLE.PA", "financials"), [
+        ("get_data_types", ()), ("get_accounting_data", ("Pretax Income", ["year_1", "year_2"])),
+        ("to_dataframe", ())]),
+    "BenchmarkData": (lambda: BenchmarkData("GSPC"), [
+        ("get_current_price", ()), ("get_last_52_week_range", ()), ("get_day_range", ()),
+        ("get_previous_close", ())]),
+    "CrossCurrencyData": (lambda: CrossCurrencyData("EURUSD=X"), [
+        ("get_current_price", ()), ("get_last_52_week_range", ()), ("get_day_range", ()),
+        ("get_previous_close", ())]),
+}
+
+
+def timed(function, repeat, setup=None):
+    """
+    :return: the best duration in seconds of function(setup()) over repeat runs after a warm-up run,
+             setup is not timed and the garbage collector is paused like in timeit
+    """
+    timings = []
+    function(setup() if setup is not None else None)
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            arg = setup() if setup is not None else None
+            start = time.perf_counter()
+            function(arg)
+            timings.append(time.perf_counter() - start)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return min(timings)
+
+
+def run(repeat=20):
+    """
+    :return: dict case -> dict stage -> best seconds, stages are "fetch", "parse" and one per getter
+    A getter is timed on a freshly parsed object, so what it caches on first call is part of its cost.
+    """
+    throttle = settings["throttle"]
+    configure_session(session=replay_session(fixtures), throttle=False)
+    try:
+        results = {}
+        for name, (factory, getters) in cases.items():
+            page = factory().fetch()
+            stages = {"fetch": timed(lambda _: factory().fetch(), repeat),
+                      "parse": timed(lambda obj: obj.load(page), repeat, factory)}
+            for getter, args in getters:
+                stages[getter] = timed(lambda obj: getattr(obj, getter)(*args), repeat,
+                                       lambda: factory().load(page))
+            results[name] = stages
+        return results
+    finally:
+        configure_session(throttle=throttle)
+
+
+def reference_time(repeat=20):
+    """
+    :return: the best seconds of the reference parse, the unit of the baselines
+    """
+    with open(reference_page, "rb") as f:
+        page = f.read()
+    return timed(lambda _: make_soup(page, "html.parser"), repeat)
+
+
+def ratios(results, reference):
+    """
+    :return: results with every duration divided by the reference duration
+    """
+    return {name: {stage: seconds / reference for stage, seconds in stages.items()} for name, stages in results.items()}
+
+
+def import_time(module):
+    """
+    :return: the seconds taken by "import module" in a new interpreter and the modules it loaded
+    """
+    code = ("import sys, time; start = time.perf_counter(); import {}; seconds = time.perf_counter() - start; "
+            "print(seconds); print(' '.join(sys.modules))").format(module)
+    output = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True).stdout
+    seconds, loaded = output.splitlines()[-2:]
+    return float(seconds), set(loaded.split())
+
+
+def import_times(repeat=5):
+    """
+    :return: dict module -> best cold import seconds over repeat interpreters
+    """
+    return {module: min(import_time(module)[0] for _ in range(repeat)) for module in modules}
+
+
+def regressions(results, baselines, reference, threshold=0.5):
+    """
+    :param results: what run returned, in seconds
+    :param baselines: the same layout in ratios to the reference duration
+    :param reference: what reference_time returned in the run of results
+    :return: list of (case, stage, baseline ratio, current ratio) above baseline * (1 + threshold)
+    """
+    slower = []
+    for name, stages in results.items():
+        for stage, seconds in stages.items():
+            baseline = baselines.get(name, {}).get(stage)
+            ratio = seconds / reference
+            if baseline is not None and ratio > baseline * (1 + threshold) and \
+                    seconds - baseline * reference > noise_floor:
+                slower.append((name, stage, baseline, ratio))
+    return slower
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--repeat", type=int, default=20)
+    arg_parser.add_argument("--threshold", type=float, default=0.5)
+    arg_parser.add_argument("--save-baseline", action="store_true")
+    args = arg_parser.parse_args()
+    results = run(args.repeat)
+    results["import"] = import_times(min(args.repeat, 5))
+    reference = reference_time(args.repeat)
+    baselines = {}
+    if os.path.exists(baselines_path):
+        with open(baselines_path) as f:
+            baselines = json.load(f)
+    print(f"reference parse {reference * 1e6:.1f}us")
+    print(f"{'case':<32}{'stage':<44}{'us':>10}{'ratio':>10}{'baseline':>10}")
+    for name, stages in results.items():
+        for stage, seconds in stages.items():
+            baseline = baselines.get(name, {}).get(stage)
+            print(f"{name:<32}{stage:<44}{seconds * 1e6:>10.1f}{seconds / reference:>10.4f}"
+                  f"{'' if baseline is None else format(baseline, '.4f'):>10}")
+    if args.save_baseline:
+        with open(baselines_path, "w") as f:
+            json.dump(ratios(results, reference), f, indent=2, sort_keys=True)
+        print(f"baselines saved to {baselines_path}")
+        return 0
+    slower = regressions(results, baselines, reference, args.threshold)
+    for name, stage, baseline, ratio in slower:
+        print(f"REGRESSION {name}.{stage}: {baseline:.4f} -> {ratio:.4f} of the reference parse")
+    return 1 if slower else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
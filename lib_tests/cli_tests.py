@@ -0,0 +1,84 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from lib_tests.stub_server import StubServer
+from yf_scraper_lib.yf_http_session import configure_session, settings
+from yf_scraper_lib.yf_cli import *
+
+fixtures = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class CliTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+        self.directory = tempfile.TemporaryDirectory()
+        self.tickers = os.path.join(self.directory.name, "tickers.txt")
+
+    def tearDown(self):
+        settings.update(self.settings)
+        configure_session()
+        self.directory.cleanup()
+
+    def write_tickers(self, tickers):
+        with open(self.tickers, "w") as f:
+            f.write("# tickers\n\n" + "\n".join(tickers) + "\n")
+
+    def test_ndjson(self):
+        self.write_tickers(["GLE.PA", "UNKNOWN"])
+        output = os.path.join(self.directory.name, "statistics.ndjson")
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            status = main(["fetch", "--kind", "statistics", "--fields", "Trailing P/E,Profit Margin", "--tickers",
+                           self.tickers, "--output", output, "--replay", fixtures, "--processes", "1"])
+        with open(output) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(sorted(records, key=lambda record: record["ticker"]),
+                         [{"ticker": "GLE.PA", "Trailing P/E": "8.72", "Profit Margin": "19.89%"},
+                          {"ticker": "UNKNOWN", "Trailing P/E": None, "Profit Margin": None}])
+        self.assertEqual(status, 0)
+        self.assertEqual(stderr.getvalue(), "")
+        self.assertEqual(read_checkpoint(output + ".checkpoint"), {"GLE.PA", "UNKNOWN"})
+        with contextlib.redirect_stderr(stderr), self.assertRaises(SystemExit):
+            main(["fetch", "--kind", "etf", "--fields", "nav,unknown", "--tickers", self.tickers])
+
+    def test_csv_resume(self):
+        with open(os.path.join(fixtures, "etf_quote.html"), "rb") as f:
+            page = f.read()
+        tickers = [f"T{index}" for index in range(5)]
+        self.write_tickers(tickers + ["MISSING"])
+        output = os.path.join(self.directory.name, "etf.csv")
+        arguments = ["fetch", "--kind", "etf", "--fields", "nav,expense_ratio", "--tickers", self.tickers, "--output",
+                     output, "--processes", "1", "--concurrency", "2"]
+        with StubServer({f"/quote/{ticker}?p={ticker}": page for ticker in tickers}) as server:
+            configure_session(base_url=server.url, throttle=False, retries=0)
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                self.assertEqual(main(arguments), 1)
+            self.assertEqual(json.loads(stderr.getvalue())["ticker"], "MISSING")
+            with open(output) as f:
+                lines = f.read().splitlines()
+            self.assertEqual(lines[0], "ticker,nav,expense_ratio")
+            self.assertEqual(sorted(lines[1:]), [f'{ticker},"1,053.92",0.13%' for ticker in tickers])
+            # a run killed while writing T2
+            with open(output, "w") as f:
+                f.write('ticker,nav,expense_ratio\nT0,"1,053.92",0.13%\nT1,"1,053.92",0.13%\nT2,"1,0')
+            with open(output + ".checkpoint", "w") as f:
+                f.write("T0\nT1\nT2")
+            del server.requests[:]
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(main(arguments + ["--resume"]), 1)
+            self.assertEqual(sorted(path for path, _, _ in server.requests if "MISSING" not in path),
+                             [f"/quote/{ticker}?p={ticker}" for ticker in tickers[2:]])
+        with open(output) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], "ticker,nav,expense_ratio")
+        self.assertEqual(sorted(lines[1:]), [f'{ticker},"1,053.92",0.13%' for ticker in tickers])
+        self.assertEqual(read_checkpoint(output + ".checkpoint"), set(tickers))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+import unittest
+from lib_tests.stub_server import StubServer
+from yf_scraper_lib.yf_http_session import configure_session, fetch_page, settings
+from yf_scraper_lib.yf_page import set_document_cache
+from yf_scraper_lib.yf_etf_scraper import ETFData
+from yf_scraper_lib.yf_stocks_scraper import FinancialStatementsProfileData, StockStatisticsData
+from yf_scraper_lib.yf_coalesce import *
+
+fixtures = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class SlowServer(StubServer):
+
+    def respond(self, path):
+        time.sleep(0.3)
+        return super().respond(path)
+
+
+def run_threads(function, count=8):
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = function()
+        except Exception as error:
+            results[index] = error
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class CoalesceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+        with open(os.path.join(fixtures, "etf_quote.html"), "rb") as f:
+            self.page = f.read()
+
+    def tearDown(self):
+        settings.update(self.settings)
+        configure_session()
+        set_document_cache(None)
+
+    def test_single_flight(self):
+        flight, calls = SingleFlight(), []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.2)
+            return object()
+        results = run_threads(lambda: flight.do("key", slow))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(len(flight), 0)
+
+        def failing():
+            time.sleep(0.2)
+            raise ValueError("down")
+        self.assertTrue(all(isinstance(result, ValueError) for result in run_threads(lambda: flight.do("key", failing))))
+        self.assertEqual(flight.do("key", lambda: 1), 1)
+
+    def test_fetch_page(self):
+        with SlowServer({"/quote/SPMO?p=SPMO": self.page}) as server:
+            configure_session(base_url=server.url, throttle=False)
+            url = server.url + "/quote/SPMO?p=SPMO"
+            self.assertTrue(all(result == self.page for result in run_threads(lambda: fetch_page(url))))
+            self.assertEqual(len(server.requests), 1)
+            configure_session(single_flight=False)
+            run_threads(lambda: fetch_page(url), 4)
+            self.assertEqual(len(server.requests), 5)
+
+    def test_document_cache(self):
+        with SlowServer({"/quote/SPMO?p=SPMO": self.page}) as server:
+            configure_session(base_url=server.url, throttle=False)
+            cache = DocumentCache(max_entries=2, ttl=60)
+            set_document_cache(cache)
+            objs = run_threads(lambda: ETFData("SPMO").load(), 4)
+            self.assertEqual(len(server.requests), 1)
+            self.assertTrue(all(obj.state is objs[0].state is not None for obj in objs))
+            self.assertEqual(ETFData("SPMO").get_nav(), "1,053.92")
+            self.assertEqual(len(server.requests), 1)
+            # another page type, another driver setting and another parser are other documents
+            self.assertNotEqual(FinancialStatementsProfileData("SPMO", "financials").document_key(),
+                                FinancialStatementsProfileData("SPMO", "financials", driver=True).document_key())
+            self.assertNotEqual(ETFData("SPMO").document_key(), ETFData("SPMO", parser="lxml").document_key())
+            StockStatisticsData("A").load()
+            StockStatisticsData("B").load()
+            self.assertEqual(len(cache), 2)
+            ETFData("SPMO").load()
+            self.assertEqual(len(server.requests), 4)
+            cache.ttl = 0
+            ETFData("SPMO").load()
+            self.assertEqual(len(server.requests), 5)
+
+    def test_document_cache_size(self):
+        cache = DocumentCache(max_entries=10, max_bytes=1000, parse_factor=10)
+        for key in "abc":
+            cache.put(key, key.upper(), page_bytes=40)
+        self.assertEqual((len(cache), cache.total_bytes), (2, 800))
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), "B")
+        cache.put("d", "D", page_bytes=30)
+        # c was the least recently used
+        self.assertEqual([key for key in "abcd" if cache.get(key) is not None], ["b", "d"])
+        cache.put("e", "E", page_bytes=200)
+        self.assertIsNone(cache.get("e"))
+        self.assertEqual(cache.total_bytes, 700)
+        self.assertEqual(cache.get_or_load("f", lambda: ("F", 30)), "F")
+        self.assertEqual((len(cache), cache.total_bytes), (3, 1000))
+        cache.put("g", "G", page_bytes=1)
+        self.assertEqual([key for key in "bdfg" if cache.get(key) is not None], ["d", "f", "g"])
+        cache.clear()
+        self.assertEqual((len(cache), cache.total_bytes), (0, 0))
+
+    def test_document_cache_page_size(self):
+        with SlowServer({"/quote/SPMO?p=SPMO": self.page}) as server:
+            configure_session(base_url=server.url, throttle=False)
+            cache = DocumentCache(max_bytes=len(self.page) * 10 * 2, parse_factor=10)
+            set_document_cache(cache)
+            ETFData("SPMO").load()
+            self.assertEqual(cache.total_bytes, len(self.page) * 10)
+            cache.max_bytes = len(self.page) * 10 - 1
+            ETFData("VUG").load()
+            ETFData("SPMO").load()
+            # the SPMO page is above the budget now, it was loaded again and not kept
+            self.assertEqual(len(server.requests), 3)
+            self.assertEqual(cache.total_bytes, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import threading
+import unittest
+from yf_scraper_lib.yf_driver_pool import *
+
+
+class FakeDriver:
+
+    def __init__(self, opened):
+        opened.append(self)
+        self.urls = []
+        self.quitted = False
+
+    def get(self, url):
+        self.urls.append(url)
+
+    def quit(self):
+        self.quitted = True
+
+
+class DriverPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        self.opened, self.consents = [], []
+        self.factory = lambda: FakeDriver(self.opened)
+
+    def test_browsers_are_reused_and_consent_handled_once(self):
+        with DriverPool(size=2, driver_factory=self.factory, handle_consent=self.consents.append) as pool:
+            for ticker in ["AAPL", "GLE.PA", "BNP.PA"]:
+                with pool.page(f"https://finance.yahoo.com/quote/{ticker}/financials") as driver:
+                    self.assertIs(driver, self.opened[0])
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(self.consents, self.opened)
+        self.assertEqual(len(self.opened[0].urls), 3)
+        self.assertTrue(self.opened[0].quitted)
+
+    def test_recycling_after_max_pages(self):
+        with DriverPool(size=1, max_pages=2, driver_factory=self.factory, handle_consent=self.consents.append) as pool:
+            for _ in range(5):
+                with pool.page("https://finance.yahoo.com/quote/AAPL/financials"):
+                    pass
+        self.assertEqual(len(self.opened), 3)
+        self.assertEqual(len(self.consents), 3)
+        self.assertTrue(all(driver.quitted for driver in self.opened))
+
+    def test_broken_browser_is_replaced(self):
+        with DriverPool(size=1, driver_factory=self.factory, handle_consent=None) as pool:
+            with self.assertRaises(ValueError):
+                with pool.page("https://finance.yahoo.com/quote/AAPL/financials"):
+                    raise ValueError
+            self.assertTrue(self.opened[0].quitted)
+            with pool.page("https://finance.yahoo.com/quote/AAPL/financials") as driver:
+                self.assertIs(driver, self.opened[1])
+        self.assertRaises(RuntimeError, pool.driver().__enter__)
+
+    def test_pool_size_bounds_open_browsers(self):
+        pool = DriverPool(size=2, driver_factory=self.factory, handle_consent=None)
+        barrier = threading.Barrier(2)
+        busy = []
+
+        def work():
+            with pool.driver() as pooled:
+                busy.append(pooled)
+                barrier.wait(timeout=5)
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        pool.close()
+        self.assertEqual(len(self.opened), 2)
+        self.assertEqual(len(busy), 6)
+
+    def test_shared_pool(self):
+        pool = DriverPool(driver_factory=self.factory)
+        set_driver_pool(pool)
+        self.assertIs(get_driver_pool(), pool)
+        set_driver_pool(None)
+        self.assertTrue(pool.closed)
+        self.assertIsNot(get_driver_pool(), pool)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+import tempfile
+import threading
+import time
+import unittest
+import requests
+from lib_tests.stub_server import StubServer
+from yf_scraper_lib.yf_http_session import *
+from yf_scraper_lib.yf_latency import LatencyHistogram
+from yf_scraper_lib.yf_page_archive import PageArchive
+from yf_scraper_lib.yf_page_cache import PageCache
+
+
+class ScriptedServer(StubServer):
+    """
+    Answers the n-th request with script[n] = (seconds to wait, status), the last entry for the ones after.
+    """
+
+    def __init__(self, script):
+        super().__init__()
+        self.script = script
+        self.lock = threading.Lock()
+
+    def respond(self, path):
+        with self.lock:
+            seconds, status = self.script[min(len(self.requests), len(self.script)) - 1]
+        time.sleep(seconds)
+        return status, b"ok" if status == 200 else b"", {}
+
+
+class HttpSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+
+    def tearDown(self):
+        settings.update(self.settings)
+        configure_session()
+        set_page_cache(None)
+        set_page_archive(None)
+
+    def test_connection_is_reused(self):
+        with StubServer({"/quote/SPY": b"<html>SPY</html>", "/quote/VUG": b"<html>VUG</html>"}) as server:
+            self.assertEqual(fetch_page(server.url + "/quote/SPY"), b"<html>SPY</html>")
+            self.assertEqual(fetch_page(server.url + "/quote/VUG"), b"<html>VUG</html>")
+            ports = {port for _, port, _ in server.requests}
+            self.assertEqual(len(ports), 1)
+
+    def test_shared_session(self):
+        self.assertIs(get_session(), get_session())
+        configure_session(pool_maxsize=4)
+        self.assertEqual(get_session().get_adapter("https://finance.yahoo.com")._pool_maxsize, 4)
+
+    def test_injected_session(self):
+        session = requests.Session()
+        configure_session(session=session)
+        self.assertIs(get_session(), session)
+        with StubServer({"/quote/SPY": b"ok"}) as server:
+            own = requests.Session()
+            self.assertEqual(fetch_page(server.url + "/quote/SPY", session=own), b"ok")
+
+    def test_accept_encoding(self):
+        configure_session(compression=("gzip",))
+        with StubServer({"/": b"ok"}) as server:
+            fetch_page(server.url + "/")
+            self.assertEqual(server.requests[0][2]["Accept-Encoding"], "gzip")
+
+    def test_deadline(self):
+        with ScriptedServer([(2, 200)]) as server:
+            start = time.monotonic()
+            with self.assertRaises(requests.Timeout):
+                fetch_page(server.url + "/", deadline=0.3)
+            self.assertLess(time.monotonic() - start, 1.5)
+        configure_session(deadline=0.05)
+        with ScriptedServer([(0.3, 200)]) as server:
+            self.assertEqual(fetch_page(server.url + "/", deadline=False), b"ok")
+        configure_session(deadline=False)
+        with ScriptedServer([(0.3, 200)]) as server:
+            self.assertEqual(fetch_page(server.url + "/"), b"ok")
+
+    def test_retry_after_server_error(self):
+        configure_session(backoff=0.01)
+        with ScriptedServer([(0, 503), (0, 502), (0, 200)]) as server:
+            self.assertEqual(fetch_page(server.url + "/"), b"ok")
+            self.assertEqual(len(server.requests), 3)
+
+    def test_throttled_page_is_not_kept(self):
+        configure_session(backoff=0.01, retries=1)
+        with ScriptedServer([(0, 503)]) as server:
+            with self.assertRaises(ThrottledError) as raised:
+                fetch_page(server.url + "/")
+            self.assertEqual(raised.exception.response.status_code, 503)
+            self.assertEqual(len(server.requests), 2)
+        with tempfile.TemporaryDirectory() as directory:
+            cache, archive = PageCache(directory + "/cache"), PageArchive(directory + "/archive")
+            set_page_cache(cache)
+            set_page_archive(archive)
+            # Yahoo answering 200 with an empty body under load
+            with StubServer({"/quote/SPY": b""}) as server:
+                self.assertRaises(ThrottledError, fetch_page, server.url + "/quote/SPY")
+                self.assertIsNone(cache.lookup(server.url + "/quote/SPY"))
+            self.assertEqual(len(archive), 0)
+            archive.close()
+
+    def test_hedged_request(self):
+        configure_session(hedge=0.1)
+        won = hedges["won"]
+        with ScriptedServer([(2, 200), (0, 200)]) as server:
+            start = time.monotonic()
+            self.assertEqual(fetch_page(server.url + "/"), b"ok")
+            self.assertLess(time.monotonic() - start, 1.5)
+        configure_session(deadline=0.05)
+        with ScriptedServer([(0.3, 200)]) as server:
+            self.assertEqual(fetch_page(server.url + "/", deadline=False), b"ok")
+        configure_session(deadline=False)
+        with ScriptedServer([(0.3, 200)]) as server:
+            self.assertEqual(fetch_page(server.url + "/"), b"ok")
+            self.assertEqual(len(server.requests), 2)
+        self.assertEqual(hedges["won"], won + 1)
+
+    def test_hedges_counted_across_threads(self):
+        configure_session(hedge=0.05, throttle=False)
+        sent = latency_stats()["sent"]
+        with ScriptedServer([(0.3, 200)]) as server:
+            threads = [threading.Thread(target=fetch_page, args=(f"{server.url}/quote/T{index}",))
+                       for index in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(server.requests), 32)
+        self.assertEqual(latency_stats()["sent"], sent + 16)
+
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.quantile(0.95))
+        for ms in range(1, 101):
+            histogram.record(ms / 1000)
+        self.assertAlmostEqual(histogram.quantile(0.95), 0.095, delta=0.0095)
+        self.assertAlmostEqual(histogram.snapshot()["mean"], 0.0505)
+        self.assertEqual(sum(count for _, count in histogram.snapshot()["buckets"]), 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import json
+import unittest
+from lib_tests.benchmarks import baselines_path, import_time, import_times, modules, reference_time, regressions
+
+# only loaded by the code paths opening a browser or drawing a User-Agent
+lazy_modules = ["selenium", "webdriver_manager", "fake_useragent"]
+# a cold import in a fresh interpreter is noisy, twice its baseline ratio is a regression
+import_threshold = 1.0
+
+
+class ImportTest(unittest.TestCase):
+
+    def test_import_has_no_side_effects(self):
+        for module in modules:
+            seconds, loaded = import_time(module)
+            self.assertEqual([name for name in lazy_modules if name in loaded], [], module)
+
+    def test_import_time_against_baseline(self):
+        with open(baselines_path) as f:
+            baselines = json.load(f)
+        self.assertEqual(set(baselines["import"]), set(modules))
+        results = {"import": import_times(repeat=3)}
+        self.assertEqual(regressions(results, baselines, reference_time(), import_threshold), [])
+
+    def test_user_agent_is_resolved_on_first_use(self):
+        from yf_scraper_lib import yf_page
+        yf_page.set_user_agent("yf-tests")
+        try:
+            self.assertEqual(yf_page.user_agent_header(), {"User-Agent": "yf-tests"})
+            self.assertEqual(yf_page.user_agent, {"User-Agent": "yf-tests"})
+        finally:
+            yf_page.set_user_agent(None)
+
+
+if __name__ == '__main__':
+    unittest.main()
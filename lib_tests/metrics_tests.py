@@ -0,0 +1,107 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from yf_scraper_lib.yf_http_session import configure_session, set_page_cache, settings
+from yf_scraper_lib.yf_page_cache import PageCache
+from yf_scraper_lib.yf_replay import replay_session
+from yf_scraper_lib.yf_etf_scraper import ETFData, ETFHoldingsData
+from yf_scraper_lib.yf_stocks_scraper import StockStatisticsData
+from yf_scraper_lib.yf_metrics import *
+
+fixtures = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def series(name, **labels):
+    return [record for record in snapshot() if record["name"] == name and
+            all(record["labels"].get(key) == value for key, value in labels.items())]
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+        configure_session(session=replay_session(fixtures), throttle=False)
+        reset_metrics()
+        enable_metrics()
+
+    def tearDown(self):
+        enable_metrics(False)
+        reset_metrics()
+        set_page_cache(None)
+        settings.update(self.settings)
+        configure_session()
+
+    def test_stages_and_getters(self):
+        ETFData("SPMO").to_dict()
+        holdings = ETFHoldingsData("PICK")
+        holdings.get_top_holdings()
+        holdings.get_bond_ratings()
+        with open(os.path.join(fixtures, "etf_holdings.html"), "rb") as f:
+            size = len(f.read())
+        self.assertEqual(series("yf_downloaded_bytes_total", **{"class": "ETFHoldingsData"})[0]["value"], size)
+        self.assertEqual(series("yf_stage_seconds", stage="state", **{"class": "ETFData"})[0]["count"], 1)
+        self.assertEqual(series("yf_stage_seconds", stage="parse", **{"class": "ETFData"}), [])
+        self.assertEqual(series("yf_stage_seconds", stage="parse", **{"class": "ETFHoldingsData"})[0]["count"], 1)
+        self.assertGreater(series("yf_dom_nodes_total", **{"class": "ETFHoldingsData"})[0]["value"], 100)
+        self.assertEqual(series("yf_getter_seconds", getter="get_nav", **{"class": "ETFData"})[0]["count"], 1)
+        # the holdings record is extracted once and timed once
+        self.assertEqual(series("yf_getter_seconds", getter="holdings")[0]["count"], 1)
+        self.assertEqual(series("yf_getter_seconds", getter="get_bond_ratings")[0]["count"], 1)
+
+    def test_disable_and_new_classes(self):
+        self.assertTrue(hasattr(ETFData.get_nav, "__wrapped__"))
+
+        class Custom(StockStatisticsData):
+            def get_custom(self):
+                return self.get_statistics("Valuation Measures", "Trailing P/E")
+
+        self.assertEqual(Custom("GLE.PA").get_custom(), "8.72")
+        self.assertEqual(len(series("yf_getter_seconds", getter="get_custom", **{"class": "Custom"})), 1)
+        enable_metrics(False)
+        self.assertFalse(hasattr(ETFData.get_nav, "__wrapped__"))
+        self.assertFalse(hasattr(Custom.get_custom, "__wrapped__"))
+        reset_metrics()
+        ETFData("SPMO").to_dict()
+        self.assertEqual(series("yf_getter_seconds"), [])
+
+    def test_page_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            set_page_cache(PageCache(directory))
+            ETFData("SPMO").fetch()
+            ETFData("SPMO").fetch()
+        self.assertEqual(series("yf_page_cache_total", result="miss")[0]["value"], 1)
+        self.assertEqual(series("yf_page_cache_total", result="hit")[0]["value"], 1)
+
+    def test_exporters(self):
+        ETFData("SPMO").to_dict()
+        text = prometheus_text()
+        self.assertIn("# TYPE yf_getter_seconds histogram", text)
+        self.assertIn('yf_getter_seconds_count{class="ETFData",getter="get_nav"} 1', text)
+        self.assertIn('yf_stage_seconds_bucket{class="ETFData",stage="fetch",le="+Inf"} 1', text)
+        # every observation at or below a bound is counted in its bucket
+        observe("yf_getter_seconds", 0.098, {"class": "Test", "getter": "get"})
+        observe("yf_getter_seconds", 0.1, {"class": "Test", "getter": "get"})
+        observe("yf_getter_seconds", 0.1001, {"class": "Test", "getter": "get"})
+        text = prometheus_text()
+        self.assertIn('yf_getter_seconds_bucket{class="Test",getter="get",le="0.05"} 0', text)
+        self.assertIn('yf_getter_seconds_bucket{class="Test",getter="get",le="0.1"} 2', text)
+        self.assertIn('yf_getter_seconds_bucket{class="Test",getter="get",le="0.25"} 3', text)
+        self.assertRegex(text, r'yf_downloaded_bytes_total\{class="ETFData"\} \d+')
+        output = io.StringIO()
+        write_jsonl(output)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(len(records), len(snapshot()))
+        self.assertTrue(all("time" in record for record in records))
+
+    def test_profile_scrape(self):
+        result, report = profile_scrape(lambda: StockStatisticsData("GLE.PA").get_all_statistics())
+        self.assertEqual(result["Valuation Measures"]["Trailing P/E"], "8.72")
+        self.assertIn("get_all_statistics", report["profile"])
+        self.assertGreater(report["peak_bytes"], 0)
+        self.assertTrue(report["allocations"])
+
+
+if __name__ == '__main__':
+    unittest.main()
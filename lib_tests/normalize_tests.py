@@ -0,0 +1,40 @@
+import math
+import unittest
+from yf_scraper_lib.yf_normalize import *
+from yf_scraper_lib.yf_stocks_scraper import FinancialStatementsProfileData
+
+
+class NormalizeTest(unittest.TestCase):
+
+    def test_to_numbers(self):
+        values = to_numbers(["1.23B", "0.09%", "N/A", "-9,012,000", "8.72", "3.63M", "12.5k", "2T", None, "-",
+                             "2:1"])
+        self.assertEqual(values.dtype.name, "float64")
+        self.assertEqual([round(value, 8) if not math.isnan(value) else None for value in values.tolist()],
+                         [1.23e9, 0.0009, None, -9012000.0, 8.72, 3630000.0, 12500.0, 2e12, None, None, None])
+        self.assertEqual(to_numbers([]).shape, (0,))
+
+    def test_split_ranges(self):
+        low, high = split_ranges(["45.10 - 52.30", "N/A", "1,049.80 - 1,057.96"])
+        self.assertEqual(low.tolist()[::2], [45.1, 1049.8])
+        self.assertEqual(high.tolist()[::2], [52.3, 1057.96])
+        self.assertTrue(math.isnan(low[1]) and math.isnan(high[1]))
+
+    def test_to_dates(self):
+        dates = to_dates(["Mar 17, 2006", "2015-10-09", "12/30/2022", "Jun 1, 2023", "N/A", "Soon"])
+        self.assertEqual([str(date) for date in dates],
+                         ["2006-03-17", "2015-10-09", "2022-12-30", "2023-06-01", "NaT", "NaT"])
+
+    def test_to_typed(self):
+        self.assertEqual(to_typed(["1.5M", "N/A"]).dtype.name, "float64")
+        self.assertEqual(to_typed(["Mar 17, 2006", None]).dtype.name, "datetime64[D]")
+        self.assertEqual(to_typed(["2:1", "N/A", "3:2"]).tolist(), ["2:1", None, "3:2"])
+
+    def test_data_parsing(self):
+        self.assertEqual(FinancialStatementsProfileData.data_parsing("Total Revenue26090000,12/31/2022x,ttm,-"),
+                         ["Total Revenue", "/", "26090000", "12/", "/", "31/2022x", "ttm", "-"])
+        self.assertEqual(split_label("Total Revenue26,090,000"), ("Total Revenue", "26,090,000"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import os
+import tempfile
+import unittest
+from yf_scraper_lib.yf_http_session import configure_session, set_page_archive, settings
+from yf_scraper_lib.yf_replay import replay_session
+from yf_scraper_lib.yf_etf_scraper import ETFData
+from yf_scraper_lib.yf_stocks_scraper import BenchmarkData, StockStatisticsData
+from yf_scraper_lib.yf_page_archive import *
+
+fixtures = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def fixture(name):
+    with open(os.path.join(fixtures, name), "rb") as f:
+        return f.read()
+
+
+def failing_record(obj):
+    raise ValueError(obj.ticker)
+
+
+class PageArchiveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        set_page_archive(None)
+        settings.update(self.settings)
+        configure_session()
+        self.directory.cleanup()
+
+    def test_versions_and_segments(self):
+        url = "https://finance.yahoo.com/quote/SPY?p=SPY"
+        pages = [os.urandom(3000) for _ in range(5)]
+        with PageArchive(self.directory.name, segment_bytes=4096) as archive:
+            for day in range(5):
+                archive.append(url, pages[day], timestamp=1000.0 + day)
+            archive.append("http://127.0.0.1:8000/quote/VUG?p=VUG", b"VUG", timestamp=1002.5)
+            self.assertEqual(archive.get("https://other.host/quote/SPY?p=SPY"), pages[4])
+            self.assertEqual(archive.get(url, at=1002.5), pages[2])
+            self.assertIsNone(archive.get(url, at=999.0))
+            self.assertIsNone(archive.get("/quote/SPY/holdings?p=SPY"))
+            self.assertEqual(archive.versions(url), [1000.0, 1001.0, 1002.0, 1003.0, 1004.0])
+            self.assertGreater(len(archive.segments()), 1)
+        # a crash in the middle of an index entry and of a segment record
+        with open(os.path.join(self.directory.name, "index.bin"), "ab") as f:
+            f.write(b"\0" * 7)
+        with open(os.path.join(self.directory.name, "segment-00099.yfa"), "wb") as f:
+            f.write(b"YFPA\0\0")
+        with PageArchive(self.directory.name) as archive:
+            self.assertEqual(len(archive), 6)
+            entries = archive.entries()
+            archive.rebuild_index()
+            self.assertEqual(archive.entries(), entries)
+            self.assertEqual(archive.get(url), pages[4])
+            self.assertEqual([(key, timestamp) for key, timestamp, _ in archive.iter_pages(since=1002.0, until=1004)],
+                             [("/quote/SPY?p=SPY", 1002.0), ("/quote/SPY?p=SPY", 1003.0), ("/quote/VUG?p=VUG", 1002.5)])
+
+    def test_append_after_rebuild_index(self):
+        with PageArchive(self.directory.name) as archive:
+            archive.append("/quote/SPY?p=SPY", b"SPY", timestamp=1.0)
+            archive.rebuild_index()
+            archive.append("/quote/VUG?p=VUG", b"VUG", timestamp=2.0)
+            self.assertEqual(archive.get("/quote/VUG?p=VUG"), b"VUG")
+            self.assertEqual(len(archive), 2)
+        with PageArchive(self.directory.name) as archive:
+            self.assertEqual(archive.get("/quote/SPY?p=SPY"), b"SPY")
+            self.assertEqual(archive.get("/quote/VUG?p=VUG"), b"VUG")
+
+    def test_lookup_sees_later_appends(self):
+        with PageArchive(self.directory.name) as reader, PageArchive(self.directory.name) as writer:
+            writer.append("/quote/SPY?p=SPY", b"SPY 1", timestamp=1.0)
+            self.assertEqual(reader.get("/quote/SPY?p=SPY"), b"SPY 1")
+            # another process appending to the same directory
+            writer.append("/quote/SPY?p=SPY", b"SPY 2", timestamp=2.0)
+            writer.append("/quote/VUG?p=VUG", b"VUG", timestamp=2.0)
+            self.assertEqual(reader.get("/quote/SPY?p=SPY"), b"SPY 2")
+            self.assertEqual(reader.versions("/quote/SPY?p=SPY"), [1.0, 2.0])
+            self.assertEqual(reader.get("/quote/VUG?p=VUG"), b"VUG")
+            reader.append("/quote/QQQ?p=QQQ", b"QQQ", timestamp=3.0)
+            self.assertEqual(writer.get("/quote/QQQ?p=QQQ"), b"QQQ")
+
+    def test_record_and_build_from_archive(self):
+        archive = PageArchive(self.directory.name)
+        configure_session(session=replay_session(fixtures), throttle=False)
+        set_page_archive(archive)
+        expected = ETFData("SPMO").to_dict()
+        StockStatisticsData("GLE.PA").load()
+        ETFData("UNKNOWN").load()
+        self.assertEqual(len(archive), 2)
+        set_page_archive(None)
+        configure_session(session=replay_session(self.directory.name))
+        self.assertEqual(ETFData.from_archive(archive, "SPMO").to_dict(), expected)
+        self.assertRaises(KeyError, ETFData.from_archive, archive, "SPMO", at=0)
+        self.assertEqual(StockStatisticsData.from_archive(archive, "GLE.PA").get_statistics(
+            "Valuation Measures", "Trailing P/E"), "8.72")
+        archive.close()
+
+    def test_backfill(self):
+        with PageArchive(self.directory.name) as archive:
+            for day, ticker in enumerate(["GLE.PA", "BNP.PA", "GLE.PA"]):
+                archive.append(f"https://finance.yahoo.com/quote/{ticker}/key-statistics?p={ticker}",
+                               fixture("stock_statistics.html"), timestamp=float(day))
+            archive.append("https://finance.yahoo.com/quote/SPMO?p=SPMO", fixture("etf_quote.html"), timestamp=1.5)
+            archive.append("https://finance.yahoo.com/quote/%5EGSPC?p=%5EGSPC", fixture("benchmark_quote.html"))
+            records = list(backfill(archive, StockStatisticsData, since=1.0))
+            self.assertEqual([(ticker, timestamp) for ticker, timestamp, _ in records],
+                             [("BNP.PA", 1.0), ("GLE.PA", 2.0)])
+            self.assertEqual(records[0][2]["Profitability"]["Profit Margin"], "19.89%")
+            self.assertEqual(list(backfill(archive, StockStatisticsData, processes=2)),
+                             list(backfill(archive, StockStatisticsData)))
+            (ticker, _, record), = backfill(archive, ETFData)
+            self.assertEqual((ticker, record["nav"]), ("SPMO", "1,053.92"))
+            (ticker, _, record), = backfill(archive, BenchmarkData)
+            self.assertEqual(ticker, "GSPC")
+            self.assertRegex("/quote/EURUSD=X?p=EURUSD=X", url_pattern(ETFData))
+            self.assertNotRegex("/quote/SPMO/holdings?p=SPMO", url_pattern(ETFData))
+
+    def test_backfill_errors(self):
+        with PageArchive(self.directory.name) as archive:
+            for day, ticker in enumerate(["GLE.PA", "BNP.PA"]):
+                archive.append(f"https://finance.yahoo.com/quote/{ticker}/key-statistics?p={ticker}",
+                               fixture("stock_statistics.html"), timestamp=float(day))
+            for processes in (1, 2):
+                errors = []
+                self.assertEqual(list(backfill(archive, StockStatisticsData, failing_record, processes=processes,
+                                               errors=errors)), [])
+                self.assertEqual([(ticker, timestamp, str(error)) for ticker, timestamp, error in errors],
+                                 [("GLE.PA", 0.0, "GLE.PA"), ("BNP.PA", 1.0, "BNP.PA")])
+            self.assertRaises(ValueError, list, backfill(archive, StockStatisticsData, failing_record))
+
+
+if __name__ == '__main__':
+    unittest.main()
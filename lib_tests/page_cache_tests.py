@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+import unittest
+from lib_tests.stub_server import StubServer
+from yf_scraper_lib.yf_http_session import configure_session, fetch_page, set_page_cache, settings
+from yf_scraper_lib.yf_page_cache import *
+
+
+class ValidatingStubServer(StubServer):
+
+    def respond(self, path):
+        headers = self.requests[-1][2]
+        if headers.get("If-None-Match") == '"v1"':
+            return 304, b"", {"ETag": '"v1"'}
+        return 200, self.pages[path], {"ETag": '"v1"', "Last-Modified": "Wed, 21 Oct 2026 07:28:00 GMT"}
+
+
+class PageCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        set_page_cache(None)
+        settings.update(self.settings)
+        configure_session()
+        self.directory.cleanup()
+
+    def test_page_type(self):
+        self.assertEqual(page_type("https://finance.yahoo.com/quote/SPY?p=SPY"), "quote")
+        self.assertEqual(page_type("https://finance.yahoo.com/quote/SPY/holdings?p=SPY"), "holdings")
+        self.assertEqual(page_type("https://finance.yahoo.com/quote/GLE.PA/key-statistics?p=GLE.PA"),
+                         "key-statistics")
+
+    def test_fresh_pages_are_not_downloaded(self):
+        with ValidatingStubServer({"/quote/VUG/risk?p=VUG": b"risk"}) as server:
+            set_page_cache(PageCache(self.directory.name))
+            url = server.url + "/quote/VUG/risk?p=VUG"
+            self.assertEqual(fetch_page(url), b"risk")
+            self.assertEqual(fetch_page(url), b"risk")
+            self.assertEqual(len(server.requests), 1)
+
+    def test_stale_pages_are_revalidated(self):
+        with ValidatingStubServer({"/quote/VUG?p=VUG": b"quote"}) as server:
+            cache = PageCache(self.directory.name, ttls={"quote": 0})
+            set_page_cache(cache)
+            url = server.url + "/quote/VUG?p=VUG"
+            self.assertEqual(fetch_page(url), b"quote")
+            self.assertEqual(fetch_page(url), b"quote")
+            self.assertEqual(len(server.requests), 2)
+            self.assertEqual(server.requests[1][2]["If-None-Match"], '"v1"')
+            self.assertEqual(server.requests[1][2]["If-Modified-Since"], "Wed, 21 Oct 2026 07:28:00 GMT")
+
+    def test_lru_size_cap(self):
+        cache = PageCache(self.directory.name, max_bytes=25)
+        cache.store("https://finance.yahoo.com/quote/A?p=A", b"a" * 10)
+        time.sleep(0.01)
+        cache.store("https://finance.yahoo.com/quote/B?p=B", b"b" * 10)
+        time.sleep(0.01)
+        cache.lookup("https://finance.yahoo.com/quote/A?p=A")
+        time.sleep(0.01)
+        cache.store("https://finance.yahoo.com/quote/C?p=C", b"c" * 10)
+        self.assertIsNotNone(cache.lookup("https://finance.yahoo.com/quote/A?p=A"))
+        self.assertIsNone(cache.lookup("https://finance.yahoo.com/quote/B?p=B"))
+        self.assertEqual(cache.total_bytes, 20)
+        self.assertEqual(PageCache(self.directory.name).total_bytes, 20)
+        self.assertEqual(len([name for name in os.listdir(self.directory.name) if name.endswith(".tmp")]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Parse time and peak memory of every HTML parser backend over saved pages.
+    python -m lib_tests.parser_benchmark [pages_directory] [--repeat N]
+The pages directory defaults to lib_tests/fixtures, every *.html file in it is parsed.
+"""
+import argparse
+import glob
+import importlib.util
+import os
+import time
+import tracemalloc
+from yf_scraper_lib.yf_parsing import leaf_table_cells, make_soup, parser_backends
+
+fixtures = os.path.join(os.path.dirname(__file__), "fixtures")
+backend_requirements = {"html.parser": None, "lxml": "lxml"}
+
+
+def available_backends():
+    return [backend for backend in parser_backends
+            if backend_requirements[backend] is None or importlib.util.find_spec(backend_requirements[backend])]
+
+
+def benchmark_page(content, backend, repeat):
+    """
+    :return: (best parse time in seconds, peak traced memory in bytes, the leaf table cells of the page)
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        make_soup(content, backend)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    soup = make_soup(content, backend)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings), peak, leaf_table_cells(soup)
+
+
+def run(directory=fixtures, repeat=5):
+    """
+    :return: list of dicts (page, backend, parse_ms, peak_kib, same_cells), same_cells compares with html.parser
+    """
+    rows = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.html"))):
+        with open(path, "rb") as f:
+            content = f.read()
+        reference = None
+        for backend in available_backends():
+            seconds, peak, cells = benchmark_page(content, backend, repeat)
+            reference = cells if reference is None else reference
+            rows.append({"page": os.path.basename(path), "backend": backend, "parse_ms": seconds * 1000,
+                         "peak_kib": peak / 1024, "same_cells": cells == reference})
+    return rows
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("directory", nargs="?", default=fixtures)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+    print(f"{'page':<32}{'backend':<14}{'parse ms':>10}{'peak KiB':>12}  same cells")
+    for row in run(args.directory, args.repeat):
+        print(f"{row['page']:<32}{row['backend']:<14}{row['parse_ms']:>10.2f}{row['peak_kib']:>12.0f}  "
+              f"{row['same_cells']}")
+
+
+if __name__ == '__main__':
+    main()
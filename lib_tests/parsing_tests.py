@@ -0,0 +1,86 @@
+import os
+import unittest
+from bs4 import BeautifulSoup
+from lib_tests.stub_server import StubServer
+from yf_scraper_lib.yf_http_session import configure_session, settings
+from yf_scraper_lib.yf_etf_scraper import ETFData
+from yf_scraper_lib.yf_parsing import *
+from yf_scraper_lib.yf_page_state import extract_state, state_value
+
+fixtures = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class ParsingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+
+    def tearDown(self):
+        settings.update(self.settings)
+        configure_session()
+
+    def test_leaf_table_cells(self):
+        soup = BeautifulSoup("<table><tr><td><table><tr><td>a</td><td>b</td></tr></table></td></tr></table>"
+                             "<table><tr><td>c</td></tr></table>", "html.parser")
+        self.assertEqual(leaf_table_cells(soup), [["a", "b"], ["c"]])
+
+    def test_leaf_texts(self):
+        soup = BeautifulSoup('<span class="a"><span class="a">x</span></span><span class="a b">y</span>'
+                             '<span class="b">z</span><table><tr><td><table><tr><td>c</td></tr></table></td></tr>'
+                             '</table>', "html.parser")
+        texts = leaf_texts(soup, "span", ("a", "b"), tables=True)
+        self.assertEqual(texts, {"a": ["x", "y"], "b": ["y", "z"], "table": [["c"]]})
+        self.assertEqual(texts["table"], leaf_table_cells(soup))
+        # a cell holding a cell with a class is not a leaf either
+        soup = BeautifulSoup('<table><tr><td>A<span><td class="z">B</td></span></td></tr></table>', "html.parser")
+        self.assertEqual(leaf_texts(soup, "span", (), tables=True)["table"], leaf_table_cells(soup))
+        self.assertEqual(leaf_table_cells(soup), [["B"]])
+
+    def test_parser_backends_agree(self):
+        with open(os.path.join(fixtures, "etf_quote.html"), "rb") as f:
+            page = f.read()
+        reference = leaf_table_cells(make_soup(page, "html.parser"))
+        self.assertEqual(leaf_table_cells(make_soup(page, "lxml")), reference)
+        strained = make_soup(page, "html.parser", ETFData.parse_only)
+        self.assertEqual(leaf_table_cells(strained), reference)
+        self.assertEqual(len(strained.find_all("tr")), len(make_soup(page).find_all("tr")))
+        self.assertEqual(strained.find_all("h1"), [])
+        self.assertRaises(ValueError, make_soup, page, "html5")
+        self.assertRaises(ValueError, set_parser_backend, "html5")
+        self.assertRaises(ValueError, set_parser_backend, "selectolax")
+
+    def test_etf_to_dict(self):
+        with open(os.path.join(fixtures, "etf_quote.html"), "rb") as f:
+            page = f.read()
+        with StubServer({"/quote/SPMO?p=SPMO": page}) as server:
+            configure_session(base_url=server.url)
+            yf = ETFData("SPMO").load()
+            # the DOM path, the embedded JSON being read first otherwise
+            yf_lxml = ETFData("SPMO", parser="lxml")
+            yf_lxml.embedded_state = False
+            yf_lxml.load()
+        self.assertIsNone(yf_lxml.state)
+        self.assertEqual(yf.to_dict(), yf_lxml.to_dict())
+        self.assertEqual(yf.to_dict(), {"current_price": 1054.27, "last_52_week_range": "812.35 - 1060.02",
+                                        "day_range": "1049.80 - 1057.96", "net_assets": "3.47B", "nav": "1,053.92",
+                                        "inception_date": "2015-10-09", "expense_ratio": "0.13%"})
+
+    def test_extract_state(self):
+        page = (b'<script>root.App.main = {"context":{"dispatcher":{"stores":{"QuoteSummaryStore":'
+                b'{"summaryDetail":{"navPrice":{"raw":1053.92,"fmt":"1,053.92"},"totalAssets":{},"yield":null}}}}}};\n}(this));'
+                b'</script>')
+        state = extract_state(page)
+        self.assertEqual(state_value(state, "summaryDetail", "navPrice"), "1,053.92")
+        self.assertEqual(state_value(state, "summaryDetail", "navPrice", raw=True), 1053.92)
+        self.assertEqual(state_value(state, "summaryDetail", "totalAssets"), "N/A")
+        self.assertEqual(state_value(state, "summaryDetail", "yield"), "N/A")
+        # a key missing from the module falls back to the DOM like a missing module
+        self.assertIsNone(state_value(state, "summaryDetail", "dayLow"))
+        self.assertIsNone(state_value(state, "price", "regularMarketPrice"))
+        self.assertEqual(extract_state(page.decode()), state)
+        self.assertIsNone(extract_state(b"<html></html>"))
+        self.assertIsNone(extract_state(b'root.App.main = {"context":{"dispatcher":{"stores":"U2FsdGVk"}}};}(this));'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import time
+import unittest
+from lib_tests.stub_server import StubServer
+from yf_scraper_lib.yf_http_session import configure_session, settings
+from yf_scraper_lib.yf_replay import replay_session
+from yf_scraper_lib.yf_etf_scraper import ETFData, ETFHoldings, ETFHoldingsData
+from yf_scraper_lib.yf_stocks_scraper import FinancialStatementsProfileData, StockStatisticsData
+from yf_scraper_lib.yf_pipeline import *
+
+fixtures = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def failing_record(obj):
+    raise ValueError(obj.ticker)
+
+
+class PipelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+
+    def tearDown(self):
+        settings.update(self.settings)
+        configure_session()
+
+    def test_parse_many(self):
+        configure_session(session=replay_session(fixtures), throttle=False)
+        records = parse_many(ETFHoldingsData, ["PICK"], processes=2)
+        self.assertIsInstance(records["PICK"], ETFHoldings)
+        self.assertEqual(records["PICK"].to_records(), ETFHoldingsData("PICK").to_records())
+        records = parse_many(StockStatisticsData, ["GLE.PA", "UNKNOWN"], processes=2)
+        self.assertEqual(list(records), ["GLE.PA", "UNKNOWN"])
+        self.assertEqual(records["GLE.PA"], StockStatisticsData("GLE.PA").get_all_statistics())
+        self.assertEqual(records["UNKNOWN"], {})
+        items, periods, values = parse_many(FinancialStatementsProfileData, ["GLE.PA"], processes=1,
+                                            sheet="financials")["GLE.PA"]
+        self.assertEqual(values.shape, (len(items), len(periods)))
+
+    def test_errors(self):
+        configure_session(session=replay_session(fixtures), throttle=False)
+        errors = []
+        self.assertEqual(parse_many(ETFData, ["SPMO", "VUG"], failing_record, processes=1, errors=errors), {})
+        self.assertEqual(sorted((ticker, str(error)) for ticker, error in errors), [("SPMO", "SPMO"), ("VUG", "VUG")])
+        self.assertRaises(ValueError, parse_many, ETFData, ["SPMO"], failing_record, processes=1)
+        errors = []
+        self.assertEqual(parse_many(ETFData, ["SPMO"], processes=1, errors=errors, sheet="financials"), {})
+        self.assertIsInstance(errors[0][1], TypeError)
+
+    def test_backpressure(self):
+        with open(os.path.join(fixtures, "etf_quote.html"), "rb") as f:
+            page = f.read()
+        tickers = [f"T{index}" for index in range(40)]
+        with StubServer({f"/quote/{ticker}?p={ticker}": page for ticker in tickers}) as server:
+            configure_session(base_url=server.url, throttle=False)
+            records = iter_parsed(ETFData, tickers, concurrency=2, processes=1, max_pending=2)
+            ticker, record = next(records)
+            self.assertEqual(record["nav"], "1,053.92")
+            time.sleep(0.5)
+            # one page per download thread waiting to be queued, max_pending queued and max_pending parsed
+            self.assertLessEqual(len(server.requests), 2 + 2 + 2 + 1)
+            records.close()
+            self.assertEqual(len(dict(iter_parsed(ETFData, tickers, concurrency=4, processes=2))), 40)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import os
+import pickle
+import tempfile
+import unittest
+from lib_tests.stub_server import StubServer
+from yf_scraper_lib.yf_http_session import configure_session, settings
+from yf_scraper_lib.yf_replay import *
+from yf_scraper_lib.yf_etf_scraper import *
+from yf_scraper_lib.yf_stocks_scraper import *
+from yf_scraper_lib.yf_crosses_scraper import *
+
+fixtures = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class ReplayTest(unittest.TestCase):
+    """
+    Offline copy of the live tests, every getter is checked against the pages saved in lib_tests/fixtures.
+    """
+
+    periods = ["year_1", "year_2", "year_3", "year_4"]
+
+    def setUp(self):
+        self.settings = dict(settings)
+        configure_session(session=replay_session(fixtures))
+
+    def tearDown(self):
+        settings.update(self.settings)
+        configure_session()
+
+    def test_record_and_replay(self):
+        with tempfile.TemporaryDirectory() as directory, StubServer({"/quote/SPY?p=SPY": b"<html>SPY</html>"}) as server:
+            configure_session(session=recording_session(directory), base_url=server.url)
+            self.assertEqual(ETFData("SPY").fetch(), b"<html>SPY</html>")
+            ETFData("VUG").fetch()
+            configure_session(session=replay_session(directory), base_url="https://finance.yahoo.com")
+            self.assertEqual(ETFData("SPY").fetch(), b"<html>SPY</html>")
+            self.assertEqual(ETFData("VUG").fetch(), b"")
+            self.assertEqual(len(server.requests), 2)
+            self.assertEqual(PageStore(directory).index, {"/quote/SPY?p=SPY": "quote_SPY.html"})
+
+    def test_etf_summary_data(self):
+        yf = ETFData("SPMO")
+        self.assertEqual(yf.get_current_price(), 1054.27)
+        self.assertEqual(yf.get_last_52_week_range(), "812.35 - 1060.02")
+        self.assertEqual(yf.get_day_range(), "1049.80 - 1057.96")
+        self.assertEqual(yf.get_net_assets(), "3.47B")
+        self.assertEqual(yf.get_nav(), "1,053.92")
+        self.assertEqual(yf.get_inception_date(), "2015-10-09")
+        self.assertEqual(yf.get_expense_ratio(), "0.13%")
+
+    def test_embedded_state(self):
+        yf = ETFData("SPMO").load()
+        self.assertIsNotNone(yf.state)
+        yf.to_dict()
+        self.assertIsNone(yf._soup)
+        for scraper, getters in [(lambda: StocksProfileData("AAPL"), ["get_current_price", "get_stock_sector",
+                                                                       "get_stock_industry"]),
+                                 (lambda: ETFData("SPMO"), ["get_nav", "get_net_assets", "get_day_range"])]:
+            json_path, dom_path = scraper(), scraper()
+            dom_path.embedded_state = False
+            for getter in getters:
+                self.assertEqual(getattr(json_path, getter)(), getattr(dom_path, getter)())
+        yf = StockStatisticsData("GLE.PA")
+        self.assertEqual(yf.get_statistics("Valuation Measures", "Trailing P/E"), "8.72")
+        self.assertEqual(yf.get_statistics("Dividends & Splits", "Last Split Factor"), "2:1")
+        self.assertEqual(yf.get_statistics("Valuation Measures", "Enterprise Value"), "N/A")
+        self.assertIsNone(yf._soup)
+        self.assertIn("Dividends & Splits", yf.get_stats_types())
+
+    def test_etf_holdings(self):
+        yf = ETFHoldingsData("PICK")
+        self.assertEqual(len(yf.get_top_holdings()), 10)
+        self.assertEqual(yf.get_top_holdings()[0], ["BHP Group Ltd", "BHP.AX", "11.06%"])
+        self.assertEqual(yf.get_overall_portfolio_composition(), [("Cash", "0.37%"), ("Stocks", "99.63%")])
+        self.assertEqual(len(yf.get_sector_weightings()), 11)
+        self.assertEqual(yf.get_sector_weightings()[0], ["Basic Materials", "97.43%"])
+        self.assertEqual(yf.get_equity_holdings()[4], ("Median Market Cap", "20,089.3"))
+        self.assertEqual(yf.get_bond_ratings()[-1], ("Others", "0.00%"))
+
+    def test_etf_records(self):
+        holdings = ETFHoldingsData("PICK")
+        records = holdings.to_records()
+        self.assertEqual(records[0], {"ticker": "PICK", "section": "top_holdings", "name": "BHP Group Ltd",
+                                      "symbol": "BHP.AX", "value": "11.06%"})
+        self.assertEqual(len([record for record in records if record["section"] == "sector_weightings"]), 11)
+        self.assertIs(holdings.holdings, holdings.holdings)
+        performance = pickle.loads(pickle.dumps(ETFPerformanceData("VUG").performance))
+        self.assertEqual(performance.annual_returns[3], ("2020", "40.20%", "38.49%"))
+        self.assertEqual(len(performance.to_records()), 15)
+
+    def test_etf_performance(self):
+        yf = ETFPerformanceData("VUG")
+        self.assertEqual(yf.get_trailing_period_available()[:3], ["YTD", "1-Month", "3-Month"])
+        self.assertEqual(yf.get_fund_trailing_performance_vs_benchmark("1-Month"), ["1-Month", "-1.82%", "-1.79%"])
+        self.assertEqual(yf.get_years_available_for_total_return(), ["2023", "2022", "2021", "2020", "2019", "2018"])
+        self.assertEqual(yf.get_total_return_fund_vs_benchmark("2020"), ["2020", "40.20%", "38.49%"])
+
+    def test_etf_risk(self):
+        yf = ETFRiskData("VUG")
+        self.assertEqual(len(yf.get_fund_risk_data_types()), 7)
+        self.assertEqual(yf.get_fund_risk_data_by_type("Treynor Ratio"), ["Treynor Ratio", "6.93", "11.24", "12.57"])
+
+    def test_stock_profile(self):
+        yf = StocksProfileData("AAPL")
+        self.assertEqual(yf.get_current_price(), 189.7)
+        self.assertEqual(yf.get_stock_sector(), "Technology")
+        self.assertEqual(yf.get_stock_industry(), "Consumer Electronics")
+
+    def test_stock_statistics(self):
+        yf = StockStatisticsData("GLE.PA")
+        self.assertIn("Dividends & Splits", yf.get_stats_types())
+        self.assertEqual(yf.get_data_types_by_stats_type("Cash Flow Statement"),
+                         ["Operating Cash Flow (ttm)", "Levered Free Cash Flow (ttm)"])
+        self.assertEqual(yf.get_statistics("Share Statistics", "% Held by Insiders"), "8.38%")
+        self.assertEqual(yf.get_statistics("Profitability", "Profit Margin"), "19.89%")
+        self.assertEqual(yf.get_statistics("Dividends & Splits", "Payout Ratio"), "101.92%")
+
+    def test_statistics_index(self):
+        json_path, dom_path = StockStatisticsData("GLE.PA"), StockStatisticsData("GLE.PA")
+        dom_path.embedded_state = False
+        statistics = json_path.get_all_statistics()
+        self.assertEqual(statistics, dom_path.get_all_statistics())
+        self.assertIsNone(json_path._soup)
+        # the JSON formats these dates and this ratio unlike the page
+        self.assertEqual(json_path.get_statistics("Fiscal Year", "Fiscal Year Ends"), "Dec 30, 2022")
+        self.assertEqual(json_path.get_statistics("Dividends & Splits", "Last Split Date"), "Dec 01, 2004")
+        self.assertEqual(json_path.get_statistics("Balance Sheet", "Total Debt/Equity (mrq)"), "195.87%")
+        self.assertEqual(dom_path.get_statistics("Stock Price History", "52-Week Change"), "14.68%")
+        self.assertEqual(dom_path.get_statistics("Valuation Measures", "Trailing P/E"), "8.72")
+        self.assertEqual(dom_path.get_statistics("Valuation Measures", "Unknown"), "No data")
+        self.assertRaises(ValueError, dom_path.get_data_types_by_stats_type, "Unknown")
+        errors = []
+        frame = statistics_frame(["GLE.PA", "UNKNOWN"], fields=[("Valuation Measures", "Trailing P/E"),
+                                                                  ("Profitability", "Profit Margin")], errors=errors)
+        self.assertEqual(frame.loc["GLE.PA"].round(6).tolist(), [8.72, 0.1989])
+        self.assertEqual(list(frame.index), ["GLE.PA"])
+        self.assertEqual([(ticker, type(error)) for ticker, error in errors], [("UNKNOWN", ValueError)])
+        self.assertRaises(ValueError, statistics_frame, ["UNKNOWN"])
+        texts = statistics_frame(["GLE.PA"], typed=False)
+        self.assertEqual(texts.shape, (1, sum(len(values) for values in statistics.values())))
+        self.assertEqual(texts[("Valuation Measures", "Trailing P/E")].tolist(), ["8.72"])
+        frame = statistics_frame(["GLE.PA"])
+        self.assertEqual(frame.shape, texts.shape)
+        self.assertEqual(str(frame[("Dividends & Splits", "Ex-Dividend Date")].iloc[0].date()), "2023-05-29")
+        self.assertEqual(frame[("Dividends & Splits", "Last Split Factor")].tolist(), ["2:1"])
+
+    def test_financial_data(self):
+        yf = FinancialStatementsProfileData("GLE.PA", "income-statement")
+        self.assertIn("Tax Rate for Calcs", yf.get_data_types())
+        self.assertEqual(yf.get_accounting_data("Total Revenue", self.periods),
+                         [38649000.0, 36248000.0, 31823000.0, 34131000.0])
+        yf = FinancialStatementsProfileData("GLE.PA", "balance-sheet")
+        self.assertEqual(yf.get_accounting_data("Total Capitalization", self.periods),
+                         [219779000.0, 216220000.0, 214810000.0, 300052000.0])
+        self.assertEqual(yf.get_accounting_data("Total Assets", ["TTM"]), "No TTM info for the balance-sheet")
+        yf = FinancialStatementsProfileData("GLE.PA", "cash-flow")
+        self.assertEqual(yf.get_accounting_data("Investing Cash Flow", self.periods),
+                         [-9012000.0, -10118000.0, -6863000.0, -6976000.0])
+
+    def test_financial_matrix(self):
+        yf = FinancialStatementsProfileData("GLE.PA", "financials")
+        self.assertEqual(yf.get_periods(), ["TTM", "12/30/2022", "12/30/2021", "12/30/2020", "12/30/2019"])
+        self.assertEqual(yf.get_matrix().shape, (len(yf.get_data_types()), 5))
+        frame = yf.to_dataframe()
+        self.assertEqual(frame.loc["Total Revenue", "12/30/2022"], 38649000.0)
+        self.assertEqual(frame.loc["Basic EPS"].isna().tolist(), [True, False, False, False, False])
+        self.assertEqual(yf.get_accounting_data("Basic EPS", ["year_1"]), [frame.loc["Basic EPS", "12/30/2022"]])
+        yf = FinancialStatementsProfileData("GLE.PA", "balance-sheet")
+        self.assertEqual(list(yf.to_dataframe().columns), ["12/30/2022", "12/30/2021", "12/30/2020", "12/30/2019"])
+
+    def test_malformed_statement_header(self):
+        with open(os.path.join(fixtures, "financials.html"), "rb") as f:
+            page = f.read()
+        expected = FinancialStatementsProfileData("GLE.PA", "financials").load(page)
+        # a tooltip nested in a header cell is part of its label
+        yf = FinancialStatementsProfileData("GLE.PA", "financials").load(
+            page.replace(b"<span>TTM</span>", b"<span>TTM<span>i</span></span>"))
+        self.assertEqual(yf.get_data_types(), expected.get_data_types())
+        self.assertEqual(yf.get_periods(), ["TTMi", "12/30/2022", "12/30/2021", "12/30/2020", "12/30/2019"])
+        # a header with one cell too many is replaced by the positional names
+        yf = FinancialStatementsProfileData("GLE.PA", "financials").load(
+            page.replace(b"<span>12/30/2019</span></div>", b"<span>12/30/2019</span></div><div>12/30/2018</div>"))
+        self.assertEqual(yf.get_periods(), statement_periods)
+        self.assertEqual(yf.get_matrix().tobytes(), expected.get_matrix().tobytes())
+        # rows wider than statement_periods without a header
+        row = ('<div data-test="fin-row"><div title="Total Revenue"></div>' +
+               '<div data-test="fin-col">1</div>' * 6 + '</div>')
+        yf = FinancialStatementsProfileData("GLE.PA", "financials").load(row)
+        self.assertEqual(yf.get_periods(), ["TTM", "year_1", "year_2", "year_3", "year_4", "year_5"])
+        self.assertEqual(yf.get_matrix().shape, (1, 6))
+
+    def test_benchmark_and_cross_data(self):
+        self.assertEqual(BenchmarkData("GSPC").to_dict(), {"current_price": 4514.02, "previous_close": 4505.42,
+                                                           "last_52_week_range": "3491.58 - 4607.07",
+                                                           "day_range": "4500.39 - 4527.56"})
+        self.assertEqual(CrossCurrencyData("EURUSD=X").to_dict(), {"current_price": "1.0894", "previous_close": "1.0887",
+                                                                   "last_52_week_range": "1.0450 - 1.1275",
+                                                                   "day_range": "1.0873 - 1.0911"})
+
+    def test_benchmark_suite(self):
+        from lib_tests import benchmarks
+        results = benchmarks.run(repeat=1)
+        self.assertEqual(set(results), set(benchmarks.cases))
+        self.assertIn("get_nav", results["ETFData"])
+        reference = benchmarks.reference_time(repeat=1)
+        baselines = benchmarks.ratios(results, reference)
+        self.assertEqual(benchmarks.regressions(results, baselines, reference), [])
+        baselines["ETFHoldingsData"].update(parse=baselines["ETFHoldingsData"]["parse"] / 10, fetch=1e6)
+        self.assertEqual([stage for _, stage, _, _ in benchmarks.regressions(results, baselines, reference)],
+                         ["parse"])
+        # the ratios do not depend on the speed of the machine
+        slow = {name: {stage: seconds * 3 for stage, seconds in stages.items()} for name, stages in results.items()}
+        self.assertEqual([stage for _, stage, _, _ in benchmarks.regressions(slow, baselines, reference * 3)],
+                         ["parse"])
+
+
+if __name__ == '__main__':
+    unittest.main()
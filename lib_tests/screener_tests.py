@@ -0,0 +1,128 @@
+import unittest
+from urllib.parse import parse_qs, urlsplit
+from lib_tests.stub_server import StubServer
+from yf_scraper_lib.yf_driver_pool import DriverPool
+from yf_scraper_lib.yf_http_session import configure_session, settings
+from yf_scraper_lib.yf_screener_creator import ScreenerCreator
+
+rows = 230
+
+
+def result_page(offset, count):
+    cells = "".join(f'<tr><td aria-label="Symbol">S{i}</td><td aria-label="Name">Name {i}</td>'
+                    f'<td aria-label="Market Cap">{i}B</td><td aria-label="Volume">1</td></tr>'
+                    for i in range(offset, min(offset + count, rows)))
+    return f"<html><body><table><tbody>{cells}</tbody></table></body></html>".encode()
+
+
+class ScreenServer(StubServer):
+
+    def respond(self, path):
+        query = parse_qs(urlsplit(path).query)
+        return 200, result_page(int(query["offset"][0]), int(query["count"][0])), {"Content-Type": "text/html"}
+
+
+class FakeBrowser:
+
+    def __init__(self, opened):
+        opened.append(self)
+        self.urls = []
+        self.quitted = False
+
+    def get(self, url):
+        self.urls.append(url)
+
+    @property
+    def page_source(self):
+        query = parse_qs(urlsplit(self.urls[-1]).query)
+        return result_page(int(query["offset"][0]), int(query["count"][0]))
+
+    def get_cookies(self):
+        return [{"name": "A1", "value": "x"}]
+
+    def quit(self):
+        self.quitted = True
+
+
+class FakeScreener(ScreenerCreator):
+    """
+    The screen criteria are not filled, the browser only shows the result pages.
+    """
+
+    def set_filters(self, driver, countries, rem_usa, caps):
+        self.filters = countries, rem_usa, caps
+
+    @staticmethod
+    def results_url(driver):
+        return "https://finance.yahoo.com/screener/unsaved/0d1e?count=25&offset=25"
+
+
+class ScreenerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+
+    def tearDown(self):
+        settings.update(self.settings)
+        configure_session()
+
+    def test_page_url(self):
+        url = "https://finance.yahoo.com/screener/unsaved/0d1e?count=25&offset=25"
+        self.assertEqual(ScreenerCreator.page_url(url, 125),
+                         "https://finance.yahoo.com/screener/unsaved/0d1e?count=25&offset=125")
+        self.assertEqual(ScreenerCreator.page_url(url, 0, 100),
+                         "https://finance.yahoo.com/screener/unsaved/0d1e?count=100&offset=0")
+
+    def test_parse_results(self):
+        self.assertEqual(ScreenerCreator.parse_results(result_page(3, 2)),
+                         [("S3", "Name 3", "3B"), ("S4", "Name 4", "4B")])
+
+    def test_browser_pagination(self):
+        opened = []
+        with DriverPool(size=1, driver_factory=lambda: FakeBrowser(opened), handle_consent=None) as pool:
+            screener = FakeScreener("Stock")
+            results = list(screener.iter_results(driver=pool))
+            self.assertEqual(len(results), rows)
+            self.assertEqual(results[-1], ("S229", "Name 229", "229B"))
+            self.assertEqual(screener.offset, rows)
+            self.assertEqual(opened[0].urls[0], "https://finance.yahoo.com/screener/new")
+            # the new screen page, 10 result pages of up to 25 rows and the empty one ending the screen
+            self.assertEqual(len(opened[0].urls), 1 + 10 + 1)
+            results = screener.iter_results(driver=pool, start=50, countries=("Germany",))
+            self.assertEqual(next(results), ("S50", "Name 50", "50B"))
+            results.close()
+            self.assertEqual(screener.offset, 51)
+            self.assertEqual(screener.filters[0], ("Germany",))
+            self.assertEqual(screener.screener_builder(3, driver=pool)[-1], ("S2", "Name 2", "2B"))
+            self.assertEqual(screener.create_screen(driver=pool), FakeScreener.results_url(None))
+            self.assertEqual(screener.cookies, "A1=x")
+            # the browser went back to the pool after each screen
+            self.assertEqual(len(opened), 1)
+            self.assertFalse(opened[0].quitted)
+        self.assertTrue(opened[0].quitted)
+
+    def test_http_pagination(self):
+        with ScreenServer() as server:
+            screener = ScreenerCreator("Stock")
+            screener.screen_url = server.url + "/screener/unsaved/0d1e?count=25&offset=25"
+            results = list(screener.iter_results_http(concurrency=2))
+            self.assertEqual(len(results), rows)
+            self.assertEqual(results[-1], ("S229", "Name 229", "229B"))
+            self.assertEqual(screener.offset, rows)
+            self.assertEqual(len(server.requests), 4)
+            self.assertEqual(list(screener.iter_results_http(30, start=10, page_size=25))[-1], ("S39", "Name 39", "39B"))
+            self.assertEqual(screener.offset, 40)
+
+    def test_http_pagination_stops_early(self):
+        with ScreenServer() as server:
+            screener = ScreenerCreator("Stock")
+            screener.screen_url = server.url + "/screener/unsaved/0d1e?count=25&offset=25"
+            results = screener.iter_results_http(page_size=25, concurrency=1)
+            self.assertEqual(next(results), ("S0", "Name 0", "0B"))
+            results.close()
+            self.assertEqual(screener.offset, 1)
+            self.assertEqual(list(screener.iter_results_http(2, start=screener.offset))[0], ("S1", "Name 1", "1B"))
+
+
+if __name__ == '__main__':
+    unittest.main()
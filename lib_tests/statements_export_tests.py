@@ -0,0 +1,68 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pyarrow.dataset as ds
+from lib_tests.stub_server import StubServer
+from yf_scraper_lib.yf_http_session import configure_session, settings
+from yf_scraper_lib.yf_statements_export import *
+
+fixtures = os.path.join(os.path.dirname(__file__), "fixtures")
+tickers = ["GLE.PA", "BNP.PA", "ACA.PA"]
+# line items x periods of the fixture sheets, 16 of their cells are "-"
+rows = {"financials": 11 * 5, "balance-sheet": 9 * 4, "cash-flow": 8 * 5}
+
+
+def statement_pages():
+    pages = {}
+    for sheet, name in [("financials", "financials"), ("balance-sheet", "balance_sheet"), ("cash-flow", "cash_flow")]:
+        with open(os.path.join(fixtures, f"{name}.html"), "rb") as f:
+            page = f.read()
+        pages.update({f"/quote/{ticker}/{sheet}?p={ticker}": page for ticker in tickers})
+    return pages
+
+
+class StatementsExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+
+    def tearDown(self):
+        settings.update(self.settings)
+        configure_session()
+
+    def test_long_format_table(self):
+        with StubServer(statement_pages()) as server:
+            configure_session(base_url=server.url)
+            table = statements_table(tickers, batch_size=2, concurrency=4)
+        self.assertEqual(table.schema, statement_schema())
+        self.assertEqual(table.num_rows, len(tickers) * sum(rows.values()))
+        frame = table.to_pandas().set_index(["ticker", "sheet", "line_item", "period"])["value"]
+        self.assertEqual(frame["BNP.PA", "financials", "Total Revenue", "12/30/2022"], 38649000.0)
+        self.assertEqual(frame["ACA.PA", "balance-sheet", "Total Capitalization", "12/30/2019"], 300052000.0)
+        self.assertEqual(table.column("value").null_count, len(tickers) * 16)
+
+    def test_parquet_dataset(self):
+        with tempfile.TemporaryDirectory() as directory, StubServer(statement_pages()) as server:
+            configure_session(base_url=server.url)
+            errors = []
+            write_statements_parquet(tickers + ["NOPE"], directory, batch_size=2, errors=errors)
+            self.assertEqual(sorted(os.listdir(directory)), ["sheet=balance-sheet", "sheet=cash-flow",
+                                                             "sheet=financials"])
+            dataset = ds.dataset(directory, format="parquet", partitioning="hive")
+            for sheet, count in rows.items():
+                self.assertEqual(dataset.count_rows(filter=ds.field("sheet") == sheet), len(tickers) * count)
+            self.assertEqual([(ticker, sheet, type(error)) for ticker, sheet, error in errors],
+                             [("NOPE", sheet, ValueError) for sheet in sheets])
+            # a part file left by an earlier run is deleted by the next one
+            part = os.path.join(directory, "sheet=financials", "part-0.parquet")
+            shutil.copy(part, os.path.join(directory, "sheet=financials", "part-9.parquet"))
+            write_statements_parquet(tickers, directory, batch_size=2)
+            self.assertEqual(os.listdir(os.path.join(directory, "sheet=financials")), ["part-0.parquet"])
+            dataset = ds.dataset(directory, format="parquet", partitioning="hive")
+            self.assertEqual(dataset.count_rows(), len(tickers) * sum(rows.values()))
+            self.assertRaises(ValueError, statements_table, ["NOPE"])
+
+
+if __name__ == '__main__':
+    unittest.main()
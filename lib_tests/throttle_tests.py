@@ -0,0 +1,97 @@
+import threading
+import time
+import unittest
+import requests
+from lib_tests.stub_server import StubServer
+from yf_scraper_lib.yf_http_session import configure_session, fetch_page, settings
+from yf_scraper_lib.yf_batch_fetch import fetch_many_sync
+from yf_scraper_lib.yf_etf_scraper import ETFData
+from yf_scraper_lib.yf_throttle import *
+
+
+class ThrottlingServer(StubServer):
+    """
+    Answers 429 to the requests beyond capacity in flight at the same time, like Yahoo under a burst.
+    """
+
+    def __init__(self, pages, capacity):
+        super().__init__(pages)
+        self.capacity = capacity
+        self.busy = 0
+        self.refused = 0
+        self.lock = threading.Lock()
+
+    def respond(self, path):
+        with self.lock:
+            if self.busy >= self.capacity:
+                self.refused += 1
+                return 429, b"", {}
+            self.busy += 1
+        try:
+            time.sleep(0.01)
+            return super().respond(path)
+        finally:
+            with self.lock:
+                self.busy -= 1
+
+
+def response(status, content=b"", url="https://finance.yahoo.com/quote/SPY"):
+    result = requests.Response()
+    result.status_code, result._content, result.url = status, content, url
+    return result
+
+
+class ThrottleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.settings = dict(settings)
+        self.defaults = dict(defaults)
+
+    def tearDown(self):
+        settings.update(self.settings)
+        configure_session()
+        configure_throttle(**self.defaults)
+
+    def test_aimd(self):
+        throttle = HostThrottle(rate=100.0, burst=100, concurrency=4, max_concurrency=6)
+        for _ in range(4):
+            throttle.release(throttle.acquire(), False)
+        self.assertEqual(throttle.limit, 5)
+        tickets = [throttle.acquire() for _ in range(3)]
+        for ticket in tickets:
+            throttle.release(ticket, True)
+        # the responses already in flight when the first 429 came back only count once
+        self.assertEqual(throttle.stats(), {"rate": 52.0, "limit": 2, "in_flight": 0, "throttled": 3})
+        for _ in range(20):
+            throttle.release(throttle.acquire(), False)
+        self.assertEqual(throttle.limit, 6)
+
+    def test_throttled_responses(self):
+        self.assertTrue(is_throttled(response(429)))
+        self.assertTrue(is_throttled(response(503)))
+        self.assertTrue(is_throttled(response(200, b"")))
+        self.assertTrue(is_throttled(response(200, b"ok", "https://consent.yahoo.com/v2/collectConsent")))
+        self.assertFalse(is_throttled(response(404, b"")))
+        self.assertFalse(is_throttled(response(200, b"ok")))
+
+    def test_retry_after_throttling(self):
+        pages = {f"/quote/T{i}?p=T{i}": f"<table><tr><td>T{i}</td></tr></table>".encode() for i in range(60)}
+        configure_throttle(rate=1000.0, burst=100, concurrency=32)
+        with ThrottlingServer(pages, capacity=4) as server:
+            configure_session(base_url=server.url, backoff=0.01, retries=10)
+            res = fetch_many_sync(ETFData, [f"T{i}" for i in range(60)], concurrency=32)
+            self.assertEqual([yf.soup.text for yf in res], [f"T{i}" for i in range(60)])
+            stats = throttle_for(server.url).stats()
+        self.assertGreater(server.refused, 0)
+        self.assertGreater(stats["throttled"], 0)
+        self.assertLess(stats["limit"], 32)
+
+    def test_throttle_off(self):
+        configure_session(throttle=False)
+        with StubServer({"/": b"ok"}) as server:
+            self.assertEqual(fetch_page(server.url + "/"), b"ok")
+            self.assertEqual(throttle_for(server.url).stats()["in_flight"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
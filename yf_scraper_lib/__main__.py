@@ -0,0 +1,4 @@
+import sys
+from yf_scraper_lib.yf_cli import main
+
+sys.exit(main())
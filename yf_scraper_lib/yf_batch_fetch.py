@@ -0,0 +1,85 @@
+# Support
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _run(coroutine):
+    """
+    asyncio.run, also from code already running an event loop (Jupyter, async callers) where the coroutine is run
+    to completion by a loop of its own in a worker thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+async def load_many(objs, concurrency=64, return_exceptions=False):
+    """
+    Download and parse many scraper objects concurrently, the ones already loaded are left as they are.
+    Downloads go through the shared pooled session, so keep its pool_maxsize >= concurrency
+    (see yf_http_session.configure_session) or the extra connections are not kept alive.
+    :param objs: iterable of scraper objects (ETFData("SPY"), StockStatisticsData("AAPL"), ...)
+    :param concurrency: maximum number of pages downloaded and parsed at the same time
+    :param return_exceptions: put the exception in place of the object for a failing page instead of raising
+    :return: the objects in the given order
+    """
+    objs = list(objs)
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        async def load(obj):
+            if obj.loaded:
+                return obj
+            async with semaphore:
+                return await loop.run_in_executor(executor, obj.load)
+
+        return await asyncio.gather(*(load(obj) for obj in objs), return_exceptions=return_exceptions)
+
+
+async def fetch_many(scraper_class, tickers, concurrency=64, return_exceptions=False, **kwargs):
+    """
+    Build and load many scraper objects concurrently, ex: await fetch_many(ETFData, ["SPY", "VUG"], concurrency=64)
+    :param scraper_class: any scraper class taking the ticker as first argument (ETFData, StockStatisticsData, ...)
+    :param tickers: iterable of stock symbols
+    :param concurrency: maximum number of pages downloaded and parsed at the same time
+    :param return_exceptions: put the exception in place of the object for a failing ticker instead of raising
+    :param kwargs: extra arguments given to every constructor (ex: sheet="balance-sheet", session=...)
+    :return: the objects in the tickers order, ready to query with the usual getters
+    """
+    objs = []
+    for ticker in tickers:
+        try:
+            objs.append(scraper_class(ticker, **kwargs))
+        except Exception as error:
+            if not return_exceptions:
+                raise
+            objs.append(error)
+    loaded = await load_many([obj for obj in objs if not isinstance(obj, Exception)], concurrency=concurrency,
+                             return_exceptions=return_exceptions)
+    loaded = iter(loaded)
+    return [obj if isinstance(obj, Exception) else next(loaded) for obj in objs]
+
+
+def fetch_many_sync(scraper_class, tickers, concurrency=64, return_exceptions=False, **kwargs):
+    """
+    Blocking wrapper around fetch_many, it also works from inside a running event loop.
+    :return: the objects in the tickers order
+    """
+    return _run(fetch_many(scraper_class, tickers, concurrency=concurrency, return_exceptions=return_exceptions,
+                           **kwargs))
+
+
+def prefetch(objs, concurrency=32, return_exceptions=False):
+    """
+    Blocking batch load of lazy scraper objects, ex: prefetch([ETFData(t) for t in tickers]).
+    Objects are otherwise downloaded one by one on their first getter call.
+    :param objs: iterable of scraper objects
+    :param concurrency: maximum number of pages downloaded and parsed at the same time
+    :param return_exceptions: put the exception in place of the object for a failing page instead of raising
+    :return: the objects in the given order
+    """
+    return _run(load_many(objs, concurrency=concurrency, return_exceptions=return_exceptions))
@@ -0,0 +1,203 @@
+# Support
+import argparse
+import csv
+import json
+import os
+import sys
+from yf_scraper_lib.yf_crosses_scraper import CrossCurrencyData
+from yf_scraper_lib.yf_etf_scraper import ETFData
+from yf_scraper_lib.yf_http_session import configure_session, set_page_archive
+from yf_scraper_lib.yf_pipeline import iter_parsed
+from yf_scraper_lib.yf_stocks_scraper import BenchmarkData, StockStatisticsData, StocksProfileData, \
+    statistics_fields
+
+
+def _summary_record(obj):
+    return obj.to_dict()
+
+
+def _statistics_record(obj):
+    # the labels are unique over the sections of the page
+    return {label: value for values in obj.statistics.values() for label, value in values.items()}
+
+
+# global variable
+# --kind -> (scraper class, picklable record function, the fields of the record)
+kinds = {
+    "etf": (ETFData, _summary_record, ("current_price", "last_52_week_range", "day_range", "net_assets", "nav",
+                                       "inception_date", "expense_ratio")),
+    "stock": (StocksProfileData, _summary_record, ("current_price", "sector", "industry")),
+    "statistics": (StockStatisticsData, _statistics_record,
+                   tuple(label for values in statistics_fields.values() for label in values)),
+    "benchmark": (BenchmarkData, _summary_record, ("current_price", "last_52_week_range", "day_range",
+                                                   "previous_close")),
+    "cross": (CrossCurrencyData, _summary_record, ("current_price", "last_52_week_range", "day_range",
+                                                   "previous_close")),
+}
+
+
+def read_tickers(file, skip=()):
+    """
+    :param file: open text file with one ticker per line, blank lines and "#" comments are ignored
+    :param skip: tickers left out (the ones already done)
+    :return: generator of tickers, the file is read as they are consumed
+    """
+    for line in file:
+        ticker = line.split("#", 1)[0].strip()
+        if ticker and ticker not in skip:
+            yield ticker
+
+
+def read_checkpoint(path):
+    """
+    :return: the set of tickers recorded in the checkpoint file, empty if it does not exist
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        # a last line without its newline was cut by a crash, its record is written again
+        return {line[:-1] for line in f if line.endswith("\n")}
+
+
+def _complete_lines(path):
+    # drop a last record half written by a crash so that the appended records start on a new line
+    with open(path, "rb+") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        position = size
+        while position > 0:
+            f.seek(max(position - 4096, 0))
+            chunk = f.read(position - max(position - 4096, 0))
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                f.truncate(max(position - 4096, 0) + newline + 1)
+                return
+            position = max(position - 4096, 0)
+        f.truncate(0)
+
+
+class RecordWriter:
+
+    def __init__(self, file, fields, output_format="ndjson", header=True):
+        """
+        Write one line per ticker and flush it, the records reach the disk as they complete.
+        :param file: open text file
+        :param fields: the columns, None to write every field of the records (ndjson only)
+        :param output_format: "ndjson" or "csv"
+        :param header: write the csv header line
+        """
+        self.file = file
+        self.fields = fields
+        self.output_format = output_format
+        if output_format == "csv":
+            self.writer = csv.writer(file, lineterminator="\n")
+            if header:
+                self.writer.writerow(["ticker"] + list(fields))
+                file.flush()
+
+    def write(self, ticker, record):
+        if self.output_format == "csv":
+            self.writer.writerow([ticker] + [record.get(field) for field in self.fields])
+        else:
+            if self.fields is not None:
+                record = {field: record.get(field) for field in self.fields}
+            self.file.write(json.dumps(dict(ticker=ticker, **record)) + "\n")
+        self.file.flush()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m yf_scraper_lib",
+                                     description="Batch scraper of Yahoo Finance pages")
+    commands = parser.add_subparsers(dest="command", required=True)
+    fetch = commands.add_parser("fetch", help="scrape a list of tickers, one record per ticker as it completes")
+    fetch.add_argument("--kind", choices=sorted(kinds), required=True, help="the page scraped for each ticker")
+    fetch.add_argument("--tickers", required=True, help="file with one ticker per line, - for stdin")
+    fetch.add_argument("--fields", help="comma separated fields to keep, ex: nav,expense_ratio (every field by "
+                                        "default)")
+    fetch.add_argument("--format", dest="output_format", choices=("ndjson", "csv"),
+                       help="ndjson by default, csv when the output ends with .csv")
+    fetch.add_argument("--output", help="file the records are written to, stdout by default")
+    fetch.add_argument("--checkpoint", help="file listing the tickers already written, output.checkpoint by "
+                                            "default")
+    fetch.add_argument("--resume", action="store_true",
+                       help="skip the tickers of the checkpoint and append to the output instead of replacing it")
+    fetch.add_argument("--concurrency", type=int, default=32, help="pages downloaded at the same time")
+    fetch.add_argument("--processes", type=int, help="parse processes, one per core by default")
+    fetch.add_argument("--replay", help="directory of recorded pages to read instead of the network")
+    fetch.add_argument("--archive", help="directory of the PageArchive every downloaded page is added to")
+    return parser
+
+
+def fetch_command(args, parser):
+    scraper_class, extract_record, known_fields = kinds[args.kind]
+    fields = [field.strip() for field in args.fields.split(",") if field.strip()] if args.fields else None
+    if fields is not None and args.kind != "statistics":
+        unknown = [field for field in fields if field not in known_fields]
+        if unknown:
+            parser.error(f"unknown {args.kind} fields: {', '.join(unknown)} (expected {', '.join(known_fields)})")
+    output_format = args.output_format or ("csv" if (args.output or "").endswith(".csv") else "ndjson")
+    if output_format == "csv" and fields is None:
+        fields = list(known_fields)
+    checkpoint = args.checkpoint or (args.output + ".checkpoint" if args.output else None)
+    if args.resume and (args.output is None or checkpoint is None):
+        parser.error("--resume needs --output")
+    if args.replay:
+        from yf_scraper_lib.yf_replay import replay_session
+        configure_session(session=replay_session(args.replay), throttle=False)
+    if args.archive:
+        from yf_scraper_lib.yf_page_archive import PageArchive
+        set_page_archive(PageArchive(args.archive))
+
+    done = read_checkpoint(checkpoint) if args.resume else set()
+    if args.resume and os.path.exists(checkpoint):
+        _complete_lines(checkpoint)
+    if args.output is None:
+        output = sys.stdout
+        header = True
+    else:
+        if args.resume and os.path.exists(args.output):
+            _complete_lines(args.output)
+        header = not (args.resume and os.path.exists(args.output) and os.path.getsize(args.output))
+        output = open(args.output, "a" if args.resume else "w", newline="")
+    checkpoint_file = open(checkpoint, "a" if args.resume else "w") if checkpoint else None
+    tickers_file = sys.stdin if args.tickers == "-" else open(args.tickers)
+    failures, errors = 0, []
+
+    def report_errors():
+        nonlocal failures
+        while errors:
+            ticker, error = errors.pop()
+            failures += 1
+            # not checkpointed, a resumed run tries them again
+            sys.stderr.write(json.dumps({"ticker": ticker, "error": f"{type(error).__name__}: {error}"}) + "\n")
+
+    try:
+        writer = RecordWriter(output, fields, output_format, header)
+        for ticker, record in iter_parsed(scraper_class, read_tickers(tickers_file, done), extract_record,
+                                          concurrency=args.concurrency, processes=args.processes, errors=errors):
+            # the record is on disk before its ticker is checkpointed: a crash in between writes it twice at most
+            writer.write(ticker, record)
+            if checkpoint_file is not None:
+                checkpoint_file.write(ticker + "\n")
+                checkpoint_file.flush()
+            report_errors()
+        report_errors()
+    finally:
+        for f in (tickers_file, output, checkpoint_file):
+            if f is not None and f not in (sys.stdin, sys.stdout):
+                f.close()
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    """
+    Command line entry point, ex:
+        python -m yf_scraper_lib fetch --kind etf --fields nav,expense_ratio --tickers tickers.txt --output etf.csv
+    A run stopped partway is continued with the same command and --resume.
+    :param argv: the arguments, sys.argv[1:] by default
+    :return: the exit status, 1 when some tickers failed (they are reported on stderr)
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    return fetch_command(args, parser)
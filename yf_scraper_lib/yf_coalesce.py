@@ -0,0 +1,135 @@
+# Support
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from yf_scraper_lib import yf_metrics
+
+
+class SingleFlight:
+
+    def __init__(self, layer="fetch"):
+        """
+        Run a function once per key among the callers asking for it at the same time: the first caller runs it,
+        the others wait for its result (or its exception) instead of running it again.
+        :param layer: label of the yf_coalesced_total metric
+        """
+        self.layer = layer
+        self.lock = threading.Lock()
+        # key -> Future of the call in flight
+        self.calls = {}
+
+    def do(self, key, function):
+        """
+        :param key: hashable, ex: the page url
+        :param function: called without argument by the first caller only
+        :return: what function returned, shared by every caller of the flight
+        """
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+        if not leader:
+            if yf_metrics.enabled:
+                yf_metrics.inc("yf_coalesced_total", {"layer": self.layer})
+            return future.result()
+        try:
+            result = function()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+    def __len__(self):
+        return len(self.calls)
+
+
+class DocumentCache:
+
+    def __init__(self, max_entries=64, ttl=5.0, max_bytes=64 * 1024 * 1024, parse_factor=10):
+        """
+        Short-lived LRU of parsed pages (soup, embedded state) shared by the scraper objects of the same url, ex:
+        two StocksProfileData("AAPL") loaded within ttl seconds download and parse the profile page once. The
+        soups are shared, the getters only read them.
+        :param max_entries: documents kept, the least recently used ones are dropped beyond
+        :param ttl: seconds a document is served after its download
+        :param max_bytes: estimated memory of the documents kept, the least recently used ones are dropped beyond
+        :param parse_factor: estimated memory of a document per byte of its raw page
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.parse_factor = parse_factor
+        self.lock = threading.Lock()
+        # key -> (monotonic time of the parse, estimated bytes, document), least recently used first
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.flights = SingleFlight("document")
+
+    def get(self, key):
+        """
+        :return: the document of key, None if it is missing or older than ttl
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > self.ttl:
+                self._remove(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry[2]
+
+    def _remove(self, key):
+        self.total_bytes -= self.entries.pop(key)[1]
+
+    def put(self, key, document, page_bytes=0):
+        """
+        :param key: see get_or_load
+        :param document: the parsed page
+        :param page_bytes: size of the raw page the document was parsed from
+        """
+        size = page_bytes * self.parse_factor
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            # a document above the whole budget is not kept
+            if size > self.max_bytes:
+                return
+            self.entries[key] = (time.monotonic(), size, document)
+            self.total_bytes += size
+            while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self.entries)))
+
+    def get_or_load(self, key, load):
+        """
+        :param key: hashable identifying the document, see YahooPage.document_key
+        :param load: called without argument to download and parse the document when it is not cached, once for
+                     the callers asking for key at the same time, returns (document, size of the raw page)
+        :return: the document
+        """
+        document = self.get(key)
+        if yf_metrics.enabled:
+            yf_metrics.inc("yf_document_cache_total", {"result": "miss" if document is None else "hit"})
+        if document is not None:
+            return document
+
+        def loaded():
+            document, page_bytes = load()
+            self.put(key, document, page_bytes)
+            return document
+        return self.flights.do(key, loaded)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self.entries)
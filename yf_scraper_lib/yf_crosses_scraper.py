@@ -1,43 +1,47 @@
 # Beautiful Soup 4
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 
 # Support
-from fake_useragent import UserAgent
-import requests
+from yf_scraper_lib.yf_http_session import base_url
+from yf_scraper_lib.yf_page import YahooPage
 
 # global variable
-user_agent = {"User-Agent": UserAgent().chrome}
 delay = 120
 
 
-class CrossCurrencyData:
+class CrossCurrencyData(YahooPage):
 
-    def __init__(self, ticker):
+    parse_only = SoupStrainer(["fin-streamer", "table"])
+
+    def __init__(self, ticker, session=None, parser=None):
         """
         :param ticker: the stock symbol as a string value
+        :param session: optional requests.Session, the shared pooled session is used by default
+        :param parser: HTML parser backend (see yf_parsing.parser_backends), the global one by default
         """
+        super().__init__(session, parser)
         self.ticker = ticker.split("=")[0]
-        self.url = f"https://finance.yahoo.com/quote/{self.ticker}%3DX?p={self.ticker}%3DX"
-        self.soup = BeautifulSoup(requests.get(self.url, headers=user_agent).content, 'html.parser')
+        self.url = f"{base_url()}/quote/{self.ticker}%3DX?p={self.ticker}%3DX"
 
     def get_current_price(self):
         return [price.text for price in self.soup.find_all("fin-streamer", attrs={"data-pricehint": "4"})
                 if not price.find_all("fin-streamer", attrs={"data-pricehint": "4"})][0]
 
     def get_last_52_week_range(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[1].find_all('td') if not t.find_all('td')]
-        return [elem.text for elem in tds][3]
+        return self.tables[1][3]
 
     def get_day_range(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[1].find_all('td') if not t.find_all('td')]
-        return [elem.text for elem in tds][1]
+        return self.tables[1][1]
 
     def get_previous_close(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[0].find_all('td') if not t.find_all('td')]
-        return [elem.text for elem in tds][1]
+        return self.tables[0][1]
+
+    def to_dict(self):
+        """
+        :return: every summary field in one call, the tables being walked only once
+        """
+        return {"current_price": self.get_current_price(), "last_52_week_range": self.get_last_52_week_range(),
+                "day_range": self.get_day_range(), "previous_close": self.get_previous_close()}
 
 
 # meta = CrossCurrencyData("EURUSD=X")
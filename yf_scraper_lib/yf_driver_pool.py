@@ -0,0 +1,192 @@
+# Support
+# Selenium and webdriver_manager are imported by the functions opening a browser, not on module import
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
+from yf_scraper_lib.yf_page import user_agent_header
+
+# global variable
+delay = 120
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def chrome_driver(headless=True):
+    """
+    :return: a new Chrome webdriver with the library User-Agent
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from webdriver_manager.chrome import ChromeDriverManager
+    options = Options()
+    if headless:
+        options.add_argument('--headless')
+    options.add_argument(f"--user-agent={user_agent_header()['User-Agent']}")
+    return webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+
+
+def reject_consent(driver):
+    """
+    Click "Reject all" on the Yahoo consent dialog of the page currently opened by the driver.
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.action_chains import ActionChains
+    from selenium.webdriver.support import expected_conditions
+    from selenium.webdriver.support.ui import WebDriverWait
+    reject_all = WebDriverWait(driver, delay).until(expected_conditions.presence_of_element_located(
+        (By.XPATH, '//button[@class="btn secondary reject-all"]')))
+    action = ActionChains(driver)
+    action.click(on_element=reject_all)
+    action.perform()
+
+
+def ignored_exceptions():
+    """
+    :return: the Selenium exceptions a WebDriverWait retries on while the page is still changing
+    """
+    from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+    return NoSuchElementException, StaleElementReferenceException
+
+
+class _PooledDriver:
+
+    __slots__ = ("driver", "pages", "consent_done")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.consent_done = False
+
+
+class DriverPool:
+
+    def __init__(self, size=2, max_pages=50, headless=True, driver_factory=None, handle_consent=reject_consent):
+        """
+        Long-lived browser sessions shared by the driver code paths, ex:
+            with DriverPool(size=4) as pool:
+                with pool.page(url) as driver:
+                    source = driver.page_source
+        :param size: maximum number of browsers open at the same time, page() waits when they are all busy
+        :param max_pages: a browser is quit and replaced after that many pages, to bound its memory growth
+        :param headless: run Chrome without a window
+        :param driver_factory: callable returning a new webdriver, chrome_driver(headless) by default
+        :param handle_consent: callable(driver) run once per browser on its first page, None to skip
+        """
+        self.size = size
+        self.max_pages = max_pages
+        self.driver_factory = driver_factory or (lambda: chrome_driver(headless))
+        self.handle_consent = handle_consent
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(size)
+        self.lock = threading.Lock()
+        self.opened = []
+        self.closed = False
+
+    def _acquire(self):
+        self.slots.acquire()
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            pooled = _PooledDriver(self.driver_factory())
+        except BaseException:
+            self.slots.release()
+            raise
+        with self.lock:
+            self.opened.append(pooled)
+        return pooled
+
+    def _discard(self, pooled):
+        with self.lock:
+            if pooled in self.opened:
+                self.opened.remove(pooled)
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def _release(self, pooled, broken):
+        if broken or self.closed or pooled.pages >= self.max_pages:
+            self._discard(pooled)
+        else:
+            self.idle.put(pooled)
+        self.slots.release()
+
+    @contextmanager
+    def driver(self):
+        """
+        Borrow a browser for the duration of the with block. It is quit instead of being returned to the pool
+        when the block raises.
+        """
+        if self.closed:
+            raise RuntimeError("The driver pool is closed")
+        pooled = self._acquire()
+        broken = True
+        try:
+            yield pooled
+            broken = False
+        finally:
+            self._release(pooled, broken)
+
+    @contextmanager
+    def page(self, url):
+        """
+        Borrow a browser, open url in it and handle the consent dialog if it is this browser's first page.
+        :param url: the page url
+        :return: the webdriver showing the page
+        """
+        with self.driver() as pooled:
+            pooled.driver.get(url)
+            pooled.pages += 1
+            if not pooled.consent_done and self.handle_consent is not None:
+                self.handle_consent(pooled.driver)
+                pooled.consent_done = True
+            yield pooled.driver
+
+    def close(self):
+        """
+        Quit every idle browser, the busy ones are quit when they are given back.
+        """
+        self.closed = True
+        while True:
+            try:
+                self._discard(self.idle.get_nowait())
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def get_driver_pool():
+    """
+    :return: the pool shared by every instance using a driver, built with the defaults on first use
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None or _shared_pool.closed:
+            _shared_pool = DriverPool()
+        return _shared_pool
+
+
+def set_driver_pool(pool):
+    """
+    Replace the shared pool (ex: set_driver_pool(DriverPool(size=8, max_pages=100))), the previous one is closed.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        previous, _shared_pool = _shared_pool, pool
+    if previous is not None and previous is not pool:
+        previous.close()
+
+
+@atexit.register
+def _close_shared_pool():
+    if _shared_pool is not None:
+        _shared_pool.close()
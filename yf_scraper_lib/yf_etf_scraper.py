@@ -1,200 +1,255 @@
 # Beautiful Soup 4
-from bs4 import BeautifulSoup
+from bs4 import SoupStrainer
 
 # Support
-from fake_useragent import UserAgent
-import requests
+from functools import cached_property
+from yf_scraper_lib.yf_http_session import base_url
+from yf_scraper_lib.yf_page import YahooPage
+from yf_scraper_lib.yf_page_state import state_value
+from yf_scraper_lib.yf_parsing import has_class, leaf_texts
 
-# global variable
-user_agent = {"User-Agent": UserAgent().chrome}
 
+class ETFData(YahooPage):
 
-class ETFData:
+    parse_only = SoupStrainer(["fin-streamer", "table"])
+    embedded_state = True
 
-    def __init__(self, ticker):
+    def __init__(self, ticker, session=None, parser=None):
         """
         :param ticker: the stock symbol as a string value
+        :param session: optional requests.Session, the shared pooled session is used by default
+        :param parser: HTML parser backend (see yf_parsing.parser_backends), the global one by default
         """
+        super().__init__(session, parser)
         self.ticker = ticker
-        self.url = f"https://finance.yahoo.com/quote/{ticker}?p={ticker}"
-        self.soup = BeautifulSoup(requests.get(self.url, headers=user_agent).content, 'html.parser')
+        self.url = f"{base_url()}/quote/{ticker}?p={ticker}"
 
     def get_current_price(self):
+        price = state_value(self.state, "price", "regularMarketPrice", raw=True)
+        if price is not None:
+            return float(price)
         return float([price.text for price in self.soup.find_all("fin-streamer", attrs={"data-test": "qsp-price"})
                 if not price.find_all("fin-streamer", attrs={"data-test": "qsp-price"})][0].replace(",", ""))
 
+    def state_range(self, low, high):
+        """
+        :return: "low - high" from the summaryDetail of the embedded JSON, None to fall back to the DOM
+        """
+        low, high = state_value(self.state, "summaryDetail", low), state_value(self.state, "summaryDetail", high)
+        if low is None or high is None:
+            return None
+        return f"{low} - {high}".replace(",", "")
+
     def get_last_52_week_range(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[0].find_all('td') if not t.find_all('td')]
-        return [elem.text.replace(",", "") for elem in tds][11]
+        return self.state_range("fiftyTwoWeekLow", "fiftyTwoWeekHigh") or self.tables[0][11].replace(",", "")
 
     def get_day_range(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[0].find_all('td') if not t.find_all('td')]
-        return [elem.text.replace(",", "") for elem in tds][9]
+        return self.state_range("dayLow", "dayHigh") or self.tables[0][9].replace(",", "")
 
     def get_net_assets(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[1].find_all('td') if not t.find_all('td')]
-        return [elem.text for elem in tds][1]
+        return state_value(self.state, "summaryDetail", "totalAssets") or self.tables[1][1]
 
     def get_nav(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[1].find_all('td') if not t.find_all('td')]
-        return [elem.text for elem in tds][3]
+        return state_value(self.state, "summaryDetail", "navPrice") or self.tables[1][3]
 
     def get_inception_date(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[1].find_all('td') if not t.find_all('td')]
-        return [elem.text for elem in tds][15]
+        return state_value(self.state, "defaultKeyStatistics", "fundInceptionDate") or self.tables[1][15]
 
     def get_expense_ratio(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[1].find_all('td') if not t.find_all('td')]
-        return [elem.text for elem in tds][13]
+        return state_value(self.state, "defaultKeyStatistics", "annualReportExpenseRatio") or self.tables[1][13]
+
+    def to_dict(self):
+        """
+        :return: every summary field in one call, the tables being walked only once
+        """
+        return {"current_price": self.get_current_price(), "last_52_week_range": self.get_last_52_week_range(),
+                "day_range": self.get_day_range(), "net_assets": self.get_net_assets(), "nav": self.get_nav(),
+                "inception_date": self.get_inception_date(), "expense_ratio": self.get_expense_ratio()}
+
+
+class ETFHoldings:
+
+    __slots__ = ("ticker", "top_holdings", "composition", "sector_weightings", "equity_holdings", "bond_ratings")
 
+    def __init__(self, ticker, top_holdings, composition, sector_weightings, equity_holdings, bond_ratings):
+        """
+        Every section of a holdings page, read once. The sections are tuples of rows, rows are tuples of texts.
+        :param top_holdings: (name, symbol, % assets)
+        :param composition: (asset class, %)
+        :param sector_weightings: (sector, %)
+        :param equity_holdings: (measure, value)
+        :param bond_ratings: (rating, %)
+        """
+        self.ticker = ticker
+        self.top_holdings = top_holdings
+        self.composition = composition
+        self.sector_weightings = sector_weightings
+        self.equity_holdings = equity_holdings
+        self.bond_ratings = bond_ratings
 
-class ETFHoldingsData:
+    def to_records(self):
+        """
+        :return: one dict per row of every section with the keys ticker, section, name, symbol and value,
+                 symbol is None outside of the top holdings
+        """
+        records = [{"ticker": self.ticker, "section": "top_holdings", "name": name, "symbol": symbol,
+                    "value": value} for name, symbol, value in self.top_holdings]
+        for section in ("composition", "sector_weightings", "equity_holdings", "bond_ratings"):
+            records.extend({"ticker": self.ticker, "section": section, "name": name, "symbol": None, "value": value}
+                           for name, value in getattr(self, section))
+        return records
 
-    def __init__(self, ticker):
+
+class ETFHoldingsData(YahooPage):
+
+    parse_only = SoupStrainer(["table", "span"])
+
+    def __init__(self, ticker, session=None, parser=None):
         """
         :param ticker: the stock symbol as a string value
+        :param session: optional requests.Session, the shared pooled session is used by default
+        :param parser: HTML parser backend (see yf_parsing.parser_backends), the global one by default
         """
+        super().__init__(session, parser)
         self.ticker = ticker
-        self.url = f"https://finance.yahoo.com/quote/{ticker}/holdings?p={ticker}"
-        self.soup = BeautifulSoup(requests.get(self.url, headers=user_agent).content, 'html.parser')
+        self.url = f"{base_url()}/quote/{ticker}/holdings?p={ticker}"
+
+    @cached_property
+    def holdings(self):
+        """
+        :return: an ETFHoldings built from one walk of the page on first use
+        """
+        texts = leaf_texts(self.soup, "span", ("Fl(start)", "Fl(end)"), tables=True)
+        starts, ends, tables = texts["Fl(start)"], texts["Fl(end)"], texts["table"]
+        cells = tables[0] if tables else []
+        top_holdings = tuple(tuple(cells[index:index + 3]) for index in range(0, len(cells) - 2, 3))
+        # the sector rows are (sector, empty bar span, %)
+        sectors = [elem for elem in starts[5:38] if elem != ""]
+        sector_weightings = tuple(tuple(sectors[index:index + 2]) for index in range(0, len(sectors) - 1, 2))
+        return ETFHoldings(self.ticker, top_holdings, tuple(zip(starts[:2], ends[:2])), sector_weightings,
+                           tuple(zip(starts[40:46], ends[2:8])), tuple(zip(starts[47:], ends[9:])))
 
     def get_top_holdings(self):
         """
-        :return:
+        :return: [[name, symbol, % assets], ...]
         """
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t.text for t in tables[0].find_all('td') if not t.find_all('td')]
-        res, l_r, index = [], [], 0
-        for elem in tds:
-            if index < 3:
-                l_r.append(elem)
-                index += 1
-            if index == 3:
-                res.append(l_r)
-                index, l_r = 0, []
-        return res
+        return [list(row) for row in self.holdings.top_holdings]
 
     def get_overall_portfolio_composition(self):
-        composed = [elem.text for elem in self.soup.find_all("span", attrs={"class": "Fl(start)"})
-                    if not elem.find_all("span", attrs={"class": "Fl(start)"})][:2]
-        part_comp = [elem.text for elem in self.soup.find_all("span", attrs={"class": "Fl(end)"})
-                     if not elem.find_all("span", attrs={"class": "Fl(end)"})][:2]
-        return list(zip(composed, part_comp))
+        return list(self.holdings.composition)
 
     def get_sector_weightings(self):
-        data = [elem.text for elem in self.soup.find_all("span", attrs={"class": "Fl(start)"})
-                if not elem.find_all("span", attrs={"class": "Fl(start)"})][5:38]
-        print(data)
-        res, l_res, index = [], [], 0
-        for elem in data:
-            if index < 2 and elem != "":
-                l_res.append(elem)
-                index += 1
-            if index == 2:
-                res.append(l_res)
-                l_res, index = [], 0
-        return res
+        return [list(row) for row in self.holdings.sector_weightings]
 
     def get_equity_holdings(self):
-        composed = [elem.text for elem in self.soup.find_all("span", attrs={"class": "Fl(start)"})
-                    if not elem.find_all("span", attrs={"class": "Fl(start)"})][40:46]
-        part_comp = [elem.text for elem in self.soup.find_all("span", attrs={"class": "Fl(end)"})
-                     if not elem.find_all("span", attrs={"class": "Fl(end)"})][2:8]
-        return list(zip(composed, part_comp))
+        return list(self.holdings.equity_holdings)
 
     def get_bond_ratings(self):
-        composed = [elem.text for elem in self.soup.find_all("span", attrs={"class": "Fl(start)"})
-                    if not elem.find_all("span", attrs={"class": "Fl(start)"})][47:]
-        part_comp = [elem.text for elem in self.soup.find_all("span", attrs={"class": "Fl(end)"})
-                     if not elem.find_all("span", attrs={"class": "Fl(end)"})][9:]
-        return list(zip(composed, part_comp))
+        return list(self.holdings.bond_ratings)
+
+    def to_records(self):
+        """
+        :return: every section as flat rows, see ETFHoldings.to_records
+        """
+        return self.holdings.to_records()
+
 
+# meta = ETFHoldingsData("PICK")
+# print(meta.get_top_holdings())
+# print(meta.get_sector_weightings())
+# print(meta.get_equity_holdings())
+# print(meta.get_bond_ratings())
 
-meta = ETFHoldingsData("PICK")
-print(meta.get_top_holdings())
-print(meta.get_sector_weightings())
-print(meta.get_equity_holdings())
-print(meta.get_bond_ratings())
 
+class ETFPerformance:
 
-class ETFPerformanceData:
+    __slots__ = ("ticker", "trailing_returns", "annual_returns")
 
-    def __init__(self, ticker):
+    def __init__(self, ticker, trailing_returns, annual_returns):
+        """
+        Every section of a performance page, read once.
+        :param trailing_returns: tuple of (period, fund return, benchmark return)
+        :param annual_returns: tuple of (year, fund return, category return), most recent year first
+        """
+        self.ticker = ticker
+        self.trailing_returns = trailing_returns
+        self.annual_returns = annual_returns
+
+    def to_records(self):
+        """
+        :return: one dict per row with the keys ticker, section, period, fund and benchmark
+        """
+        return [{"ticker": self.ticker, "section": section, "period": period, "fund": fund, "benchmark": benchmark}
+                for section in ("trailing_returns", "annual_returns")
+                for period, fund, benchmark in getattr(self, section)]
+
+
+class ETFPerformanceData(YahooPage):
+
+    parse_only = SoupStrainer("span", class_=has_class("Fl(start)", "Fl(end)"))
+
+    def __init__(self, ticker, session=None, parser=None):
         """
         :param ticker: the stock symbol as a string value
+        :param session: optional requests.Session, the shared pooled session is used by default
+        :param parser: HTML parser backend (see yf_parsing.parser_backends), the global one by default
         """
+        super().__init__(session, parser)
         self.ticker = ticker
-        self.url = f"https://finance.yahoo.com/quote/{ticker}/performance?p={ticker}"
-        self.soup = BeautifulSoup(requests.get(self.url, headers=user_agent).content, 'html.parser')
+        self.url = f"{base_url()}/quote/{ticker}/performance?p={ticker}"
+
+    @cached_property
+    def performance(self):
+        """
+        :return: an ETFPerformance built from one walk of the page on first use
+        """
+        starts = leaf_texts(self.soup, "span", ("Fl(start)",))["Fl(start)"]
+        # trailing rows are (period, return, benchmark), annual rows (year, return, category, empty)
+        trailing, annual = starts[3:30], starts[34:]
+        return ETFPerformance(self.ticker,
+                              tuple(tuple(trailing[index:index + 3]) for index in range(0, len(trailing) - 2, 3)),
+                              tuple(tuple(annual[index:index + 3]) for index in range(0, len(annual) - 2, 4)))
 
     def get_trailing_period_available(self):
         """
 
         :return:
         """
-        composed = [elem.text for elem in self.soup.find_all("span", attrs={"class": "Fl(start)"})
-                    if not elem.find_all("span", attrs={"class": "Fl(start)"})][3:30]
-        res, index = [composed[0]], 0
-        for elem in composed:
-            if index == 3:
-                res.append(elem)
-                index = 0
-            index += 1
-        return res
+        return [row[0] for row in self.performance.trailing_returns]
 
     def get_fund_trailing_performance_vs_benchmark(self, trailing_period):
         """
 
         :return:
         """
-        composed = [elem.text for elem in self.soup.find_all("span", attrs={"class": "Fl(start)"})
-                    if not elem.find_all("span", attrs={"class": "Fl(start)"})][3:30]
-        res, index = [], 0
-        for elem in composed:
-            if elem == trailing_period or (1 <= index < 3):
-                res.append(elem)
-                index += 1
-            if index == 3:
-                break
-        return res
+        for row in self.performance.trailing_returns:
+            if row[0] == trailing_period:
+                return list(row)
+        return []
 
     def get_years_available_for_total_return(self):
-        composed = [elem.text for elem in self.soup.find_all("span", attrs={"class": "Fl(start)"})
-                    if not elem.find_all("span", attrs={"class": "Fl(start)"})][34:]
-        res, index = [composed[0]], 0
-        for elem in composed:
-            if index == 4:
-                res.append(elem)
-                index = 0
-            index += 1
-        return res
+        return [row[0] for row in self.performance.annual_returns]
 
     def get_total_return_fund_vs_benchmark(self, year):
         """
 
         :return:
         """
-        composed = [elem.text for elem in self.soup.find_all("span", attrs={"class": "Fl(start)"})
-                    if not elem.find_all("span", attrs={"class": "Fl(start)"})][34:]
-        res, index = [], 0
-        for elem in composed:
-            if elem == year or (elem != "" and (1 <= index < 3)):
-                res.append(elem)
-                index += 1
-            if index == 3:
-                break
-        return res
+        for row in self.performance.annual_returns:
+            if row[0] == year:
+                return list(row)
+        return []
 
     def get_fund_overview(self):
         composed = self.soup.find_all("span", attrs={"class": "Fl(end)"})
         return composed
 
+    def to_records(self):
+        """
+        :return: the trailing and annual returns as flat rows, see ETFPerformance.to_records
+        """
+        return self.performance.to_records()
+
 
 # meta = ETFPerformanceData("VUG")
 # print(meta.get_trailing_period_available())
@@ -203,15 +258,19 @@ class ETFPerformanceData:
 # print(meta.get_total_return_fund_vs_benchmark('2020'))
 # print(meta.get_fund_overview())
 
-class ETFRiskData:
+class ETFRiskData(YahooPage):
+
+    parse_only = SoupStrainer("div", class_=has_class("Fl(start)"))
 
-    def __init__(self, ticker):
+    def __init__(self, ticker, session=None, parser=None):
         """
         :param ticker: the stock symbol as a string value
+        :param session: optional requests.Session, the shared pooled session is used by default
+        :param parser: HTML parser backend (see yf_parsing.parser_backends), the global one by default
         """
+        super().__init__(session, parser)
         self.ticker = ticker
-        self.url = f"https://finance.yahoo.com/quote/{ticker}/risk?p={ticker}"
-        self.soup = BeautifulSoup(requests.get(self.url, headers=user_agent).content, 'html.parser')
+        self.url = f"{base_url()}/quote/{ticker}/risk?p={ticker}"
 
     def get_fund_risk_data_types(self):
         composed = [elem.find("span").text for elem in
@@ -0,0 +1,351 @@
+# Support
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import requests
+from requests.adapters import HTTPAdapter
+from yf_scraper_lib import yf_metrics
+from yf_scraper_lib.yf_coalesce import SingleFlight
+from yf_scraper_lib.yf_latency import LatencyHistogram
+from yf_scraper_lib.yf_throttle import is_throttled, throttle_for
+
+try:
+    import brotli  # noqa: F401  (urllib3 decodes "br" bodies only when a brotli package is installed)
+    _brotli_available = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        _brotli_available = True
+    except ImportError:
+        _brotli_available = False
+
+# global variable
+settings = {
+    "base_url": "https://finance.yahoo.com",
+    "pool_connections": 10,
+    "pool_maxsize": 32,
+    "timeout": (5, 30),
+    "compression": ("gzip", "deflate", "br"),
+    # per-host rate and concurrency control, see yf_throttle
+    "throttle": True,
+    # attempts after a throttled response or a connection error and the first wait in seconds, doubled on each
+    # attempt and jittered
+    "retries": 3,
+    "backoff": 1.0,
+    # seconds a fetch may take in total, retries included, False for no limit
+    "deadline": 90.0,
+    # send a duplicate request when the first one has not answered after that many seconds, True for the p95
+    # of fetch_latency, False to never hedge
+    "hedge": False,
+    # concurrent fetches of one url (and session) share one download, see yf_coalesce.SingleFlight
+    "single_flight": True,
+}
+# network time of every request, see latency_stats
+fetch_latency = LatencyHistogram()
+# duplicate requests sent and duplicate requests that answered first
+hedges = {"sent": 0, "won": 0}
+_hedges_lock = threading.Lock()
+# the p95 is trusted for hedging from that many recorded requests
+_hedge_min_samples = 20
+_session = None
+_session_lock = threading.Lock()
+_page_cache = None
+_page_archive = None
+_hedge_executor = None
+_fetches = SingleFlight("fetch")
+
+
+def _accept_encoding(compression):
+    """
+    :param compression: iterable of content codings, ex: ("gzip", "deflate", "br")
+    :return: the Accept-Encoding header value, "br" is dropped when no brotli decoder is installed
+    """
+    return ", ".join(coding for coding in compression if coding != "br" or _brotli_available)
+
+
+def build_session(pool_connections=None, pool_maxsize=None, compression=None):
+    """
+    Build a keep-alive session whose connection pool is shared by every request made through it.
+    :param pool_connections: number of host pools to keep (one per host is enough for finance.yahoo.com)
+    :param pool_maxsize: number of connections kept alive per host, should be >= the number of concurrent fetches
+    :param compression: iterable of accepted content codings
+    :return: a configured requests.Session
+    """
+    pool_connections = settings["pool_connections"] if pool_connections is None else pool_connections
+    pool_maxsize = settings["pool_maxsize"] if pool_maxsize is None else pool_maxsize
+    compression = settings["compression"] if compression is None else compression
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Accept-Encoding"] = _accept_encoding(compression)
+    return session
+
+
+def configure_session(pool_connections=None, pool_maxsize=None, timeout=None, compression=None, session=None,
+                      base_url=None, throttle=None, retries=None, backoff=None, deadline=None, hedge=None,
+                      single_flight=None):
+    """
+    Change the transport shared by every scraper class. The current shared session is closed and replaced.
+    :param pool_connections: see build_session
+    :param pool_maxsize: see build_session
+    :param timeout: default timeout in seconds, a float or a (connect, read) tuple
+    :param compression: see build_session
+    :param session: your own requests.Session to use as is instead of building one
+    :param base_url: scheme and host every page url is built on (ex: a local stub server in tests)
+    :param throttle: False to send the requests without the yf_throttle rate and concurrency control
+    :param retries: attempts after a throttled response (429, 5xx, empty page, consent redirect) or a connection
+                    error
+    :param backoff: seconds waited before the first retry, doubled on each one and drawn uniformly below that
+                    (full jitter), Retry-After wins when sent
+    :param deadline: seconds a fetch may take in total with its retries, requests.Timeout is raised beyond,
+                     False for no limit
+    :param hedge: seconds after which a duplicate request is sent if the first one has not answered, the first
+                  response wins. True uses the p95 of fetch_latency once it has enough samples, False disables it
+    :param single_flight: False to send one request per fetch even when the same page is already being downloaded
+    """
+    global _session
+    for key, value in (("pool_connections", pool_connections), ("pool_maxsize", pool_maxsize),
+                       ("timeout", timeout), ("compression", compression), ("base_url", base_url),
+                       ("throttle", throttle), ("retries", retries), ("backoff", backoff), ("deadline", deadline),
+                       ("hedge", hedge), ("single_flight", single_flight)):
+        if value is not None:
+            settings[key] = value
+    with _session_lock:
+        previous, _session = _session, session
+    if previous is not None and previous is not session:
+        previous.close()
+
+
+def base_url():
+    """
+    :return: the scheme and host the scraper classes build their page urls on
+    """
+    return settings["base_url"]
+
+
+def get_session():
+    """
+    :return: the shared session, built on first use
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def close_session():
+    """
+    Close the shared session and its pooled connections. A new one is built on next use.
+    """
+    global _session
+    with _session_lock:
+        previous, _session = _session, None
+    if previous is not None:
+        previous.close()
+
+
+def set_page_cache(cache):
+    """
+    Turn the on-disk page cache on for every fetch, ex: set_page_cache(PageCache("~/.yf_cache")), None turns it off.
+    :param cache: a yf_page_cache.PageCache or None
+    """
+    global _page_cache
+    _page_cache = cache
+
+
+def get_page_cache():
+    return _page_cache
+
+
+def set_page_archive(archive):
+    """
+    Keep every downloaded page, ex: set_page_archive(PageArchive("~/.yf_archive")), None turns it off.
+    :param archive: a yf_page_archive.PageArchive or None
+    """
+    global _page_archive
+    _page_archive = archive
+
+
+def get_page_archive():
+    return _page_archive
+
+
+class ThrottledError(requests.HTTPError):
+    """
+    Yahoo was still pushing back (429, 5xx, empty page, consent wall, see yf_throttle.is_throttled) when the
+    retries ran out, the page is neither cached nor archived.
+    """
+
+
+def _archived(url, response):
+    # the throttled bodies (a consent wall answers 200) must never be replayed as the page
+    if is_throttled(response):
+        raise ThrottledError(f"{url} was still throttled after {settings['retries']} retries "
+                             f"(status {response.status_code}, url {response.url})", response=response)
+    if _page_archive is not None and response.status_code == 200 and response.content:
+        _page_archive.append(url, response.content)
+    return response
+
+
+def latency_stats():
+    """
+    :return: fetch_latency.snapshot() (count, mean, p50, p90, p95, p99, buckets) with the hedges counters
+    """
+    with _hedges_lock:
+        return dict(fetch_latency.snapshot(), **hedges)
+
+
+def hedge_delay():
+    """
+    :return: the seconds after which a fetch is hedged, None when hedging is off or p95 is not known yet
+    """
+    hedge = settings["hedge"]
+    if hedge is True:
+        return fetch_latency.quantile(0.95) if fetch_latency.count >= _hedge_min_samples else None
+    return hedge or None
+
+
+def _count_hedge(key):
+    # the hedging threads update the counters at the same time
+    with _hedges_lock:
+        hedges[key] += 1
+
+
+def _retry_delay(response, attempt):
+    retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+    if retry_after.isdigit():
+        return min(float(retry_after), 60.0)
+    return random.uniform(0, settings["backoff"] * 2 ** attempt)
+
+
+def _bounded_timeout(timeout, remaining):
+    if remaining is None or timeout is None:
+        return timeout if remaining is None else remaining
+    if isinstance(timeout, tuple):
+        return tuple(min(part, remaining) for part in timeout)
+    return min(timeout, remaining)
+
+
+def _attempt(session, url, headers, timeout):
+    """
+    One GET through the host throttle, its network time goes into fetch_latency.
+    """
+    throttle = throttle_for(url) if settings["throttle"] else None
+    ticket = throttle.acquire() if throttle is not None else None
+    start = time.perf_counter()
+    try:
+        response = session.get(url, headers=headers, timeout=timeout)
+    except requests.RequestException:
+        if throttle is not None:
+            throttle.release(ticket, True)
+        raise
+    fetch_latency.record(time.perf_counter() - start)
+    if throttle is not None:
+        throttle.release(ticket, is_throttled(response))
+    return response
+
+
+def _hedged(session, url, headers, timeout, end):
+    """
+    _attempt, with a duplicate sent after hedge_delay() seconds if the first one is still waiting.
+    :param end: time.monotonic() deadline or None
+    """
+    global _hedge_executor
+    delay = hedge_delay()
+    if delay is None:
+        return _attempt(session, url, headers, timeout)
+    if _hedge_executor is None:
+        with _session_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(max_workers=2 * settings["pool_maxsize"],
+                                                     thread_name_prefix="yf-hedge")
+    first = _hedge_executor.submit(_attempt, session, url, headers, timeout)
+    pending = {first}
+    if end is None or time.monotonic() + delay < end:
+        done, _ = wait(pending, timeout=delay)
+        if not done:
+            _count_hedge("sent")
+            pending.add(_hedge_executor.submit(_attempt, session, url, headers, timeout))
+    error = None
+    while pending:
+        remaining = None if end is None else end - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                if future is not first:
+                    _count_hedge("won")
+                return future.result()
+            error = future.exception()
+    if error is not None and not pending:
+        raise error
+    raise requests.Timeout(f"No answer from {url} before the deadline")
+
+
+def _get(session, url, headers, timeout, deadline):
+    """
+    GET with a total deadline, hedging and jittered retries of the throttled responses and connection errors.
+    :return: the last requests.Response
+    """
+    end = time.monotonic() + deadline if deadline else None
+    for attempt in range(settings["retries"] + 1):
+        remaining = None if end is None else end - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            raise requests.Timeout(f"Deadline of {deadline}s exceeded for {url}")
+        response = None
+        try:
+            response = _hedged(session, url, headers, _bounded_timeout(timeout, remaining), end)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == settings["retries"]:
+                raise
+        if response is not None and (not is_throttled(response) or attempt == settings["retries"]):
+            return response
+        delay = _retry_delay(response, attempt)
+        if end is not None:
+            delay = min(delay, max(0.0, end - time.monotonic()))
+        time.sleep(delay)
+
+
+def fetch_page(url, headers=None, session=None, timeout=None, deadline=None):
+    """
+    :param url: the page url
+    :param headers: extra request headers (ex: the User-Agent)
+    :param session: a requests.Session to use instead of the shared one
+    :param timeout: a timeout overriding the configured default
+    :param deadline: total seconds overriding the configured deadline, False for no limit
+    :return: the raw page content as bytes, shared with the concurrent fetches of the same url and session,
+             ThrottledError is raised when every attempt was throttled
+    """
+    session = get_session() if session is None else session
+    timeout = settings["timeout"] if timeout is None else timeout
+    deadline = settings["deadline"] if deadline is None else deadline
+    if not settings["single_flight"]:
+        return _fetch_page(url, headers, session, timeout, deadline)
+    return _fetches.do((url, id(session)), lambda: _fetch_page(url, headers, session, timeout, deadline))
+
+
+def _fetch_page(url, headers, session, timeout, deadline):
+    cache = _page_cache
+    if cache is None:
+        return _archived(url, _get(session, url, headers, timeout, deadline)).content
+    entry = cache.lookup(url)
+    if entry is not None:
+        if cache.is_fresh(entry):
+            if yf_metrics.enabled:
+                yf_metrics.inc("yf_page_cache_total", {"result": "hit"})
+            return entry.content
+        headers = dict(headers or {}, **entry.validators())
+    response = _archived(url, _get(session, url, headers, timeout, deadline))
+    if yf_metrics.enabled:
+        revalidated = response.status_code == 304 and entry is not None
+        yf_metrics.inc("yf_page_cache_total", {"result": "revalidated" if revalidated else "miss"})
+    if response.status_code == 304 and entry is not None:
+        return cache.touch(entry).content
+    if response.status_code == 200:
+        cache.store(url, response.content, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+    return response.content
@@ -0,0 +1,65 @@
+# Support
+import bisect
+import math
+import threading
+
+# global variable
+# histogram bucket bounds in seconds of the Prometheus export (see yf_metrics), every one is a bucket bound
+export_bounds = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# bucket upper bounds in seconds, 1ms to 2min with ~10% wide buckets
+_growth = 1.1
+bounds = sorted({0.001 * _growth ** index for index in range(int(math.log(120_000) / math.log(_growth)) + 2)} |
+                set(export_bounds))
+
+
+class LatencyHistogram:
+
+    def __init__(self):
+        """
+        Thread safe log-bucketed histogram of durations, quantiles are accurate to one bucket (~10%).
+        """
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        index = bisect.bisect_left(bounds, seconds)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+
+    def quantile(self, q):
+        """
+        :param q: between 0 and 1, ex: 0.95
+        :return: the upper bound in seconds of the bucket holding the q quantile, None when nothing was recorded
+        """
+        with self.lock:
+            if self.count == 0:
+                return None
+            rank = max(1, math.ceil(q * self.count))
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank:
+                    return bounds[index] if index < len(bounds) else math.inf
+        return math.inf
+
+    def snapshot(self):
+        """
+        :return: dict with count, mean, p50, p90, p95, p99 in seconds and buckets as [(upper bound, count), ...]
+                 for the non-empty buckets
+        """
+        quantiles = {f"p{int(q * 100)}": self.quantile(q) for q in (0.5, 0.9, 0.95, 0.99)}
+        with self.lock:
+            buckets = [(bounds[index] if index < len(bounds) else math.inf, count)
+                       for index, count in enumerate(self.counts) if count]
+            mean = self.total / self.count if self.count else None
+            return dict(count=self.count, mean=mean, buckets=buckets, **quantiles)
+
+    def reset(self):
+        with self.lock:
+            self.counts = [0] * (len(bounds) + 1)
+            self.count = 0
+            self.total = 0.0
@@ -0,0 +1,260 @@
+# Support
+import functools
+import inspect
+import json
+import math
+import threading
+import time
+from functools import cached_property
+from yf_scraper_lib.yf_latency import LatencyHistogram, export_bounds
+
+# global variable
+# the hooks of yf_page, yf_http_session and the scraper getters record only while it is True, see enable_metrics
+enabled = False
+# (name, labels) -> value, labels being a sorted tuple of (key, value)
+counters = {}
+# (name, labels) -> LatencyHistogram
+histograms = {}
+descriptions = {
+    "yf_stage_seconds": "Time spent per scraper class in the fetch, state (embedded JSON) and parse (soup) stages",
+    "yf_getter_seconds": "Time spent per scraper class in each getter, first call included",
+    "yf_downloaded_bytes_total": "Bytes of raw page returned by fetch per scraper class",
+    "yf_dom_nodes_total": "Nodes built into the soups per scraper class",
+    "yf_page_cache_total": "Page cache lookups by result (hit, revalidated, miss)",
+    "yf_coalesced_total": "Calls served by the download (fetch) or parse (document) already in flight",
+    "yf_document_cache_total": "Parsed document cache lookups by result (hit, miss)",
+    "yf_http_request_seconds": "Network time of every HTTP request, retries and hedges included",
+}
+_lock = threading.Lock()
+_inside_fetch = threading.local()
+# class -> {attribute: original} replaced by instrument
+_originals = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def inc(name, labels=None, value=1):
+    """
+    :param name: the counter name, ex: "yf_page_cache_total"
+    :param labels: dict, ex: {"result": "hit"}
+    :param value: added to the counter
+    """
+    key = _key(name, labels)
+    with _lock:
+        counters[key] = counters.get(key, 0) + value
+
+
+def observe(name, seconds, labels=None):
+    """
+    Record a duration in the name histogram of these labels.
+    """
+    key = _key(name, labels)
+    histogram = histograms.get(key)
+    if histogram is None:
+        with _lock:
+            histogram = histograms.setdefault(key, LatencyHistogram())
+    histogram.record(seconds)
+
+
+def reset_metrics():
+    with _lock:
+        counters.clear()
+        histograms.clear()
+
+
+def _timed_method(name, method):
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            observe("yf_getter_seconds", time.perf_counter() - start,
+                    {"class": type(self).__name__, "getter": name})
+    return wrapper
+
+
+def _timed_fetch(method):
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # an overriding fetch calling super().fetch() is timed once
+        if getattr(_inside_fetch, "active", False):
+            return method(self, *args, **kwargs)
+        _inside_fetch.active = True
+        start = time.perf_counter()
+        try:
+            page = method(self, *args, **kwargs)
+        finally:
+            _inside_fetch.active = False
+        labels = {"class": type(self).__name__}
+        observe("yf_stage_seconds", time.perf_counter() - start, dict(labels, stage="fetch"))
+        inc("yf_downloaded_bytes_total", labels, len(page or b""))
+        return page
+    return wrapper
+
+
+def instrument(cls):
+    """
+    Time the fetch, the getters (get_*, to_*) and the cached extractions (statistics, holdings, statement, ...)
+    that cls defines. Called for every scraper class by enable_metrics and for the classes defined later.
+    """
+    if cls in _originals:
+        return
+    originals = _originals[cls] = {}
+    for name, attribute in list(vars(cls).items()):
+        if name == "fetch" and inspect.isfunction(attribute):
+            wrapped = _timed_fetch(attribute)
+        elif isinstance(attribute, cached_property):
+            wrapped = cached_property(_timed_method(name, attribute.func))
+            wrapped.__set_name__(cls, name)
+        elif inspect.isfunction(attribute) and name.startswith(("get_", "to_")):
+            wrapped = _timed_method(name, attribute)
+        else:
+            continue
+        originals[name] = attribute
+        setattr(cls, name, wrapped)
+
+
+def _scraper_classes():
+    from yf_scraper_lib.yf_page import YahooPage
+    classes, pending = [], [YahooPage]
+    while pending:
+        cls = pending.pop()
+        classes.append(cls)
+        pending.extend(cls.__subclasses__())
+    return classes
+
+
+def enable_metrics(value=True):
+    """
+    Start (or stop with False) recording the stage timings, getter timings, downloaded bytes, DOM node counts and
+    page cache lookups. The getters are only wrapped while the metrics are on, they cost nothing otherwise.
+    """
+    global enabled
+    enabled = value
+    if value:
+        for cls in _scraper_classes():
+            instrument(cls)
+        return
+    for cls, originals in list(_originals.items()):
+        for name, attribute in originals.items():
+            setattr(cls, name, attribute)
+    _originals.clear()
+
+
+def _series():
+    from yf_scraper_lib.yf_http_session import fetch_latency
+    with _lock:
+        series = [(name, labels, "counter", value) for (name, labels), value in counters.items()]
+        series += [(name, labels, "histogram", histogram) for (name, labels), histogram in histograms.items()]
+    series.append(("yf_http_request_seconds", (), "histogram", fetch_latency))
+    return sorted(series, key=lambda item: (item[0], item[1]))
+
+
+def snapshot():
+    """
+    :return: list of dicts (name, labels, type, and value for a counter or the LatencyHistogram snapshot fields
+             for a histogram)
+    """
+    res = []
+    for name, labels, kind, value in _series():
+        record = {"name": name, "labels": dict(labels), "type": kind}
+        if kind == "counter":
+            record["value"] = value
+        else:
+            # the last bucket is unbounded, "+Inf" keeps the JSON lines standard
+            record.update({key: "+Inf" if item == math.inf else item for key, item in value.snapshot().items()})
+            record["buckets"] = [("+Inf" if upper == math.inf else upper, count) for upper, count in
+                                 record["buckets"]]
+        res.append(record)
+    return res
+
+
+def _labels_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def prometheus_text():
+    """
+    :return: every metric in the Prometheus text exposition format, to serve on a /metrics endpoint or to write
+             for the node_exporter textfile collector
+    """
+    lines, declared = [], set()
+    for name, labels, kind, value in _series():
+        if name not in declared:
+            declared.add(name)
+            if name in descriptions:
+                lines.append(f"# HELP {name} {descriptions[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+        if kind == "counter":
+            lines.append(f"{name}{_labels_text(labels)} {value}")
+            continue
+        state = value.snapshot()
+        for bound in export_bounds:
+            count = sum(count for upper, count in state["buckets"] if upper <= bound)
+            lines.append(f"{name}_bucket{_labels_text(labels, [('le', repr(bound))])} {count}")
+        lines.append(f"{name}_bucket{_labels_text(labels, [('le', '+Inf')])} {state['count']}")
+        lines.append(f"{name}_sum{_labels_text(labels)} {(state['mean'] or 0.0) * state['count']}")
+        lines.append(f"{name}_count{_labels_text(labels)} {state['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_jsonl(file):
+    """
+    Append one JSON line per metric, stamped with the current time, to file (a path or an open text file).
+    """
+    now = time.time()
+    lines = "".join(json.dumps(dict(record, time=now)) + "\n" for record in snapshot())
+    if isinstance(file, str):
+        with open(file, "a") as f:
+            f.write(lines)
+    else:
+        file.write(lines)
+
+
+def profile_scrape(function, *args, cpu=True, memory=True, limit=25, **kwargs):
+    """
+    Run function(*args, **kwargs) once under cProfile and tracemalloc, ex:
+        result, report = profile_scrape(lambda: StockStatisticsData("AAPL").get_all_statistics())
+        print(report["profile"])
+    :param cpu: capture the cProfile statistics
+    :param memory: capture the allocations with tracemalloc (slows the run down a lot)
+    :param limit: number of functions and allocation sites kept in the report
+    :return: (the function result, dict with "seconds", "profile" (the pstats text sorted by cumulative time),
+             "peak_bytes" and "allocations" (the top allocation sites as text lines))
+    """
+    import cProfile
+    import io
+    import pstats
+    import tracemalloc
+    profiler = cProfile.Profile() if cpu else None
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        if profiler is not None:
+            result = profiler.runcall(function, *args, **kwargs)
+        else:
+            result = function(*args, **kwargs)
+        report = {"seconds": time.perf_counter() - start}
+        if memory:
+            report["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            report["allocations"] = [str(stat) for stat in
+                                     tracemalloc.take_snapshot().statistics("lineno")[:limit]]
+    finally:
+        if tracing:
+            tracemalloc.stop()
+    if profiler is not None:
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(limit)
+        report["profile"] = text.getvalue()
+    return result, report
@@ -0,0 +1,154 @@
+# Support
+# NumPy is imported by the functions, not on module import
+import re
+
+# global variable
+# what Yahoo shows for a missing value
+missing_values = ("", "N/A", "-", "--", "NaN", "nan", "None", "∞", "-∞")
+suffixes = {"k": 1e3, "K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12, "%": 0.01}
+months = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+_label_run = re.compile(r"(?:[^\W\d_]| )*")
+
+
+def _strings(values):
+    """
+    :return: values as a stripped NumPy unicode array, None and NaN as ""
+    """
+    import numpy as np
+    values = np.asarray(values, dtype=object).ravel()
+    if values.size == 0:
+        return np.empty(0, dtype="U1")
+    blank = np.array([value is None or value != value for value in values], dtype=bool) if \
+        values.dtype == object else np.zeros(values.size, dtype=bool)
+    values = values.astype(str)
+    values[blank] = ""
+    return np.char.strip(values)
+
+
+def _missing(strings):
+    import numpy as np
+    return np.isin(strings, missing_values)
+
+
+def _to_floats(strings):
+    # C level conversion, the values that do not convert are only then looked at one by one
+    import numpy as np
+    try:
+        return strings.astype(np.float64)
+    except ValueError:
+        def convert(value):
+            try:
+                return float(value)
+            except ValueError:
+                return np.nan
+        return np.array([convert(value) for value in strings], dtype=np.float64)
+
+
+def to_numbers(values):
+    """
+    Convert a column of scraped values in one go, ex:
+        to_numbers(["1.23B", "0.09%", "N/A", "-9,012,000", "8.72"]) -> [1.23e9, 0.0009, nan, -9012000., 8.72]
+    The percentages become fractions, like the raw values of the embedded JSON.
+    :param values: iterable of strings (None and NaN are missing values)
+    :return: a float64 NumPy array, NaN for the missing and unreadable values
+    """
+    import numpy as np
+    strings = _strings(values)
+    if strings.size == 0:
+        return np.empty(0, dtype=np.float64)
+    strings = np.char.replace(strings, ",", "")
+    scale = np.ones(strings.size, dtype=np.float64)
+    for suffix, factor in suffixes.items():
+        scale[np.char.endswith(strings, suffix)] = factor
+    strings = np.char.rstrip(strings, "".join(suffixes))
+    strings[_missing(strings)] = "nan"
+    return _to_floats(strings) * scale
+
+
+def split_ranges(values, separator=" - "):
+    """
+    :param values: iterable of ranges, ex: ["45.10 - 52.30", "N/A"]
+    :param separator: what sits between the low and the high value
+    :return: (low, high) float64 NumPy arrays, see to_numbers
+    """
+    import numpy as np
+    parts = np.char.partition(_strings(values), separator)
+    if parts.size == 0:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)
+    return to_numbers(parts[:, 0]), to_numbers(parts[:, 2])
+
+
+def _set_iso(iso, mask, year, month, day):
+    import numpy as np
+    if mask.any():
+        iso[mask] = np.char.add(np.char.add(np.char.add(year[mask], "-"), np.char.zfill(month[mask], 2)),
+                                np.char.add("-", np.char.zfill(day[mask], 2)))
+
+
+def to_dates(values):
+    """
+    :param values: iterable of dates as shown by Yahoo ("Mar 17, 2006", "12/30/2022") or ISO ("2015-10-09")
+    :return: a datetime64[D] NumPy array, NaT for the missing and unreadable values
+    """
+    import numpy as np
+    strings = _strings(values)
+    iso = np.full(strings.size, "NaT", dtype="U10")
+    if strings.size == 0:
+        return iso.astype("datetime64[D]")
+    # "2015-10-09"
+    dashed = (np.char.str_len(strings) == 10) & (np.char.count(strings, "-") == 2)
+    iso[dashed] = strings[dashed]
+    # "Mar 17, 2006"
+    month, _, rest = np.char.partition(strings, " ").T
+    day, _, year = np.char.partition(rest, ", ").T
+    number = np.zeros(strings.size, dtype=int)
+    for index, name in enumerate(months):
+        number[month == name] = index + 1
+    named = (number > 0) & (np.char.str_len(year) == 4) & np.char.isdigit(day) & np.char.isdigit(year)
+    _set_iso(iso, named, year, number.astype(str), day)
+    # "12/30/2022"
+    month, _, rest = np.char.partition(strings, "/").T
+    day, _, year = np.char.partition(rest, "/").T
+    slashed = ~named & ~dashed & np.char.isdigit(month) & np.char.isdigit(day) & np.char.isdigit(year) & \
+        (np.char.str_len(year) == 4)
+    _set_iso(iso, slashed, year, month, day)
+    try:
+        return iso.astype("datetime64[D]")
+    except ValueError:
+        def convert(value):
+            try:
+                return np.datetime64(value, "D")
+            except ValueError:
+                return np.datetime64("NaT", "D")
+        return np.array([convert(value) for value in iso], dtype="datetime64[D]")
+
+
+def to_typed(values):
+    """
+    Pick the type of a column: numbers (see to_numbers) when every present value reads as one, else dates (see
+    to_dates), else the values are left as they are.
+    :param values: iterable of strings
+    :return: a float64, datetime64[D] or object NumPy array
+    """
+    import numpy as np
+    strings = _strings(values)
+    present = ~_missing(strings)
+    numbers = to_numbers(strings)
+    if not np.isnan(numbers[present]).any():
+        return numbers
+    dates = to_dates(strings)
+    if not np.isnat(dates[present]).any():
+        return dates
+    res = np.asarray(values, dtype=object).ravel().copy()
+    res[~present] = None
+    return res
+
+
+def split_label(value):
+    """
+    :param value: a label followed by digits, ex: "Total Revenue26,090,000"
+    :return: (label, rest), ex: ("Total Revenue", "26,090,000"), label is "" when value does not start with
+             letters
+    """
+    label = _label_run.match(value).group()
+    return label, value[len(label):]
@@ -0,0 +1,192 @@
+# Support
+import threading
+import time
+from functools import cached_property
+from yf_scraper_lib import yf_metrics, yf_parsing
+from yf_scraper_lib.yf_http_session import fetch_page
+from yf_scraper_lib.yf_page_state import extract_state
+from yf_scraper_lib.yf_parsing import leaf_table_cells, make_soup
+
+# global variable
+_user_agent = None
+_user_agent_lock = threading.Lock()
+_document_cache = None
+
+
+def user_agent_header():
+    """
+    :return: the {"User-Agent": ...} header sent with every page, a Chrome one drawn by fake_useragent on first use
+    """
+    global _user_agent
+    if _user_agent is None:
+        with _user_agent_lock:
+            if _user_agent is None:
+                from fake_useragent import UserAgent
+                _user_agent = {"User-Agent": UserAgent().chrome}
+    return _user_agent
+
+
+def set_user_agent(value):
+    """
+    Send value as User-Agent instead of drawing one with fake_useragent, None to draw one again on next use.
+    """
+    global _user_agent
+    _user_agent = None if value is None else {"User-Agent": value}
+
+
+def __getattr__(name):
+    # user_agent used to be a module constant, it is now resolved on first access
+    if name == "user_agent":
+        return user_agent_header()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def set_document_cache(cache):
+    """
+    Share the parsed pages between the scraper objects loading the same url within a few seconds, ex:
+    set_document_cache(DocumentCache(max_entries=64, ttl=5.0)), None turns it off.
+    :param cache: a yf_coalesce.DocumentCache or None
+    """
+    global _document_cache
+    _document_cache = cache
+
+
+def get_document_cache():
+    return _document_cache
+
+
+class YahooPage:
+    """
+    Base of the scraper classes: the page is downloaded and parsed on first access to soup (or on load()),
+    never in the constructor. Subclasses set self.url and may narrow parse_only.
+    The subclasses setting embedded_state read their getters from the JSON Yahoo embeds in the page (see
+    yf_page_state), the soup is then only built for a getter falling back to the DOM.
+    """
+
+    # a SoupStrainer of the only subtrees the getters read, the rest of the page is not built into the soup
+    parse_only = None
+    # True when the getters read the embedded JSON first and the soup only on fallback
+    embedded_state = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if yf_metrics.enabled:
+            yf_metrics.instrument(cls)
+
+    def __init__(self, session=None, parser=None):
+        """
+        :param session: optional requests.Session, the shared pooled session is used by default
+        :param parser: HTML parser backend (see yf_parsing.parser_backends), the global one by default
+        """
+        self.session = session
+        self.parser = parser
+        self._soup = None
+        self._state = None
+        self._page = None
+
+    @classmethod
+    def from_archive(cls, archive, *args, at=None, **kwargs):
+        """
+        Build the object from an archived page instead of the network, ex:
+            ETFData.from_archive(archive, "SPY", at=time.time() - 7 * 86400).get_nav()
+        :param archive: a yf_page_archive.PageArchive (or a yf_replay.PageStore, without at)
+        :param args: the constructor arguments
+        :param at: a time.time() value, the version fetched last at or before it, the latest by default
+        :param kwargs: the constructor keyword arguments
+        :return: the loaded object, KeyError when the page was not archived
+        """
+        obj = cls(*args, **kwargs)
+        page = archive.get(obj.url) if at is None else archive.get(obj.url, at=at)
+        if page is None:
+            raise KeyError(f"{obj.url} is not in the archive")
+        return obj.load(page)
+
+    def fetch(self):
+        """
+        :return: the raw page content
+        """
+        return fetch_page(self.url, headers=user_agent_header(), session=self.session)
+
+    def load(self, page=None):
+        """
+        Download (unless the raw page is given) and parse the page now.
+        :param page: the raw page content if it was already downloaded
+        :return: self, so that obj = ETFData("SPY").load() works
+        """
+        cache = _document_cache
+        if page is None and cache is not None:
+            self._soup, self._state, self._page = cache.get_or_load(self.document_key(), self._fetch_document)
+        else:
+            self._soup, self._state, self._page = self._parse(self.fetch() if page is None else page)
+        return self
+
+    def document_key(self):
+        """
+        :return: what identifies the parsed page in the document cache: the url and everything changing what
+                 fetch returns or how it is parsed
+        """
+        return (self.url, type(self).fetch, id(self.session) if self.session is not None else None,
+                self.parser or yf_parsing.parser_backend, id(self.parse_only), self.embedded_state)
+
+    def _fetch_document(self):
+        page = self.fetch()
+        return self._parse(page), len(page or b"")
+
+    def _parse(self, page):
+        """
+        :return: (soup, embedded state, raw page kept for the getters falling back to the DOM)
+        """
+        if self.embedded_state:
+            state = self._extract_state(page)
+            if state is not None:
+                return None, state, page
+        return self._make_soup(page), None, None
+
+    def _extract_state(self, page):
+        if not yf_metrics.enabled:
+            return extract_state(page)
+        start = time.perf_counter()
+        state = extract_state(page)
+        yf_metrics.observe("yf_stage_seconds", time.perf_counter() - start,
+                           {"class": type(self).__name__, "stage": "state"})
+        return state
+
+    def _make_soup(self, page):
+        if not yf_metrics.enabled:
+            return make_soup(page, self.parser, self.parse_only)
+        start = time.perf_counter()
+        soup = make_soup(page, self.parser, self.parse_only)
+        labels = {"class": type(self).__name__}
+        yf_metrics.observe("yf_stage_seconds", time.perf_counter() - start, dict(labels, stage="parse"))
+        yf_metrics.inc("yf_dom_nodes_total", labels, sum(1 for _ in soup.descendants))
+        return soup
+
+    @property
+    def loaded(self):
+        return self._soup is not None or self._state is not None
+
+    @property
+    def soup(self):
+        if self._soup is None:
+            if not self.loaded:
+                self.load()
+            if self._soup is None:
+                self._soup = self._make_soup(self._page)
+                self._page = None
+        return self._soup
+
+    @property
+    def state(self):
+        """
+        :return: the embedded page data (see yf_page_state.extract_state), None if the page has none
+        """
+        if not self.loaded:
+            self.load()
+        return self._state
+
+    @cached_property
+    def tables(self):
+        """
+        :return: the cells text of every leaf table, extracted once on first use
+        """
+        return leaf_table_cells(self.soup)
@@ -0,0 +1,335 @@
+# Support
+# zstandard and numpy are imported by PageArchive, not on module import
+import hashlib
+import mmap
+import os
+import re
+import struct
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from yf_scraper_lib.yf_replay import page_key
+
+# global variable
+# segment record: magic, fetch time, url length, compressed page length, then the url and the zstd frame
+_record = struct.Struct("<4sdII")
+_magic = b"YFPA"
+# index entry: url hash, segment number, record offset, record length, fetch time
+_entry = struct.Struct("<QIQId")
+_entry_fields = [("url_hash", "<u8"), ("segment", "<u4"), ("offset", "<u8"), ("length", "<u4"), ("timestamp", "<f8")]
+
+
+def _url_hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little")
+
+
+class PageArchive:
+
+    def __init__(self, directory, segment_bytes=256 * 1024 * 1024, level=3):
+        """
+        Append-only archive of raw pages: zstd compressed records in segment files (segment-00000.yfa, ...) and an
+        index.bin of fixed size entries, memory-mapped and scanned on every lookup, so the pages appended by
+        other processes are found too. A page is kept for every fetch, so the past versions
+        of a page stay available, ex: archive.get(url, at=time.time() - 30 * 86400).
+        :param directory: where the segments are stored, created if missing
+        :param segment_bytes: size above which a new segment file is started
+        :param level: zstd compression level
+        """
+        import numpy
+        import zstandard
+        self.zstandard = zstandard
+        self.entry_type = numpy.dtype(_entry_fields)
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.level = level
+        # the zstd contexts cannot be shared by threads, each thread gets its own
+        self.contexts = threading.local()
+        self.lock = threading.Lock()
+        self.index_path = os.path.join(directory, "index.bin")
+        self.index_file = None
+        self.mapped, self.mapped_size = None, 0
+        os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(self.index_path):
+            self.rebuild_index()
+        # an entry half written by a crash is dropped
+        size = os.path.getsize(self.index_path)
+        if size % _entry.size:
+            os.truncate(self.index_path, size - size % _entry.size)
+        self.index_file = open(self.index_path, "ab")
+        self.segment = max(self.segments(), default=0)
+        self.segment_file = None
+
+    def compress(self, content):
+        if not hasattr(self.contexts, "compressor"):
+            self.contexts.compressor = self.zstandard.ZstdCompressor(level=self.level)
+        return self.contexts.compressor.compress(content)
+
+    def decompress(self, data):
+        if not hasattr(self.contexts, "decompressor"):
+            self.contexts.decompressor = self.zstandard.ZstdDecompressor()
+        return self.contexts.decompressor.decompress(data)
+
+    def segment_path(self, segment):
+        return os.path.join(self.directory, f"segment-{segment:05d}.yfa")
+
+    def segments(self):
+        """
+        :return: the segment numbers on disk, in order
+        """
+        return sorted(int(name[8:13]) for name in os.listdir(self.directory)
+                      if name.startswith("segment-") and name.endswith(".yfa"))
+
+    def append(self, url, content, timestamp=None):
+        """
+        :param url: the page url, stored under its host independent key (ex: "/quote/SPY?p=SPY")
+        :param content: the raw page
+        :param timestamp: the fetch time, now by default
+        """
+        key = page_key(url)
+        encoded = key.encode()
+        data = self.compress(content)
+        timestamp = time.time() if timestamp is None else timestamp
+        record = _record.pack(_magic, timestamp, len(encoded), len(data)) + encoded + data
+        with self.lock:
+            if self.segment_file is None:
+                self.segment_file = open(self.segment_path(self.segment), "ab")
+            if 0 < self.segment_file.tell() and self.segment_file.tell() + len(record) > self.segment_bytes:
+                self.segment_file.close()
+                self.segment += 1
+                self.segment_file = open(self.segment_path(self.segment), "ab")
+            offset = self.segment_file.tell()
+            self.segment_file.write(record)
+            self.segment_file.flush()
+            # the index entry goes after the data, an entry always points to a complete record
+            self.index_file.write(_entry.pack(_url_hash(key), self.segment, offset, len(record), timestamp))
+            self.index_file.flush()
+
+    def entries(self):
+        """
+        :return: the index as a list of (url hash, segment, offset, length, fetch time) in append order, decoded
+                 from the memory-mapped index.bin
+        """
+        with self.lock:
+            size = self._map_index()
+            if size == 0:
+                return []
+            with memoryview(self.mapped) as view:
+                return list(_entry.iter_unpack(view[:size]))
+
+    def _map_index(self):
+        """
+        Map index.bin again when it grew since the last call, called with the lock held.
+        :return: the size of the complete entries
+        """
+        size = os.path.getsize(self.index_path)
+        size -= size % _entry.size
+        if size and (self.mapped is None or size != self.mapped_size):
+            if self.mapped is not None:
+                self.mapped.close()
+            with open(self.index_path, "rb") as f:
+                self.mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mapped_size = size
+        return size
+
+    def _lookup(self, key):
+        """
+        :return: [(fetch time, segment, offset, length), ...] of the entries of key in append order, found by a
+                 vectorized scan of the url hashes of the mapped index
+        """
+        import numpy
+        url_hash = numpy.uint64(_url_hash(key))
+        with self.lock:
+            size = self._map_index()
+            if size == 0:
+                return []
+            index = numpy.frombuffer(self.mapped, self.entry_type, size // _entry.size)
+            found = index[index["url_hash"] == url_hash]
+            # the copy above holds no reference to the mapping, it can be closed by the next remap
+            del index
+        return [(float(entry["timestamp"]), int(entry["segment"]), int(entry["offset"]), int(entry["length"]))
+                for entry in found]
+
+    def _read(self, segment, offset, length, key, content=True):
+        """
+        :return: the page of the record (True without content), None when the record holds another key with the
+                 same 64 bit hash
+        """
+        with open(self.segment_path(segment), "rb") as f:
+            f.seek(offset)
+            record = f.read(length if content else _record.size + len(key.encode()))
+        magic, timestamp, url_length, data_length = _record.unpack_from(record)
+        if magic != _magic:
+            raise ValueError(f"Corrupted page archive record in {self.segment_path(segment)} at {offset}")
+        start = _record.size + url_length
+        if record[_record.size:start] != key.encode():
+            return None
+        return self.decompress(record[start:start + data_length]) if content else True
+
+    def get(self, url, at=None):
+        """
+        :param url: the page url
+        :param at: a time.time() value, the last version fetched at or before it is returned, the latest by default
+        :return: the raw page, None if it was never archived (before at)
+        """
+        key = page_key(url)
+        for timestamp, segment, offset, length in sorted(self._lookup(key), reverse=True):
+            if at is not None and timestamp > at:
+                continue
+            content = self._read(segment, offset, length, key)
+            if content is not None:
+                return content
+        return None
+
+    def versions(self, url):
+        """
+        :return: the fetch times of the archived versions of the page, oldest first
+        """
+        key = page_key(url)
+        return sorted(timestamp for timestamp, segment, offset, length in self._lookup(key)
+                      if self._read(segment, offset, length, key, content=False))
+
+    def __len__(self):
+        return len(self.entries())
+
+    def iter_pages(self, since=None, until=None, match=None):
+        """
+        Read every archived page in append order, one segment file after the other.
+        :param since: keep the pages fetched at or after this time.time() value
+        :param until: keep the pages fetched before this time.time() value
+        :param match: keep the pages whose url key it returns True for, ex: lambda key: "/holdings?" in key,
+                      the other pages are skipped without being decompressed
+        :return: generator of (url key, fetch time, raw page)
+        """
+        for segment in self.segments():
+            with open(self.segment_path(segment), "rb") as f:
+                while True:
+                    header = f.read(_record.size)
+                    if len(header) < _record.size:
+                        break
+                    magic, timestamp, url_length, data_length = _record.unpack(header)
+                    if magic != _magic:
+                        raise ValueError(f"Corrupted page archive segment {self.segment_path(segment)}")
+                    key = f.read(url_length).decode()
+                    if (since is not None and timestamp < since) or (until is not None and timestamp >= until) or \
+                            (match is not None and not match(key)):
+                        f.seek(data_length, os.SEEK_CUR)
+                        continue
+                    data = f.read(data_length)
+                    if len(data) < data_length:
+                        break
+                    yield key, timestamp, self.decompress(data)
+
+    def rebuild_index(self):
+        """
+        Write index.bin again from the segment files, ex: after copying segments from another machine.
+        """
+        with self.lock:
+            self._rebuild_index()
+
+    def _rebuild_index(self):
+        with open(self.index_path + ".tmp", "wb") as index:
+            for segment in self.segments():
+                offset, size = 0, os.path.getsize(self.segment_path(segment))
+                with open(self.segment_path(segment), "rb") as f:
+                    while offset + _record.size <= size:
+                        magic, timestamp, url_length, data_length = _record.unpack(f.read(_record.size))
+                        length = _record.size + url_length + data_length
+                        # a record half written by a crash ends the segment
+                        if magic != _magic or offset + length > size:
+                            break
+                        key = f.read(url_length).decode()
+                        f.seek(data_length, os.SEEK_CUR)
+                        index.write(_entry.pack(_url_hash(key), segment, offset, length, timestamp))
+                        offset += length
+        os.replace(self.index_path + ".tmp", self.index_path)
+        # the open handles still point to the replaced file, the next entries would be lost
+        if self.index_file is not None:
+            self.index_file.close()
+            self.index_file = open(self.index_path, "ab")
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped, self.mapped_size = None, 0
+
+    def close(self):
+        with self.lock:
+            for f in (self.segment_file, self.index_file, self.mapped):
+                if f is not None:
+                    f.close()
+            self.segment_file, self.mapped = None, None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def url_pattern(scraper_class, **kwargs):
+    """
+    :return: a compiled regex matching the url keys of scraper_class pages, the ticker being its first group,
+             ex: StockStatisticsData matches "/quote/GLE.PA/key-statistics?p=GLE.PA" with "GLE.PA"
+    """
+    key = page_key(scraper_class("TICKER", **kwargs).url)
+    pattern = re.escape(key).replace("TICKER", "([^/?&%][^/?&]*)", 1).replace("TICKER", r"\1")
+    return re.compile(f"^{pattern}$")
+
+
+def _extract_archived(scraper_class, kwargs, extract_record, ticker, timestamp, page):
+    obj = scraper_class(ticker, **kwargs)
+    obj.load(page)
+    return ticker, timestamp, extract_record(obj)
+
+
+def backfill(archive, scraper_class, extract_record=None, since=None, until=None, processes=1, errors=None,
+             **kwargs):
+    """
+    Run the extraction of scraper_class again over the archived pages of its type, without any download, ex:
+        for ticker, fetched_at, record in backfill(archive, StockStatisticsData, since=start): ...
+    :param archive: a PageArchive
+    :param scraper_class: any scraper class taking the ticker as first argument
+    :param extract_record: picklable function turning a loaded object into the record, yf_pipeline.extract by
+                           default
+    :param since: see PageArchive.iter_pages
+    :param until: see PageArchive.iter_pages
+    :param processes: parse processes, the pages are read by this one
+    :param errors: list receiving (ticker, fetch time, exception) for the pages that failed, they are raised if
+                   None
+    :param kwargs: extra constructor arguments (ex: sheet="balance-sheet")
+    :return: generator of (ticker, fetch time, record) in archive order
+    """
+    if extract_record is None:
+        from yf_scraper_lib.yf_pipeline import extract as extract_record
+    pattern = url_pattern(scraper_class, **kwargs)
+    pages = ((pattern.match(key).group(1), timestamp, page)
+             for key, timestamp, page in archive.iter_pages(since, until, pattern.match))
+
+    def failed(ticker, timestamp, error):
+        if errors is None:
+            raise error
+        errors.append((ticker, timestamp, error))
+
+    if processes <= 1:
+        for ticker, timestamp, page in pages:
+            try:
+                yield _extract_archived(scraper_class, kwargs, extract_record, ticker, timestamp, page)
+            except Exception as error:
+                failed(ticker, timestamp, error)
+        return
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        # at most 2 pages per process are read ahead of the parsing
+        window = []
+        for ticker, timestamp, page in pages:
+            window.append((ticker, timestamp, executor.submit(_extract_archived, scraper_class, kwargs,
+                                                              extract_record, ticker, timestamp, page)))
+            if len(window) < 2 * processes:
+                continue
+            ticker, timestamp, future = window.pop(0)
+            try:
+                yield future.result()
+            except Exception as error:
+                failed(ticker, timestamp, error)
+        for ticker, timestamp, future in window:
+            try:
+                yield future.result()
+            except Exception as error:
+                failed(ticker, timestamp, error)
@@ -0,0 +1,170 @@
+# Support
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+# global variable
+default_ttls = {
+    "quote": 15,
+    "profile": 6 * 3600,
+    "key-statistics": 6 * 3600,
+    "holdings": 6 * 3600,
+    "performance": 6 * 3600,
+    "risk": 6 * 3600,
+    "financials": 12 * 3600,
+    "balance-sheet": 12 * 3600,
+    "cash-flow": 12 * 3600,
+}
+
+
+def page_type(url):
+    """
+    :param url: a Yahoo Finance page url, ex: https://finance.yahoo.com/quote/SPY/holdings?p=SPY
+    :return: the page type used to pick the TTL, "quote" for the summary page, ex: "holdings"
+    """
+    parts = [part for part in urlsplit(url).path.split("/") if part]
+    if len(parts) >= 3 and parts[0] == "quote":
+        return parts[2]
+    return "quote"
+
+
+class CacheEntry:
+
+    __slots__ = ("url", "content", "fetched_at", "etag", "last_modified")
+
+    def __init__(self, url, content, fetched_at, etag=None, last_modified=None):
+        self.url = url
+        self.content = content
+        self.fetched_at = fetched_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def validators(self):
+        """
+        :return: the conditional request headers to revalidate this entry
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, ttls=None):
+        """
+        On-disk HTTP page cache keyed by url, with a TTL per page type and a LRU size cap.
+        :param directory: where the pages are stored, created if missing
+        :param max_bytes: total size of the stored pages above which the least recently used ones are removed
+        :param ttls: dict page type -> seconds, merged over default_ttls. Unknown page types are never fresh.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = dict(default_ttls, **(ttls or {}))
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.sizes = {}
+        for name in os.listdir(directory):
+            if name.endswith(".html"):
+                self.sizes[name[:-5]] = os.path.getsize(os.path.join(directory, name))
+        self.total_bytes = sum(self.sizes.values())
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.directory, key)
+        return base + ".html", base + ".json"
+
+    def ttl(self, url):
+        return self.ttls.get(page_type(url), 0)
+
+    def lookup(self, url):
+        """
+        :param url: the page url
+        :return: the stored CacheEntry or None, reading it marks it as recently used
+        """
+        key = self.key(url)
+        body_path, meta_path = self._paths(key)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                content = f.read()
+            os.utime(body_path)
+        except (OSError, ValueError):
+            return None
+        if meta.get("url") != url:
+            return None
+        return CacheEntry(url, content, meta["fetched_at"], meta.get("etag"), meta.get("last_modified"))
+
+    def is_fresh(self, entry, now=None):
+        now = time.time() if now is None else now
+        return now - entry.fetched_at < self.ttl(entry.url)
+
+    def store(self, url, content, etag=None, last_modified=None, fetched_at=None):
+        """
+        Write the page and its validators, then evict the least recently used pages above max_bytes.
+        :return: the stored CacheEntry
+        """
+        entry = CacheEntry(url, content, time.time() if fetched_at is None else fetched_at, etag, last_modified)
+        key = self.key(url)
+        body_path, meta_path = self._paths(key)
+        self._write(body_path, content)
+        self._write(meta_path, json.dumps({"url": url, "fetched_at": entry.fetched_at, "etag": etag,
+                                           "last_modified": last_modified}).encode("utf-8"))
+        with self.lock:
+            self.total_bytes += len(content) - self.sizes.get(key, 0)
+            self.sizes[key] = len(content)
+        self.evict()
+        return entry
+
+    def touch(self, entry):
+        """
+        Mark an entry revalidated by a 304 answer as freshly fetched.
+        """
+        return self.store(entry.url, entry.content, entry.etag, entry.last_modified)
+
+    def evict(self):
+        with self.lock:
+            if self.total_bytes <= self.max_bytes:
+                return
+            by_use = []
+            for key in self.sizes:
+                try:
+                    by_use.append((os.path.getmtime(self._paths(key)[0]), key))
+                except OSError:
+                    by_use.append((0, key))
+            for _, key in sorted(by_use):
+                if self.total_bytes <= self.max_bytes:
+                    break
+                for path in self._paths(key):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self.total_bytes -= self.sizes.pop(key)
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.sizes):
+                for path in self._paths(key):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                del self.sizes[key]
+            self.total_bytes = 0
+
+    def _write(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
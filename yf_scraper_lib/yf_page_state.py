@@ -0,0 +1,53 @@
+# Support
+try:
+    from orjson import loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+# global variable
+_start = b"root.App.main = "
+_end = b"}(this));"
+
+
+def extract_state(page):
+    """
+    Find the page data Yahoo embeds as JSON in a script (root.App.main = {...};) and decode it, without building
+    any DOM.
+    :param page: the raw page (bytes or str)
+    :return: the QuoteSummaryStore dict (modules "price", "summaryDetail", "defaultKeyStatistics", ...),
+             None when the page has no such JSON or its stores are encrypted
+    """
+    if isinstance(page, str):
+        page = page.encode()
+    start = page.find(_start)
+    if start == -1:
+        return None
+    start += len(_start)
+    end = page.find(_end, start)
+    if end == -1:
+        return None
+    try:
+        main = _loads(page[start:end].rstrip().rstrip(b";"))
+        stores = main["context"]["dispatcher"]["stores"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    # since 2023 some pages ship the stores encrypted as a string
+    store = stores.get("QuoteSummaryStore") if isinstance(stores, dict) else None
+    return store if isinstance(store, dict) else None
+
+
+def state_value(state, module, key, raw=False):
+    """
+    :param state: what extract_state returned
+    :param module: ex: "summaryDetail"
+    :param key: ex: "navPrice"
+    :param raw: the number ({"raw": 1053.92, "fmt": "1,053.92"} -> 1053.92) instead of the text shown on the page
+    :return: the value, "N/A" when Yahoo reports it empty (null or {}), None when the state, the module or the key
+             is missing so that the caller falls back to the DOM
+    """
+    if state is None or not isinstance(state.get(module), dict) or key not in state[module]:
+        return None
+    value = state[module][key]
+    if isinstance(value, dict):
+        return value.get("raw" if raw else "fmt", None if raw else "N/A")
+    return "N/A" if value is None else value
@@ -0,0 +1,150 @@
+# Beautiful Soup 4
+from bs4 import BeautifulSoup, SoupStrainer
+
+# global variable
+parser_backends = ("html.parser", "lxml")
+parser_backend = "html.parser"
+
+
+def set_parser_backend(name):
+    """
+    Choose the HTML parser used by every scraper class that is not given one explicitly.
+    :param name: "html.parser" (pure Python, the default) or "lxml" (libxml2, needs lxml)
+    """
+    global parser_backend
+    if name not in parser_backends:
+        raise ValueError(f"Unknown parser backend {name!r}, expected one of {parser_backends}")
+    parser_backend = name
+
+
+def has_class(*names):
+    """
+    Class filter for SoupStrainer. While parsing, bs4 compares a plain class_="Fl(start)" with the whole raw
+    attribute, so it would miss class="Fl(start) W(20%)" that find_all("span", class_="Fl(start)") matches.
+    :param names: the css classes to look for
+    :return: a function matching the elements having one of the names among their classes
+    """
+    def match(value):
+        if value is None:
+            return False
+        return any(name in names for name in (value.split() if isinstance(value, str) else value))
+    return match
+
+
+class _AnyStrainer(SoupStrainer):
+
+    def __init__(self, strainers):
+        super().__init__()
+        self.strainers = strainers
+
+    # bs4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return any(strainer.allow_tag_creation(nsprefix, name, attrs) for strainer in self.strainers)
+
+    def allow_string_creation(self, string):
+        return any(strainer.allow_string_creation(string) for strainer in self.strainers)
+
+    # bs4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        for strainer in self.strainers:
+            found = strainer.search_tag(markup_name, markup_attrs)
+            if found:
+                return found
+        return None
+
+    def search(self, markup):
+        for strainer in self.strainers:
+            found = strainer.search(markup)
+            if found:
+                return found
+        return None
+
+
+def any_of(*strainers):
+    """
+    Parse only the tags matched by at least one of the strainers, a single SoupStrainer can only require all of
+    its rules, ex: any_of(SoupStrainer("div", attrs={"data-test": "fin-row"}), SoupStrainer("div", class_=...))
+    :param strainers: SoupStrainer instances
+    :return: a SoupStrainer to give as parse_only
+    """
+    return _AnyStrainer(strainers)
+
+
+def make_soup(content, parser=None, parse_only=None):
+    """
+    :param content: the raw page (bytes or str)
+    :param parser: one of parser_backends, the global parser_backend by default
+    :param parse_only: a SoupStrainer, only the matching tags and their descendants are built into the soup
+    :return: a BeautifulSoup document, the getters give the same results whatever the backend
+    """
+    parser = parser_backend if parser is None else parser
+    if parser not in parser_backends:
+        raise ValueError(f"Unknown parser backend {parser!r}, expected one of {parser_backends}")
+    return BeautifulSoup(content, parser, parse_only=parse_only)
+
+
+def leaf_table_cells(soup):
+    """
+    Walk the document once and keep the text of the innermost cells of the innermost tables.
+    This is what the getters used to rebuild on every call with
+    [t for t in soup.find_all('table') if not t.find_all('table')] and the same filter on 'td'.
+    :param soup: a BeautifulSoup document
+    :return: a list (one item per leaf table, in document order) of lists of cell texts
+    """
+    tables = []
+    for table in soup.find_all("table"):
+        if table.find("table") is None:
+            tables.append([td.text for td in table.find_all("td") if td.find("td") is None])
+    return tables
+
+
+def _holds(element, name, css_class):
+    # most matched elements only hold their text, the subtree search is kept for the others
+    if not any(child.name for child in element.contents):
+        return False
+    # class_=None would only match the elements without any class
+    if css_class is None:
+        return element.find(name) is not None
+    return element.find(name, class_=css_class) is not None
+
+
+def _parent_table(element):
+    # find_parent("table") builds a filter on every call, this is the hot path of leaf_texts
+    parent = element.parent
+    while parent is not None and parent.name != "table":
+        parent = parent.parent
+    return parent
+
+
+def leaf_texts(soup, name, classes, tables=False):
+    """
+    Walk the document once and keep, for every css class at once, what the getters used to rebuild with
+    [elem.text for elem in soup.find_all(name, attrs={"class": css_class}) if not elem.find_all(...)].
+    :param soup: a BeautifulSoup document
+    :param name: the tag name, ex: "span"
+    :param classes: the css classes, ex: ("Fl(start)", "Fl(end)")
+    :param tables: also gather leaf_table_cells(soup) under the "table" key during the same walk
+    :return: dict css class -> list of texts in document order
+    """
+    texts = {css_class: [] for css_class in classes}
+    cells, nested = {}, set()
+    for element in soup.descendants:
+        tag = element.name
+        if tag == name:
+            for css_class in set(element.get("class") or ()):
+                if css_class in texts and not _holds(element, name, css_class):
+                    texts[css_class].append(element.text)
+        if not tables:
+            continue
+        if tag == "table":
+            cells[id(element)] = []
+            parent = _parent_table(element)
+            if parent is not None:
+                nested.add(id(parent))
+        elif tag == "td" and not _holds(element, "td", None):
+            table = _parent_table(element)
+            if table is not None:
+                cells[id(table)].append(element.text)
+    if tables:
+        texts["table"] = [table for key, table in cells.items() if key not in nested]
+    return texts
@@ -0,0 +1,162 @@
+# Support
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from yf_scraper_lib.yf_crosses_scraper import CrossCurrencyData
+from yf_scraper_lib.yf_etf_scraper import ETFData, ETFHoldingsData, ETFPerformanceData, ETFRiskData
+from yf_scraper_lib import yf_parsing
+from yf_scraper_lib.yf_stocks_scraper import BenchmarkData, FinancialStatementsProfileData, StockStatisticsData, \
+    StocksProfileData
+
+# global variable
+# constructor arguments that only matter to the download, they are not sent to the parse processes
+_fetch_only = ("session", "driver")
+_done = object()
+
+
+def _risk_table(obj):
+    return {risk_type: obj.get_fund_risk_data_by_type(risk_type)[1:] for risk_type in obj.get_fund_risk_data_types()}
+
+
+# scraper class -> function turning a loaded object into a picklable record, run in the parse processes
+extractors = {
+    ETFData: ETFData.to_dict,
+    ETFHoldingsData: lambda obj: obj.holdings,
+    ETFPerformanceData: lambda obj: obj.performance,
+    ETFRiskData: _risk_table,
+    StocksProfileData: StocksProfileData.to_dict,
+    StockStatisticsData: lambda obj: obj.statistics,
+    FinancialStatementsProfileData: lambda obj: obj.statement,
+    BenchmarkData: BenchmarkData.to_dict,
+    CrossCurrencyData: CrossCurrencyData.to_dict,
+}
+
+
+def extract(obj):
+    """
+    :param obj: a loaded scraper object
+    :return: its record from extractors: to_dict() for the quote pages, the ETFHoldings / ETFPerformance record,
+             {risk type: [values]}, the statistics index or the (line items, periods, values) statement
+    """
+    return extractors[type(obj)](obj)
+
+
+def _parse(scraper_class, ticker, kwargs, page, extract_record):
+    obj = scraper_class(ticker, **kwargs)
+    obj.load(page)
+    return extract_record(obj)
+
+
+def iter_parsed(scraper_class, tickers, extract_record=extract, concurrency=32, processes=None, max_pending=None,
+                errors=None, mp_context=None, **kwargs):
+    """
+    Two stage pipeline: concurrency threads download the raw pages while a pool of processes parses them, so
+    that parsing uses every core instead of one. Only the raw page and the extracted record cross the process
+    boundary, never a soup.
+    At most max_pending pages wait for a process and at most max_pending are being parsed: the downloads pause
+    when the parsing falls behind and the parsing pauses when the caller stops consuming.
+    :param scraper_class: any scraper class taking the ticker as first argument (ETFData, StockStatisticsData, ...)
+    :param tickers: iterable of stock symbols
+    :param extract_record: picklable function (a module level one) turning a loaded object into the record,
+                           extract by default
+    :param concurrency: pages downloaded at the same time
+    :param processes: parse processes, os.cpu_count() by default
+    :param max_pending: bound of each stage queue, 2 * processes by default
+    :param errors: list receiving (ticker, exception) for the pages that failed, they are raised if None
+    :param mp_context: multiprocessing context of the pool (ex: multiprocessing.get_context("spawn"))
+    :param kwargs: extra constructor arguments (ex: sheet="balance-sheet", session=...), session and driver are
+                   only used by the download
+    :return: generator of (ticker, record) in the order the pages are parsed
+    """
+    processes = processes or os.cpu_count() or 1
+    max_pending = max_pending or 2 * processes
+    parse_kwargs = {key: value for key, value in kwargs.items() if key not in _fetch_only}
+    # a global set_parser_backend is not seen by spawned processes
+    if parse_kwargs.get("parser") is None:
+        parse_kwargs["parser"] = yf_parsing.parser_backend
+    tickers = iter(tickers)
+    tickers_lock = threading.Lock()
+    pages = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def download():
+        try:
+            while not stop.is_set():
+                with tickers_lock:
+                    ticker = next(tickers, _done)
+                if ticker is _done:
+                    return
+                try:
+                    put((ticker, scraper_class(ticker, **kwargs).fetch(), None))
+                except Exception as error:
+                    put((ticker, None, error))
+        finally:
+            put(_done)
+
+    def failed(ticker, error):
+        if errors is None:
+            raise error
+        errors.append((ticker, error))
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=mp_context) as executor:
+        # the processes are started before the download threads, a fork never copies a thread in the middle of a
+        # request
+        executor.submit(os.getpid).result()
+        threads = [threading.Thread(target=download, daemon=True, name=f"yf-download-{index}")
+                   for index in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        running, parsing = len(threads), {}
+        try:
+            while running or parsing:
+                # hand the downloaded pages to the processes, blocking on the queue only when nothing is parsed
+                while running and len(parsing) < max_pending:
+                    try:
+                        item = pages.get(block=not parsing)
+                    except queue.Empty:
+                        break
+                    if item is _done:
+                        running -= 1
+                        continue
+                    ticker, page, error = item
+                    if error is not None:
+                        failed(ticker, error)
+                        continue
+                    parsing[executor.submit(_parse, scraper_class, ticker, parse_kwargs, page,
+                                            extract_record)] = ticker
+                if not parsing:
+                    continue
+                done, _ = wait(parsing, timeout=0.05 if running else None, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ticker = parsing.pop(future)
+                    if future.exception() is not None:
+                        failed(ticker, future.exception())
+                    else:
+                        yield ticker, future.result()
+        finally:
+            stop.set()
+            for future in parsing:
+                future.cancel()
+            for thread in threads:
+                thread.join()
+
+
+def parse_many(scraper_class, tickers, extract_record=extract, concurrency=32, processes=None, max_pending=None,
+               errors=None, mp_context=None, **kwargs):
+    """
+    Blocking wrapper around iter_parsed, ex: parse_many(StockStatisticsData, tickers, processes=32)
+    :return: dict ticker -> record in the tickers order, the failed tickers are left out when errors is given
+    """
+    tickers = list(tickers)
+    records = dict(iter_parsed(scraper_class, tickers, extract_record, concurrency, processes, max_pending, errors,
+                               mp_context, **kwargs))
+    return {ticker: records[ticker] for ticker in tickers if ticker in records}
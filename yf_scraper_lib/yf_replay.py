@@ -0,0 +1,130 @@
+# Support
+import json
+import os
+import re
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+
+def page_key(url):
+    """
+    :param url: an absolute page url
+    :return: the host independent key a page is stored under, ex: "/quote/SPY?p=SPY"
+    """
+    parts = urlsplit(url)
+    return parts.path + ("?" + parts.query if parts.query else "")
+
+
+class PageStore:
+
+    def __init__(self, directory):
+        """
+        Raw pages saved as plain HTML files, with an index.json mapping the page key to its file name.
+        :param directory: where the pages are stored, created if missing
+        """
+        self.directory = directory
+        self.lock = threading.Lock()
+        self.index_path = os.path.join(directory, "index.json")
+        os.makedirs(directory, exist_ok=True)
+        self.index = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+
+    def get(self, url):
+        """
+        :return: the stored page as bytes, None if the url was never recorded
+        """
+        name = self.index.get(page_key(url))
+        if name is None:
+            return None
+        with open(os.path.join(self.directory, name), "rb") as f:
+            return f.read()
+
+    def put(self, url, content, name=None):
+        """
+        :param url: the page url
+        :param content: the raw page
+        :param name: the file name, derived from the url by default (ex: quote_SPY_holdings.html)
+        """
+        key = page_key(url)
+        with self.lock:
+            name = self.index.get(key) if name is None else name
+            if name is None:
+                name = re.sub(r"[^A-Za-z0-9.=-]+", "_", urlsplit(url).path).strip("_") + ".html"
+                while name in self.index.values():
+                    name = "_" + name
+            with open(os.path.join(self.directory, name), "wb") as f:
+                f.write(content)
+            self.index[key] = name
+            with open(self.index_path, "w") as f:
+                json.dump(self.index, f, indent=2, sort_keys=True)
+
+
+class ReplayAdapter(BaseAdapter):
+
+    def __init__(self, store):
+        """
+        Stand-in transport answering from a PageStore, 404 for the pages that were not recorded.
+        :param store: a PageStore
+        """
+        super().__init__()
+        self.store = store
+
+    def send(self, request, **kwargs):
+        content = self.store.get(request.url)
+        response = requests.Response()
+        response.request = request
+        response.url = request.url
+        response.status_code = 404 if content is None else 200
+        response.reason = "Not Found" if content is None else "OK"
+        response.headers = CaseInsensitiveDict({"Content-Type": "text/html; charset=utf-8"})
+        response.encoding = "utf-8"
+        response._content = b"" if content is None else content
+        return response
+
+    def close(self):
+        pass
+
+
+class RecordingAdapter(HTTPAdapter):
+
+    def __init__(self, store, **kwargs):
+        """
+        Real transport saving every successful page into a PageStore.
+        :param store: a PageStore
+        :param kwargs: HTTPAdapter arguments (pool_connections, pool_maxsize, ...)
+        """
+        super().__init__(**kwargs)
+        self.store = store
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code == 200:
+            self.store.put(request.url, response.content)
+        return response
+
+
+def replay_session(directory):
+    """
+    Offline session serving the pages recorded in directory, ex: configure_session(session=replay_session(path))
+    """
+    session = requests.Session()
+    adapter = ReplayAdapter(PageStore(directory))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def recording_session(directory, **kwargs):
+    """
+    Live session saving every page it downloads into directory, to be replayed later with replay_session.
+    """
+    session = requests.Session()
+    adapter = RecordingAdapter(PageStore(directory), **kwargs)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -1,32 +1,32 @@
-# Beautiful Soup 4
-from bs4 import BeautifulSoup
-
-# Selenium 4
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.support import expected_conditions
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import NoSuchElementException
-from selenium.common.exceptions import StaleElementReferenceException
-
 # Support
-from fake_useragent import UserAgent
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from bs4 import SoupStrainer
+from yf_scraper_lib.yf_driver_pool import DriverPool, ignored_exceptions as selenium_ignored_exceptions
+from yf_scraper_lib.yf_http_session import fetch_page
+from yf_scraper_lib.yf_page import user_agent_header
+from yf_scraper_lib.yf_parsing import make_soup
 
 # global variable
-user_agent = {"User-Agent": UserAgent().chrome}
 delay = 120
-ignored_exceptions = (NoSuchElementException, StaleElementReferenceException,)
 
 
 class ScreenerCreator:
 
-    def __init__(self, asset_type):
+    results_only = SoupStrainer("td", attrs={"aria-label": ["Symbol", "Name", "Market Cap"]})
+
+    def __init__(self, asset_type, headless=False):
+        """
+        :param asset_type: "Stock", "ETF" or "Mutual Fund"
+        :param headless: run the browser opened by the screen methods without a window
+        """
         self.asset_type = asset_type
+        self.headless = headless
+        self.screen_url = None
+        self.cookies = None
+        self.offset = 0
         if asset_type == "Stock":
             self.url = "https://finance.yahoo.com/screener/new"
         elif asset_type == "ETF":
@@ -36,18 +36,130 @@ class ScreenerCreator:
 
     def screener_builder(self, numbers=100, countries=("France", "United Kingdom"), rem_usa=True,
                          caps=("Small Cap", "Mid Cap", "Large Cap", "Mega Cap"),
-                         mng_star_ratings=("*", "**", "***", "****", "*****")):
-        options = Options()
-        # options.add_argument('--headless')
-        options.add_argument(f"--user-agent={user_agent}")
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        driver.get(self.url)
-        reject_all = WebDriverWait(driver, delay, ignored_exceptions=ignored_exceptions).until(
-            expected_conditions.presence_of_element_located(
-                (By.XPATH, '//button[@class="btn secondary reject-all"]')))
+                         mng_star_ratings=("*", "**", "***", "****", "*****"), http=False, driver=None):
+        """
+        :param numbers: number of results to scrape
+        :param http: use the browser only to create the screen and download the result pages over HTTP
+        :param driver: a DriverPool to borrow the browser from, see iter_results
+        :return: the list of (symbol, name, market cap) rows, see iter_results and iter_results_http
+        """
+        results = self.iter_results_http if http else self.iter_results
+        return list(results(numbers, countries=countries, rem_usa=rem_usa, caps=caps,
+                            mng_star_ratings=mng_star_ratings, driver=driver))
+
+    @contextmanager
+    def screen_page(self, driver=None):
+        """
+        Open the new screen page in a browser borrowed from driver, or in a browser of its own quit at the end.
+        :param driver: a yf_driver_pool.DriverPool (its handle_consent is run on the browser's first page), None to
+                       open a Chrome (headless if self.headless)
+        :return: the webdriver showing the page
+        """
+        pool = driver if driver is not None else DriverPool(size=1, headless=self.headless)
+        try:
+            with pool.page(self.url) as browser:
+                yield browser
+        finally:
+            if driver is None:
+                pool.close()
+
+    def iter_results(self, numbers=None, start=0, countries=("France", "United Kingdom"), rem_usa=True,
+                     caps=("Small Cap", "Mid Cap", "Large Cap", "Mega Cap"),
+                     mng_star_ratings=("*", "**", "***", "****", "*****"), driver=None):
+        """
+        Yield the screener rows page by page as they are scraped. Stop iterating (break, close()) at any time,
+        the browser is quit (or given back to driver). self.offset is the offset of the next row, give it as start
+        to resume a screen.
+        :param numbers: maximum number of rows, None for every row of the screen
+        :param start: offset of the first row
+        :param countries: (Stock) countries to add to the screen
+        :param rem_usa: (Stock) remove the default United States filter
+        :param caps: (Stock) market cap sizes, ex: ("Large Cap", "Mega Cap")
+        :param mng_star_ratings: (ETF, Mutual Fund) Morningstar ratings
+        :param driver: a DriverPool to borrow the browser from, see screen_page
+        :return: generator of (symbol, name, market cap) tuples
+        """
+        self.offset = start
+        with self.screen_page(driver) as browser:
+            self.set_filters(browser, countries, rem_usa, caps)
+            results_url = self.results_url(browser)
+            count = 0
+            while numbers is None or count < numbers:
+                browser.get(self.page_url(results_url, self.offset))
+                time.sleep(0.05)
+                rows = self.parse_results(browser.page_source)
+                if not rows:
+                    return
+                for row in rows[:None if numbers is None else numbers - count]:
+                    self.offset += 1
+                    count += 1
+                    try:
+                        yield row
+                    except GeneratorExit:
+                        # stopped by the caller, the browser is fine and goes back to the pool
+                        return
+
+    def create_screen(self, countries=("France", "United Kingdom"), rem_usa=True,
+                      caps=("Small Cap", "Mid Cap", "Large Cap", "Mega Cap"),
+                      mng_star_ratings=("*", "**", "***", "****", "*****"), driver=None):
+        """
+        Build the screen in a browser, keep its results url and cookies in self.screen_url and self.cookies,
+        then quit the browser (or give it back to driver).
+        :param driver: a DriverPool to borrow the browser from, see screen_page
+        :return: the results url of the screen
+        """
+        with self.screen_page(driver) as browser:
+            self.set_filters(browser, countries, rem_usa, caps)
+            self.screen_url = self.results_url(browser)
+            self.cookies = "; ".join(f"{cookie['name']}={cookie['value']}" for cookie in browser.get_cookies())
+        return self.screen_url
+
+    def iter_results_http(self, numbers=None, start=0, page_size=100, concurrency=4, session=None, driver=None,
+                          **filters):
+        """
+        Same rows as iter_results, but the browser is only used once to create the screen (skipped when
+        self.screen_url is already set), the result pages are downloaded over the pooled HTTP session,
+        concurrency pages at a time, and only their result cells are parsed.
+        :param numbers: maximum number of rows, None for every row of the screen
+        :param start: offset of the first row, self.offset is the offset of the next row to resume from
+        :param page_size: rows per result page
+        :param concurrency: result pages downloaded at the same time
+        :param session: optional requests.Session, the shared pooled session by default
+        :param driver: a DriverPool to borrow the browser creating the screen from, see screen_page
+        :param filters: create_screen arguments (countries, rem_usa, caps, mng_star_ratings)
+        :return: generator of (symbol, name, market cap) tuples
+        """
+        if self.screen_url is None:
+            self.create_screen(driver=driver, **filters)
+        headers = dict(user_agent_header(), Cookie=self.cookies) if self.cookies else user_agent_header()
+        self.offset = start
+        count = 0
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while numbers is None or count < numbers:
+                offsets = [self.offset + page * page_size for page in range(concurrency)]
+                if numbers is not None:
+                    offsets = [offset for offset in offsets if offset < start + numbers] or offsets[:1]
+                pages = executor.map(lambda offset: fetch_page(self.page_url(self.screen_url, offset, page_size),
+                                                               headers=headers, session=session), offsets)
+                for page in pages:
+                    rows = self.parse_results(page)
+                    for row in rows[:None if numbers is None else numbers - count]:
+                        self.offset += 1
+                        count += 1
+                        yield row
+                    if len(rows) < page_size or (numbers is not None and count >= numbers):
+                        return
+
+    def set_filters(self, driver, countries, rem_usa, caps):
+        """
+        Fill the screener criteria in the opened page and run the screen.
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.action_chains import ActionChains
+        from selenium.webdriver.support import expected_conditions
+        from selenium.webdriver.support.ui import WebDriverWait
+        ignored_exceptions = selenium_ignored_exceptions()
         action = ActionChains(driver)
-        action.click(on_element=reject_all)
-        action.perform()
         # Set the Research Parameters
         if self.asset_type == "Stock":
             # Areas selection
@@ -110,31 +222,42 @@ class ScreenerCreator:
             action.click(on_element=find_assets)
             action.perform()
 
-        data_res, switch, num = [], True, 0
-        while len(data_res) < numbers:
-            if switch:
-                next_page = WebDriverWait(driver, delay, ignored_exceptions=ignored_exceptions).until(
-                    expected_conditions.presence_of_element_located(
-                        (By.XPATH, '//*[@id="scr-res-table"]/div[2]/button[3]')))
-                action.click(on_element=next_page)
-                action.perform()
-                switch = False
-            else:
-                driver.get(driver.current_url[:-2] + str(num))
-                time.sleep(0.05)
-                soup = BeautifulSoup(driver.page_source, 'html.parser')
-                symbols = [elem.text for elem in soup.find_all("td", attrs={"aria-label": "Symbol"})]
-                names = [elem.text for elem in soup.find_all("td", attrs={"aria-label": "Name"})]
-                market_cap = [elem.text for elem in soup.find_all("td", attrs={"aria-label": "Market Cap"})]
-                data_res += list(zip(symbols, names, market_cap))
-                num += 25
-                print(data_res)
-                print(len(data_res))
-        return data_res
+    @staticmethod
+    def results_url(driver):
+        """
+        Go to the second result page once to get the url of the screen results with its offset parameter.
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.action_chains import ActionChains
+        from selenium.webdriver.support import expected_conditions
+        from selenium.webdriver.support.ui import WebDriverWait
+        ignored_exceptions = selenium_ignored_exceptions()
+        next_page = WebDriverWait(driver, delay, ignored_exceptions=ignored_exceptions).until(
+            expected_conditions.presence_of_element_located(
+                (By.XPATH, '//*[@id="scr-res-table"]/div[2]/button[3]')))
+        action = ActionChains(driver)
+        action.click(on_element=next_page)
+        action.perform()
+        return driver.current_url
+
+    @staticmethod
+    def page_url(results_url, offset, count=25):
+        """
+        :return: the results_url showing count rows from offset
+        """
+        parts = urlsplit(results_url)
+        query = dict(parse_qsl(parts.query), offset=str(offset), count=str(count))
+        return urlunsplit(parts._replace(query=urlencode(query)))
 
+    @staticmethod
+    def parse_results(source):
+        """
+        :param source: the html of a result page
+        :return: the list of (symbol, name, market cap) rows of the page
+        """
+        soup = make_soup(source, parse_only=ScreenerCreator.results_only)
+        symbols = [elem.text for elem in soup.find_all("td", attrs={"aria-label": "Symbol"})]
+        names = [elem.text for elem in soup.find_all("td", attrs={"aria-label": "Name"})]
+        market_cap = [elem.text for elem in soup.find_all("td", attrs={"aria-label": "Market Cap"})]
+        return list(zip(symbols, names, market_cap))
 
-meta = ScreenerCreator("Stock")
-res = meta.screener_builder(150, countries=("France", "United Kingdom"), caps=("Large Cap", "Mega Cap"),
-                            rem_usa=True)
-print(res)
-print(len(res))
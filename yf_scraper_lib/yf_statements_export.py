@@ -0,0 +1,105 @@
+# Support
+# pyarrow is imported by the functions building the tables, not on module import
+from yf_scraper_lib.yf_batch_fetch import prefetch
+from yf_scraper_lib.yf_stocks_scraper import FinancialStatementsProfileData
+
+# global variable
+sheets = ("financials", "balance-sheet", "cash-flow")
+
+
+def statement_schema():
+    """
+    :return: the pyarrow schema of the long format tables: one row per (ticker, sheet, line item, period)
+    """
+    import pyarrow as pa
+    return pa.schema([("ticker", pa.string()), ("sheet", pa.string()), ("line_item", pa.string()),
+                      ("period", pa.string()), ("value", pa.float64())])
+
+
+def statement_batch(statements):
+    """
+    :param statements: loaded FinancialStatementsProfileData objects
+    :return: a pyarrow RecordBatch holding all their values in long format, the "-" cells are null
+    """
+    import numpy as np
+    import pyarrow as pa
+    tickers, sheet_names, items, periods, values = [], [], [], [], []
+    for statement in statements:
+        line_items, labels, matrix = statement.statement
+        count = matrix.size
+        tickers.append(np.full(count, statement.ticker, dtype=object))
+        sheet_names.append(np.full(count, statement.sheet, dtype=object))
+        items.append(np.repeat(np.array(line_items, dtype=object), len(labels)))
+        periods.append(np.tile(np.array(labels, dtype=object), len(line_items)))
+        values.append(matrix.ravel())
+    columns = [np.concatenate(column) if column else np.empty(0, dtype=object)
+               for column in (tickers, sheet_names, items, periods)]
+    value = np.concatenate(values) if values else np.empty(0)
+    return pa.RecordBatch.from_arrays([pa.array(column, pa.string()) for column in columns] +
+                                      [pa.array(value, pa.float64(), from_pandas=True)], schema=statement_schema())
+
+
+def iter_statement_batches(tickers, sheets=sheets, batch_size=100, concurrency=32, errors=None, **kwargs):
+    """
+    Download the statements batch_size tickers at a time and yield one RecordBatch per group, so that memory
+    depends on batch_size and not on the number of tickers.
+    :param tickers: iterable of stock symbols
+    :param sheets: the sheets to export among "financials", "balance-sheet" and "cash-flow"
+    :param batch_size: tickers downloaded and converted together
+    :param concurrency: pages downloaded and parsed at the same time
+    :param errors: list receiving (ticker, sheet, exception) for the pages that failed or hold no statement
+                   (ValueError), they are raised if None
+    :param kwargs: extra FinancialStatementsProfileData arguments (session, parser, driver)
+    :return: generator of pyarrow RecordBatch following statement_schema()
+    """
+    tickers = iter(tickers)
+    while True:
+        group = [ticker for _, ticker in zip(range(batch_size), tickers)]
+        if not group:
+            return
+        objs = prefetch([FinancialStatementsProfileData(ticker, sheet, **kwargs) for ticker in group
+                         for sheet in sheets], concurrency=concurrency, return_exceptions=errors is not None)
+        statements = []
+        for index, obj in enumerate(objs):
+            try:
+                if isinstance(obj, Exception):
+                    raise obj
+                if not obj.statement[0]:
+                    # a 404 or a page without the sheet, the ticker would otherwise be missing silently
+                    raise ValueError(f"No {obj.sheet} statement found for {obj.ticker} at {obj.url}")
+                statements.append(obj)
+            except Exception as error:
+                if errors is None:
+                    raise
+                errors.append((group[index // len(sheets)], sheets[index % len(sheets)], error))
+        yield statement_batch(statements)
+
+
+def statements_table(tickers, sheets=sheets, batch_size=100, concurrency=32, errors=None, **kwargs):
+    """
+    :return: the statements of every ticker as one long format pyarrow Table, see iter_statement_batches
+    """
+    import pyarrow as pa
+    return pa.Table.from_batches(iter_statement_batches(tickers, sheets, batch_size, concurrency, errors, **kwargs),
+                                 schema=statement_schema())
+
+
+def write_statements_parquet(tickers, directory, sheets=sheets, batch_size=100, concurrency=32, errors=None,
+                             partitioning=("sheet",), max_rows_per_group=64 * 1024, **kwargs):
+    """
+    Stream the statements of every ticker into a Parquet dataset, ex:
+        write_statements_parquet(tickers, "statements")  ->  statements/sheet=financials/part-0.parquet, ...
+    Each downloaded group of tickers is written as it comes, nothing is kept in memory across groups.
+    Read it back with pyarrow.dataset.dataset(directory, partitioning="hive") or pandas.read_parquet(directory).
+    :param directory: the dataset root, created if missing, the files of earlier runs in the partitions written
+                      are deleted
+    :param partitioning: columns laid out as hive directories (key=value), () for flat files
+    :param max_rows_per_group: Parquet row group size, at most that many rows per partition are buffered
+    :param tickers, sheets, batch_size, concurrency, errors, kwargs: see iter_statement_batches
+    """
+    import pyarrow.dataset as ds
+    ds.write_dataset(iter_statement_batches(tickers, sheets, batch_size, concurrency, errors, **kwargs), directory,
+                     schema=statement_schema(), format="parquet", partitioning=list(partitioning) or None,
+                     partitioning_flavor="hive" if partitioning else None, max_rows_per_group=max_rows_per_group,
+                     min_rows_per_group=max_rows_per_group,
+                     existing_data_behavior="delete_matching")
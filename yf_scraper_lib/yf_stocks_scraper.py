@@ -1,66 +1,166 @@
 # Beautiful Soup 4
-from bs4 import BeautifulSoup
-
-# Selenium 4
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.webdriver.support import expected_conditions
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.common.exceptions import NoSuchElementException
-from selenium.common.exceptions import StaleElementReferenceException
+from bs4 import SoupStrainer
 
 # Support
-from fake_useragent import UserAgent
-import requests
+import time
+from functools import cached_property
+from yf_scraper_lib.yf_batch_fetch import prefetch
+from yf_scraper_lib.yf_http_session import base_url
+from yf_scraper_lib.yf_normalize import split_label, to_numbers, to_typed
+from yf_scraper_lib.yf_driver_pool import get_driver_pool
+from yf_scraper_lib.yf_page import YahooPage
+from yf_scraper_lib.yf_page_state import state_value
+from yf_scraper_lib.yf_parsing import any_of, has_class
+
+
+def state_date(raw):
+    """
+    :param raw: epoch seconds of the embedded JSON, its fmt is "2023-05-29"
+    :return: the date as the page shows it, ex: "May 29, 2023"
+    """
+    return time.strftime("%b %d, %Y", time.gmtime(raw))
+
+
+def state_percent(raw):
+    """
+    :param raw: a ratio the embedded JSON formats without "%", ex: 195.87
+    :return: the ratio as the page shows it, ex: "195.87%"
+    """
+    return f"{raw:,.2f}%"
+
 
 # global variable
-user_agent = {"User-Agent": UserAgent().chrome}
 delay = 120
-ignored_exceptions = (NoSuchElementException, StaleElementReferenceException,)
+# positional period names of get_accounting_data, the balance-sheet has no TTM column
+statement_periods = ["TTM", "year_1", "year_2", "year_3", "year_4"]
+# key-statistics page: section -> label -> (module, key) of the embedded JSON holding the value, and the function
+# building the page text from its raw value when the JSON fmt differs from the page
+statistics_fields = {
+    "Valuation Measures": {
+        "Market Cap (intraday)": ("summaryDetail", "marketCap"),
+        "Enterprise Value": ("defaultKeyStatistics", "enterpriseValue"),
+        "Trailing P/E": ("summaryDetail", "trailingPE"),
+        "Forward P/E": ("summaryDetail", "forwardPE"),
+        "PEG Ratio (5 yr expected)": ("defaultKeyStatistics", "pegRatio"),
+        "Price/Sales (ttm)": ("summaryDetail", "priceToSalesTrailing12Months"),
+        "Price/Book (mrq)": ("defaultKeyStatistics", "priceToBook"),
+        "Enterprise Value/Revenue": ("defaultKeyStatistics", "enterpriseToRevenue"),
+        "Enterprise Value/EBITDA": ("defaultKeyStatistics", "enterpriseToEbitda")},
+    "Fiscal Year": {
+        "Fiscal Year Ends": ("defaultKeyStatistics", "lastFiscalYearEnd", state_date),
+        "Most Recent Quarter (mrq)": ("defaultKeyStatistics", "mostRecentQuarter", state_date)},
+    "Profitability": {
+        "Profit Margin": ("financialData", "profitMargins"),
+        "Operating Margin (ttm)": ("financialData", "operatingMargins")},
+    "Management Effectiveness": {
+        "Return on Assets (ttm)": ("financialData", "returnOnAssets"),
+        "Return on Equity (ttm)": ("financialData", "returnOnEquity")},
+    "Income Statement": {
+        "Revenue (ttm)": ("financialData", "totalRevenue"),
+        "Revenue Per Share (ttm)": ("financialData", "revenuePerShare"),
+        "Quarterly Revenue Growth (yoy)": ("financialData", "revenueGrowth"),
+        "Gross Profit (ttm)": ("financialData", "grossProfits"),
+        "EBITDA": ("financialData", "ebitda"),
+        "Net Income Avi to Common (ttm)": ("defaultKeyStatistics", "netIncomeToCommon"),
+        "Diluted EPS (ttm)": ("defaultKeyStatistics", "trailingEps"),
+        "Quarterly Earnings Growth (yoy)": ("defaultKeyStatistics", "earningsQuarterlyGrowth")},
+    "Balance Sheet": {
+        "Total Cash (mrq)": ("financialData", "totalCash"),
+        "Total Cash Per Share (mrq)": ("financialData", "totalCashPerShare"),
+        "Total Debt (mrq)": ("financialData", "totalDebt"),
+        "Total Debt/Equity (mrq)": ("financialData", "debtToEquity", state_percent),
+        "Current Ratio (mrq)": ("financialData", "currentRatio"),
+        "Book Value Per Share (mrq)": ("defaultKeyStatistics", "bookValue")},
+    "Cash Flow Statement": {
+        "Operating Cash Flow (ttm)": ("financialData", "operatingCashflow"),
+        "Levered Free Cash Flow (ttm)": ("financialData", "freeCashflow")},
+    "Stock Price History": {
+        "Beta (5Y Monthly)": ("defaultKeyStatistics", "beta"),
+        "52-Week Change": ("defaultKeyStatistics", "52WeekChange"),
+        "S&P500 52-Week Change": ("defaultKeyStatistics", "SandP52WeekChange"),
+        "52 Week High": ("summaryDetail", "fiftyTwoWeekHigh"),
+        "52 Week Low": ("summaryDetail", "fiftyTwoWeekLow"),
+        "50-Day Moving Average": ("summaryDetail", "fiftyDayAverage"),
+        "200-Day Moving Average": ("summaryDetail", "twoHundredDayAverage")},
+    "Share Statistics": {
+        "Avg Vol (3 month)": ("summaryDetail", "averageVolume"),
+        "Avg Vol (10 day)": ("summaryDetail", "averageVolume10days"),
+        "Shares Outstanding": ("defaultKeyStatistics", "sharesOutstanding"),
+        "Implied Shares Outstanding": ("defaultKeyStatistics", "impliedSharesOutstanding"),
+        "Float": ("defaultKeyStatistics", "floatShares"),
+        "% Held by Insiders": ("defaultKeyStatistics", "heldPercentInsiders"),
+        "% Held by Institutions": ("defaultKeyStatistics", "heldPercentInstitutions"),
+        "Shares Short": ("defaultKeyStatistics", "sharesShort"),
+        "Short Ratio": ("defaultKeyStatistics", "shortRatio"),
+        "Short % of Float": ("defaultKeyStatistics", "shortPercentOfFloat"),
+        "Short % of Shares Outstanding": ("defaultKeyStatistics", "sharesPercentSharesOut")},
+    "Dividends & Splits": {
+        "Forward Annual Dividend Rate": ("summaryDetail", "dividendRate"),
+        "Forward Annual Dividend Yield": ("summaryDetail", "dividendYield"),
+        "Trailing Annual Dividend Rate": ("summaryDetail", "trailingAnnualDividendRate"),
+        "Trailing Annual Dividend Yield": ("summaryDetail", "trailingAnnualDividendYield"),
+        "5 Year Average Dividend Yield": ("summaryDetail", "fiveYearAvgDividendYield"),
+        "Payout Ratio": ("summaryDetail", "payoutRatio"),
+        "Dividend Date": ("calendarEvents", "dividendDate", state_date),
+        "Ex-Dividend Date": ("summaryDetail", "exDividendDate", state_date),
+        "Last Split Factor": ("defaultKeyStatistics", "lastSplitFactor"),
+        "Last Split Date": ("defaultKeyStatistics", "lastSplitDate", state_date)},
+}
+
 
+class FinancialStatementsProfileData(YahooPage):
 
-class FinancialStatementsProfileData:
+    # the period header and the rows
+    parse_only = any_of(SoupStrainer("div", attrs={"data-test": ["fin-row", "fin-col"]}),
+                        SoupStrainer("div", class_=has_class("D(tbhg)")))
 
-    def __init__(self, ticker, sheet, driver=False):
+    def __init__(self, ticker, sheet, driver=False, session=None, parser=None):
         """
         :param ticker: the stock symbol as a string value
         :param sheet: Just three possible string values: "balance-sheet", "financials" (income statement), "cash-flow",
                                                          "profile"
+        :param driver: expand the hidden rows with a headless Chrome instead of a plain HTTP fetch, True to use
+                       the shared yf_driver_pool or a DriverPool instance
+        :param session: optional requests.Session, the shared pooled session is used by default
+        :param parser: HTML parser backend (see yf_parsing.parser_backends), the global one by default
         """
+        super().__init__(session, parser)
         self.ticker = ticker
         self.sheet = sheet
         self.driver = driver
         if sheet == "income-statement":
             self.sheet = "financials"
-        self.url = "https://finance.yahoo.com/quote/{}/{}?p={}".format(ticker, self.sheet, ticker)
-        if not driver:
-            self.soup = BeautifulSoup(requests.get(self.url, headers=user_agent).content, 'html.parser')
-        else:
-            self.soup = BeautifulSoup(self.display_hidden_values(self.url), 'html.parser')
+        self.url = "{}/quote/{}/{}?p={}".format(base_url(), ticker, self.sheet, ticker)
+
+    def fetch(self):
+        if self.driver:
+            return self.display_hidden_values(self.url, None if self.driver is True else self.driver)
+        return super().fetch()
+
+    def document_key(self):
+        # the driver renders the hidden rows, its page is not the one of the plain HTTP fetch
+        return super().document_key() + (bool(self.driver),)
 
     @staticmethod
-    def display_hidden_values(url_driver):
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument(f"--user-agent={user_agent}")
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-        driver.get(url_driver)
-        reject_all = WebDriverWait(driver, delay).until(expected_conditions.presence_of_element_located(
-            (By.XPATH, '//button[@class="btn secondary reject-all"]')))
-        action = ActionChains(driver)
-        action.click(on_element=reject_all)
-        action.perform()
-        expand_button = WebDriverWait(driver, delay).until(expected_conditions.presence_of_element_located(
-            (By.XPATH, '//*[@id="Col1-1-Financials-Proxy"]/section/div[2]/button')))
-        action.click(on_element=expand_button)
-        action.perform()
-        source = driver.page_source
-        driver.close()
-        return source
+    def display_hidden_values(url_driver, pool=None):
+        """
+        Open the sheet in a browser of the driver pool and expand every row.
+        :param url_driver: the sheet url
+        :param pool: a yf_driver_pool.DriverPool, the shared one by default
+        :return: the page source with the hidden rows displayed
+        """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.common.action_chains import ActionChains
+        from selenium.webdriver.support import expected_conditions
+        from selenium.webdriver.support.ui import WebDriverWait
+        pool = get_driver_pool() if pool is None else pool
+        with pool.page(url_driver) as driver:
+            expand_button = WebDriverWait(driver, delay).until(expected_conditions.presence_of_element_located(
+                (By.XPATH, '//*[@id="Col1-1-Financials-Proxy"]/section/div[2]/button')))
+            action = ActionChains(driver)
+            action.click(on_element=expand_button)
+            action.perform()
+            return driver.page_source
 
     @staticmethod
     def data_parsing(to_parse):
@@ -70,37 +170,87 @@ class FinancialStatementsProfileData:
         :param to_parse: data to parse from the front code
         :return: The parsed data as a list
         """
-        # Global Treatment
         global_parsing = []
         for elem in to_parse.split(","):
             if len(elem) > 3 and any(char.isdigit() for char in elem):
-                char, index = "", 0
-                while elem[index].isalpha() or elem[index] == " ":
-                    char += elem[index]
-                    index += 1
-                if index != 0:
-                    global_parsing.append(char)
-                    global_parsing.append("/")
-                    global_parsing.append(elem[index:])
-                else:
-                    global_parsing.append(elem[:3])
-                    global_parsing.append("/")
-                    global_parsing.append(elem[3:])
+                # "Total Revenue26090000" -> "Total Revenue", "/", "26090000", a value without label is cut after
+                # its first 3 characters
+                label, rest = split_label(elem)
+                if not label:
+                    label, rest = elem[:3], elem[3:]
+                global_parsing.extend((label, "/", rest))
             else:
                 global_parsing.append(elem)
 
         return global_parsing
 
+    @cached_property
+    def statement(self):
+        """
+        Read the whole sheet in one pass.
+        :return: (line items, period labels, values), values is a float64 NumPy matrix line items x periods
+                 with NaN where Yahoo shows "-"
+        """
+        header = self.soup.find("div", class_="D(tbhg)")
+        row = header.find("div", class_="D(tbr)") if header is not None else None
+        # one label per header cell, after the "Breakdown" one, whatever the spans nested in it
+        periods = [cell.text for cell in row.find_all("div", recursive=False)][1:] if row is not None else []
+        # one walk over the rows, find_all per row costs a full traversal each: the label div (title="Total
+        # Revenue") opens a line item, the fin-col cells that follow it are its values
+        items, cells = [], []
+        for element in self.soup.descendants:
+            if element.name == "div":
+                if element.attrs.get("data-test") == "fin-col":
+                    cells.append(element.text)
+                elif "title" in element.attrs:
+                    items.append(element.attrs["title"])
+        columns = len(cells) // len(items) if items else 0
+        if columns * len(items) != len(cells):
+            raise ValueError(f"{len(cells)} cells for {len(items)} line items in the {self.sheet} of {self.ticker}")
+        if len(periods) != columns:
+            # no header or one that does not match the rows: positional names, the oldest year is the last column
+            if columns <= len(statement_periods):
+                periods = statement_periods[len(statement_periods) - columns:]
+            else:
+                periods = ["TTM"] + [f"year_{year}" for year in range(1, columns)]
+        values = to_numbers(cells).reshape(len(items), columns)
+        return items, periods, values
+
+    @cached_property
+    def line_items(self):
+        """
+        :return: dict line item -> row of the statement matrix
+        """
+        items = self.statement[0]
+        return {item: index for index, item in reversed(list(enumerate(items)))}
+
     def get_data_types(self):
         """
         This method allows you to have a visibility of the data you can retrieve from the company's sheet selected.
         It refers to the "Breakdown" columns
         :return: The list of all data types you can retrieve. You will be able to loop over.
         """
-        types = []
-        for elem in self.soup.find_all("div", attrs={"data-test": "fin-row"}):
-            types.append(self.data_parsing(elem.text.strip())[0])
-        return types
+        return list(self.statement[0])
+
+    def get_periods(self):
+        """
+        :return: the period labels of the sheet columns as shown by Yahoo, ex: ["TTM", "12/30/2022", ...]
+        """
+        return list(self.statement[1])
+
+    def get_matrix(self):
+        """
+        :return: the float64 NumPy matrix line items (get_data_types order) x periods (get_periods order)
+        """
+        return self.statement[2]
+
+    def to_dataframe(self):
+        """
+        :return: the whole sheet as a pandas DataFrame indexed by line item with one column per period
+        """
+        import pandas as pd
+        items, periods, values = self.statement
+        return pd.DataFrame(values, index=pd.Index(items, name="Breakdown"), columns=periods)
 
     def get_accounting_data(self, type_of_information, periods):
         """
@@ -115,138 +265,235 @@ class FinancialStatementsProfileData:
                              It refers to the "Breakdown" column (ex: "Total Revenue")
         :return: Return the revenue from the specific "period" as an integer
         """
-        periods_ = ["TTM", "year_1", "year_2", "year_3", "year_4"]
-        data_types = self.get_data_types()
-        aimed_index, res = data_types.index(type_of_information), []
-        sheet_idx = 4 if self.sheet == "balance-sheet" else 5
-        for index, elem in enumerate(self.soup.find_all("div", attrs={"data-test": "fin-col"})):
-            elem = elem.text
-            if aimed_index * sheet_idx <= index < aimed_index * sheet_idx + sheet_idx:
-                if elem[0]:
-                    res.append(float(elem.replace(",", "")))
-                else:
-                    res.append(float(elem))
-        data_res = []
-        if self.sheet in ["financials", "cash-flow"]:
-            for period in periods:
-                data_res.append(res[periods_.index(period)])
-            return data_res
-        elif self.sheet == "balance-sheet" and "TTM" in periods:
-            return "No TTM info for the balance-sheet"
-        for period in periods:
-            data_res.append(res[periods_.index(period) - 1])
-        return data_res
+        row = self.get_matrix()[self.line_items[type_of_information]]
+        if self.sheet == "balance-sheet":
+            if "TTM" in periods:
+                return "No TTM info for the balance-sheet"
+            return [float(row[statement_periods.index(period) - 1]) for period in periods]
+        return [float(row[statement_periods.index(period)]) for period in periods]
 
 
-class StocksProfileData:
+class StocksProfileData(YahooPage):
 
-    def __init__(self, ticker):
+    parse_only = SoupStrainer(["fin-streamer", "div"], attrs={"data-test": ["qsp-price", "qsp-profile"]})
+    embedded_state = True
+
+    def __init__(self, ticker, session=None, parser=None):
         """
         :param ticker: the stock symbol as a string value
         :param sheet: Just three possible string values: "balance-sheet", "financials" (income statement), "cash-flow",
                                                          "profile"
+        :param session: optional requests.Session, the shared pooled session is used by default
+        :param parser: HTML parser backend (see yf_parsing.parser_backends), the global one by default
         """
+        super().__init__(session, parser)
         self.ticker = ticker
-        self.url = "https://finance.yahoo.com/quote/{}/profile?p={}".format(ticker, ticker)
-        self.soup = BeautifulSoup(requests.get(self.url, headers=user_agent).content, 'html.parser')
+        self.url = "{}/quote/{}/profile?p={}".format(base_url(), ticker, ticker)
 
     def get_current_price(self):
+        price = state_value(self.state, "price", "regularMarketPrice", raw=True)
+        if price is not None:
+            return float(price)
         return float([price.text for price in self.soup.find_all("fin-streamer", attrs={"data-test": "qsp-price"})
                       if not price.find_all("fin-streamer", attrs={"data-test": "qsp-price"})][0].replace(",", ""))
 
     def get_stock_sector(self):
+        sector = state_value(self.state, "assetProfile", "sector")
+        if sector is not None:
+            return sector
         return [price.text for price in self.soup.find_all("div", attrs={"data-test": "qsp-profile"})
                 if not price.find_all("div", attrs={"data-test": "qsp-profile"})][0].split("\xa0")[1].split(
             "Industry:")[0]
 
     def get_stock_industry(self):
+        industry = state_value(self.state, "assetProfile", "industry")
+        if industry is not None:
+            return industry
         return [price.text for price in self.soup.find_all("div", attrs={"data-test": "qsp-profile"})
                 if not price.find_all("div", attrs={"data-test": "qsp-profile"})][0].split("\xa0")[2].split(
             "Full Time Employees:")[0]
 
+    def to_dict(self):
+        """
+        :return: every profile field in one call
+        """
+        return {"current_price": self.get_current_price(), "sector": self.get_stock_sector(),
+                "industry": self.get_stock_industry()}
+
 
-class StockStatisticsData:
+class StockStatisticsData(YahooPage):
 
-    def __init__(self, ticker):
+    parse_only = SoupStrainer(["h2", "h3", "table"])
+    embedded_state = True
+
+    def __init__(self, ticker, session=None, parser=None):
         """
         :param ticker: the stock symbol as a string value
+        :param session: optional requests.Session, the shared pooled session is used by default
+        :param parser: HTML parser backend (see yf_parsing.parser_backends), the global one by default
         """
+        super().__init__(session, parser)
         self.ticker = ticker
-        self.url = "https://finance.yahoo.com/quote/{}/key-statistics?p={}".format(ticker, ticker)
-        self.soup = BeautifulSoup(requests.get(self.url, headers=user_agent).content, 'html.parser')
+        self.url = "{}/quote/{}/key-statistics?p={}".format(base_url(), ticker, ticker)
+
+    @cached_property
+    def dom_statistics(self):
+        """
+        :return: {section: {label: value}} read from the page tables in one walk, the footnote numbers
+                 (<sup>) are left out of the section titles and labels
+        """
+        index, section, label = {}, None, None
+        for element in self.soup.descendants:
+            name = element.name
+            if name == "h2" or name == "h3":
+                section = _label_text(element)
+            elif name == "tr":
+                label = None
+            elif name == "td" and section is not None:
+                if label is None:
+                    label = _label_text(element)
+                else:
+                    index.setdefault(section, {}).setdefault(label, element.get_text().strip())
+        return index
+
+    @cached_property
+    def statistics(self):
+        """
+        :return: {section: {label: value}} of the whole page, built once on first use. The values come from the
+                 embedded JSON (see statistics_fields) when the page has it, from the tables otherwise.
+        """
+        if self.state is None:
+            return self.dom_statistics
+        index = {}
+        for section, fields in statistics_fields.items():
+            values = index[section] = {}
+            for label, (module, key, *page_text) in fields.items():
+                value = state_value(self.state, module, key)
+                if page_text and value not in (None, "N/A"):
+                    raw = state_value(self.state, module, key, raw=True)
+                    value = value if raw is None else page_text[0](raw)
+                if value is None:
+                    value = self.dom_statistics.get(section, {}).get(label)
+                if value is not None:
+                    values[label] = value
+        return index
 
     def get_stats_types(self):
-        return [title.text[:-1] for title in self.soup.find_all('h2') if not title.find_all('h2')][:1] + \
-               [title.text for title in self.soup.find_all('h3') if not title.find_all('h3')][6:]
+        return list(self.statistics)
 
     def get_data_types_by_stats_type(self, statistics_type):
         """
-        :param statistics_type:
-        :return:
-        """
-        tables_titles = self.get_stats_types()
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[tables_titles.index(statistics_type)].find_all('td') if not t.find_all('td')]
-        res = []
-        for index, elem in enumerate(tds):
-            if index % 2 == 0:
-                elem = elem.text
-                if elem[-1].isnumeric():
-                    res.append(elem.strip()[:-1].strip())
-                else:
-                    res.append(elem.strip())
-        return res
+        :param statistics_type: the section title, ex: "Share Statistics"
+        :return: the row labels of the section
+        """
+        if statistics_type not in self.statistics:
+            raise ValueError(f"No {statistics_type!r} section, expected one of {self.get_stats_types()}")
+        return list(self.statistics[statistics_type])
 
     def get_statistics(self, statistics_type, stats_info):
         """
-        :param statistics_type:
-        :param stats_info:
-        :return:
-        """
-        tables_titles = self.get_stats_types()
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[tables_titles.index(statistics_type)].find_all('td') if not t.find_all('td')]
-        res, i = [], 0
-        for elem in tds:
-            elem = elem.text.strip()
-            if elem[-1].isnumeric():
-                elem = elem.strip()[:-1].strip()
-            else:
-                elem = elem.strip()
-            if elem == stats_info:
-                res.append(elem)
-                i += 1
-            elif i == 1:
-                res.append(elem)
-                return res[1]
-        return "No data"
+        :param statistics_type: the section title, ex: "Share Statistics"
+        :param stats_info: the row label, ex: "% Held by Insiders"
+        :return: the value as shown on the page, "No data" when the section has no such row
+        """
+        value = self.statistics.get(statistics_type, {}).get(stats_info)
+        if value is None and self.state is not None:
+            # a row Yahoo added to the page that statistics_fields does not know yet
+            value = self.dom_statistics.get(statistics_type, {}).get(stats_info)
+        return "No data" if value is None else value
+
+    def get_all_statistics(self):
+        """
+        :return: a copy of the whole {section: {label: value}} index
+        """
+        return {section: dict(values) for section, values in self.statistics.items()}
+
+
+def _label_text(element):
+    # the text without the footnote number, ex: <span>52-Week Change</span> <sup>3</sup> -> "52-Week Change"
+    return "".join(string for string in element.strings if string.parent.name != "sup").strip()
 
 
-class BenchmarkData:
+def statistics_frame(tickers, fields=None, batch_size=100, concurrency=32, errors=None, typed=True, **kwargs):
+    """
+    Download the key-statistics page of every ticker and gather them in one table, ex:
+        statistics_frame(tickers)[("Valuation Measures", "Trailing P/E")]
+    The pages are downloaded batch_size tickers at a time and only their statistics are kept.
+    :param tickers: iterable of stock symbols
+    :param fields: list of (section, label) columns to keep, every statistic found by default
+    :param batch_size: tickers downloaded together
+    :param concurrency: pages downloaded and parsed at the same time
+    :param errors: list receiving (ticker, exception) for the pages that failed or hold no statistics (ValueError),
+                   they are raised if None
+    :param typed: convert each column with yf_normalize.to_typed ("1.23B" -> 1.23e9, "19.89%" -> 0.1989,
+                  "Mar 17, 2006" -> datetime64), the texts shown on the page are kept if False
+    :param kwargs: extra StockStatisticsData arguments (session, parser)
+    :return: a pandas DataFrame indexed by ticker with (section, label) columns, missing values are NaN (NaT for
+             the dates)
+    """
+    import pandas as pd
+    rows, tickers = {}, iter(tickers)
+    while True:
+        group = [ticker for _, ticker in zip(range(batch_size), tickers)]
+        if not group:
+            break
+        objs = prefetch([StockStatisticsData(ticker, **kwargs) for ticker in group], concurrency=concurrency,
+                        return_exceptions=errors is not None)
+        for ticker, obj in zip(group, objs):
+            try:
+                if isinstance(obj, Exception):
+                    raise obj
+                if not any(obj.statistics.values()):
+                    # a 404 or an empty page, the ticker would otherwise be a row of NaN
+                    raise ValueError(f"No statistics found for {ticker} at {obj.url}")
+                rows[ticker] = {(section, label): value for section, values in obj.statistics.items()
+                                for label, value in values.items()}
+            except Exception as error:
+                if errors is None:
+                    raise
+                errors.append((ticker, error))
+    if fields is None:
+        fields = list(dict.fromkeys(field for row in rows.values() for field in row))
+    index = pd.Index(list(rows), name="ticker")
+    columns = pd.MultiIndex.from_tuples(fields, names=["section", "statistic"])
+    if not typed:
+        return pd.DataFrame([[row.get(field) for field in fields] for row in rows.values()], index=index,
+                            columns=columns)
+    # one conversion per column instead of one per value
+    return pd.DataFrame(dict(zip(range(len(fields)), (to_typed([row.get(field) for row in rows.values()])
+                                                      for field in fields))), index=index).set_axis(columns, axis=1)
 
-    def __init__(self, ticker):
+
+class BenchmarkData(YahooPage):
+
+    parse_only = SoupStrainer(["fin-streamer", "table"])
+
+    def __init__(self, ticker, session=None, parser=None):
         """
         :param ticker: the stock symbol as a string value
+        :param session: optional requests.Session, the shared pooled session is used by default
+        :param parser: HTML parser backend (see yf_parsing.parser_backends), the global one by default
         """
+        super().__init__(session, parser)
         self.ticker = ticker.split("=")[0]
-        self.url = f"https://finance.yahoo.com/quote/%5E{self.ticker}?p=%5E{self.ticker}"
-        self.soup = BeautifulSoup(requests.get(self.url, headers=user_agent).content, 'html.parser')
+        self.url = f"{base_url()}/quote/%5E{self.ticker}?p=%5E{self.ticker}"
 
     def get_current_price(self):
         return float([price.text for price in self.soup.find_all("fin-streamer", attrs={"data-test": "qsp-price"})
                       if not price.find_all("fin-streamer", attrs={"data-test": "qsp-price"})][0].replace(",", ""))
 
     def get_last_52_week_range(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[1].find_all('td') if not t.find_all('td')]
-        return [elem.text.replace(",", "") for elem in tds][3]
+        return self.tables[1][3].replace(",", "")
 
     def get_day_range(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[1].find_all('td') if not t.find_all('td')]
-        return [elem.text.replace(",", "") for elem in tds][1]
+        return self.tables[1][1].replace(",", "")
 
     def get_previous_close(self):
-        tables = [t for t in self.soup.find_all('table') if not t.find_all('table')]
-        tds = [t for t in tables[0].find_all('td') if not t.find_all('td')]
-        return float([elem.text for elem in tds][1].replace(",", ""))
+        return float(self.tables[0][1].replace(",", ""))
+
+    def to_dict(self):
+        """
+        :return: every summary field in one call, the tables being walked only once
+        """
+        return {"current_price": self.get_current_price(), "last_52_week_range": self.get_last_52_week_range(),
+                "day_range": self.get_day_range(), "previous_close": self.get_previous_close()}
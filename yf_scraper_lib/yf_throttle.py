@@ -0,0 +1,158 @@
+# Support
+import threading
+import time
+from urllib.parse import urlsplit
+
+# global variable
+# HostThrottle arguments used for every host, see configure_throttle
+defaults = {
+    "rate": 10.0,
+    "burst": 10,
+    "min_rate": 0.5,
+    "max_rate": 200.0,
+    "concurrency": 8,
+    "min_concurrency": 1,
+    "max_concurrency": 64,
+    "decrease": 0.5,
+}
+_throttles = {}
+_throttles_lock = threading.Lock()
+
+
+def is_throttled(response):
+    """
+    :param response: a requests.Response
+    :return: True when Yahoo is pushing back: 429, 999 (Yahoo's own rate limit code), 5xx, an empty 200 page
+             or a redirect to the consent wall
+    """
+    status = response.status_code
+    if status == 429 or status == 999 or status >= 500:
+        return True
+    if status == 200 and not response.content:
+        return True
+    host = urlsplit(response.url or "").hostname or ""
+    return host.startswith("consent.") or host.startswith("guce.")
+
+
+class HostThrottle:
+
+    def __init__(self, rate=10.0, burst=10, min_rate=0.5, max_rate=200.0, concurrency=8, min_concurrency=1,
+                 max_concurrency=64, decrease=0.5):
+        """
+        Token bucket rate limiter and AIMD concurrency limit shared by every fetch to one host.
+        Each healthy response adds one request per second to the rate and, once a full window of limit requests
+        went through, one to the concurrency limit. A throttled response multiplies both by decrease, only once
+        for the requests that were already in flight when it happened.
+        :param rate: starting requests per second
+        :param burst: tokens the bucket holds, the number of requests that may start at once after a pause
+        :param min_rate: the rate never goes under it
+        :param max_rate: the rate never goes over it
+        :param concurrency: starting number of requests in flight
+        :param min_concurrency: the limit never goes under it
+        :param max_concurrency: the limit never goes over it
+        :param decrease: multiplicative decrease applied on a throttled response
+        """
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.limit = concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.decrease = decrease
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.in_flight = 0
+        self.healthy = 0
+        self.generation = 0
+        self.throttled_count = 0
+        self.condition = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        Wait for a concurrency slot and a token.
+        :return: the ticket to give back to release
+        """
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return self.generation
+                # sleep outside of the lock so that releases are not blocked by the wait for a token
+                wait = (1 - self.tokens) / self.rate
+                self.condition.release()
+                try:
+                    time.sleep(wait)
+                finally:
+                    self.condition.acquire()
+
+    def release(self, ticket, throttled):
+        """
+        :param ticket: what acquire returned
+        :param throttled: the response was a push back (see is_throttled)
+        """
+        with self.condition:
+            self.in_flight -= 1
+            if throttled:
+                self.throttled_count += 1
+                if ticket == self.generation:
+                    self.generation += 1
+                    self.limit = max(self.min_concurrency, int(self.limit * self.decrease))
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self.tokens = min(self.tokens, 0.0)
+                    self.healthy = 0
+            else:
+                self.rate = min(self.max_rate, self.rate + 1)
+                self.healthy += 1
+                if self.healthy >= self.limit:
+                    self.healthy = 0
+                    self.limit = min(self.max_concurrency, self.limit + 1)
+            self.condition.notify_all()
+
+    def stats(self):
+        """
+        :return: dict with the current rate, concurrency limit, requests in flight and throttled responses seen
+        """
+        with self.condition:
+            return {"rate": self.rate, "limit": self.limit, "in_flight": self.in_flight,
+                    "throttled": self.throttled_count}
+
+
+def throttle_for(url):
+    """
+    :return: the HostThrottle of the url host, built with defaults on first use
+    """
+    host = urlsplit(url).netloc
+    throttle = _throttles.get(host)
+    if throttle is None:
+        with _throttles_lock:
+            throttle = _throttles.get(host)
+            if throttle is None:
+                throttle = _throttles[host] = HostThrottle(**defaults)
+    return throttle
+
+
+def configure_throttle(**kwargs):
+    """
+    Change the HostThrottle arguments (ex: configure_throttle(rate=2.0, max_concurrency=16)), the throttles
+    built so far are dropped and start again from the new values.
+    """
+    unknown = set(kwargs) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown throttle settings {sorted(unknown)}, expected some of {sorted(defaults)}")
+    defaults.update(kwargs)
+    reset_throttles()
+
+
+def reset_throttles():
+    with _throttles_lock:
+        _throttles.clear()